@@ -1,6 +1,8 @@
 from django.contrib import admin
 
 from .models import (
+    AIJob,
+    AIResponseCache,
     Announcement,
     Assignment,
     AssignmentSubmission,
@@ -18,9 +20,11 @@ from .models import (
     Notification,
     Question,
     StudentProgress,
+    SubmissionAnswer,
     User,
     UserProfile,
 )
+from .regrade import regrade_exam
 
 
 # User Management
@@ -56,13 +60,13 @@ class CourseAdmin(admin.ModelAdmin):
         "instructor",
         "category",
         "difficulty_level",
-        "enrolled_count",
+        "enrollment_count",
         "max_students",
         "is_published",
     ]
     list_filter = ["category", "difficulty_level", "is_published", "created_at"]
     search_fields = ["title", "description", "instructor__username"]
-    readonly_fields = ["enrolled_count"]
+    readonly_fields = ["enrollment_count"]
 
 
 @admin.register(Enrollment)
@@ -107,6 +111,17 @@ class ExamAdmin(admin.ModelAdmin):
     list_display = ["title", "course", "created_by", "time_limit", "is_published"]
     list_filter = ["is_published", "created_at", "course"]
     search_fields = ["title", "course__title"]
+    actions = ["regrade_submissions"]
+
+    @admin.action(description="Regrade submissions against the current answer key")
+    def regrade_submissions(self, request, queryset):
+        updated = 0
+        for exam in queryset:
+            updated += regrade_exam(exam)["updated"]
+        self.message_user(
+            request,
+            f"Regraded {queryset.count()} exam(s); {updated} submissions changed.",
+        )
 
 
 @admin.register(Question)
@@ -125,11 +140,19 @@ class ChoiceAdmin(admin.ModelAdmin):
     ordering = ["question", "order"]
 
 
+class SubmissionAnswerInline(admin.TabularInline):
+    model = SubmissionAnswer
+    extra = 0
+    fields = ["question", "choice", "text", "is_correct", "points_awarded", "feedback"]
+    raw_id_fields = ["question", "choice"]
+
+
 @admin.register(ExamSubmission)
 class ExamSubmissionAdmin(admin.ModelAdmin):
     list_display = ["exam", "student", "grade", "submitted_at", "graded_at"]
     list_filter = ["submitted_at", "graded_at", "exam"]
     search_fields = ["student__username", "exam__title"]
+    inlines = [SubmissionAnswerInline]
 
 
 # Discussion Management
@@ -175,3 +198,19 @@ class CalendarEventAdmin(admin.ModelAdmin):
     list_display = ["title", "course", "event_type", "start_date", "created_by"]
     list_filter = ["event_type", "start_date", "course"]
     search_fields = ["title", "description", "course__title"]
+
+
+# AI
+@admin.register(AIResponseCache)
+class AIResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ["function", "model_name", "hits", "last_used_at", "expires_at"]
+    list_filter = ["function", "model_name"]
+    readonly_fields = ["key", "created_at"]
+
+
+@admin.register(AIJob)
+class AIJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "requested_by", "status", "attempts", "created_at"]
+    list_filter = ["kind", "status", "created_at"]
+    search_fields = ["requested_by__username"]
+    readonly_fields = ["created_at", "started_at", "finished_at"]
@@ -0,0 +1,45 @@
+"""
+AI content generation, loaded on first use.
+
+The functions below are looked up in ``core.ai.gemini`` when they are first
+used, so importing this package is free: web workers and management commands
+that never generate content do not load the Gemini client, its caches or the
+fallback bank. Call them through the package (``ai.generate_lesson_plan``)
+rather than importing the names at module level, which would load them.
+"""
+
+import importlib
+
+# Names served by the package -> module of core.ai defining them
+LAZY_NAMES = {
+    name: "gemini"
+    for name in (
+        "GEMINI_RATE_BUCKET",
+        "explain_concept",
+        "generate_assignment_rubric",
+        "generate_course_syllabus",
+        "generate_exam_content",
+        "generate_lesson_plan",
+        "generate_quiz_batch",
+        "generate_quiz_questions",
+        "get_fallback_explanation",
+        "get_fallback_lesson_plan",
+        "get_fallback_quiz_data",
+        "get_fallback_rubric",
+        "get_fallback_syllabus",
+        "grade_short_answers",
+    )
+}
+
+
+def __getattr__(name):
+    # Looked up on every access rather than cached here, so that patching a
+    # function in its module also patches it for callers of the package
+    module = LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_NAMES))
@@ -0,0 +1,260 @@
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Model used for every Gemini call
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# HTTP status of failures worth retrying: server errors. The SDK raises
+# google.api_core errors, which carry the status as ``code``; timeouts and
+# dropped connections are recognized by type (see ``is_transient``)
+TRANSIENT_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+# Quota and rate limit failures: HTTP status 429, or error text naming the
+# quota for errors without a status. These are never retried: a retry would
+# bypass the shared rate limit bucket just when the quota is hit
+QUOTA_STATUS_CODE = 429
+QUOTA_ERRORS = ("resource exhausted", "resource_exhausted", "quota")
+
+
+def extract_retry_delay(error_message):
+    """
+    Extract retry delay from error message if available.
+    """
+    match = re.search(r"seconds: (\d+)", error_message)
+    if match:
+        return int(match.group(1))
+    return 60  # Default to 1 minute
+
+
+def status_code(error):
+    """HTTP status of a failed call, or None for errors without one."""
+    code = getattr(error, "code", None)
+    return int(code) if isinstance(code, int) else None
+
+
+def is_quota_error(error):
+    """Whether a failed call was refused for quota or rate limit."""
+    if status_code(error) == QUOTA_STATUS_CODE:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in QUOTA_ERRORS)
+
+
+def is_transient(error):
+    """Whether a failed call may succeed when retried."""
+    if is_quota_error(error):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return status_code(error) in TRANSIENT_STATUS_CODES
+
+
+class SDKTransport:
+    """
+    Calls Gemini through the google-generativeai SDK.
+
+    The SDK is configured once and one ``GenerativeModel`` is kept per model
+    name, so every call from this process reuses the same warm client and
+    its connections.
+    """
+
+    def __init__(self, api_key):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name):
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self._genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def generate(self, model_name, prompt, stream, timeout):
+        """
+        Run a prompt.
+
+        Returns:
+            The response text, or an iterator of text chunks when streaming
+        """
+        response = self._model(model_name).generate_content(
+            prompt, stream=stream, request_options={"timeout": timeout}
+        )
+        if stream:
+            return (chunk.text for chunk in response)
+        return response.text
+
+
+class FakeTransport:
+    """
+    Offline stand-in for the Gemini API, for tests and development.
+
+    Each call takes the next scripted reply: a string, an iterable of chunks
+    (sent one by one to streaming calls, joined otherwise) or an exception
+    instance, which is raised. Once the script runs out every call answers
+    ``default``. Calls are recorded in ``calls`` as ``(model_name, prompt,
+    stream, timeout)`` tuples.
+    """
+
+    def __init__(self, replies=(), default="This is an offline Gemini response."):
+        self.replies = list(replies)
+        self.default = default
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, model_name, prompt, stream, timeout):
+        with self._lock:
+            self.calls.append((model_name, prompt, stream, timeout))
+            reply = self.replies.pop(0) if self.replies else self.default
+        if isinstance(reply, BaseException):
+            raise reply
+        chunks = [reply] if isinstance(reply, str) else reply
+        if stream:
+            return iter(chunks)
+        return "".join(chunks)
+
+
+class GeminiClient:
+    """
+    Long-lived Gemini client with per-call deadlines and retries.
+
+    Each attempt gets ``timeout`` seconds, cut short by what is left of the
+    call's overall ``deadline``. Transient failures, but not quota or rate
+    limit errors (see ``is_transient``), are retried up to
+    ``max_retries`` times after a jittered exponential backoff, or after the
+    delay the API asked for when it sent one, as long as the wait fits in
+    the deadline. A streamed call is only retried before its first chunk,
+    so no text is ever delivered twice.
+
+    Args:
+        transport: ``SDKTransport``, ``FakeTransport`` or anything with the
+            same ``generate`` method
+        timeout (float): Seconds allowed for one attempt
+        deadline (float): Seconds allowed for a call, retries included
+        max_retries (int): Retries after the first attempt
+        backoff (float): Base of the exponential backoff, in seconds
+        max_backoff (float): Longest backoff between two attempts
+    """
+
+    def __init__(
+        self,
+        transport,
+        timeout=30.0,
+        deadline=60.0,
+        max_retries=3,
+        backoff=1.0,
+        max_backoff=20.0,
+    ):
+        self.transport = transport
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _retry_wait(self, error, attempt):
+        """Seconds to wait before retry ``attempt`` (counting from 1)."""
+        wait = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+        if "seconds:" in str(error):
+            wait = max(wait, extract_retry_delay(str(error)))
+        return wait
+
+    def generate(self, prompt, on_text=None, model_name=GEMINI_MODEL):
+        """
+        Run a prompt and return the full response text.
+
+        Args:
+            prompt (str): The prompt to send
+            on_text (callable): Called with each chunk of text as it is
+                generated; when given the response is streamed
+            model_name (str): Model to call
+
+        Returns:
+            str: The response text
+
+        Raises:
+            Exception: The last error once retries or the deadline run out,
+                or the first error that is not transient
+        """
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Gemini call exceeded {self.deadline}s deadline")
+            timeout = min(self.timeout, remaining)
+            delivered = False
+            try:
+                if on_text is None:
+                    return self.transport.generate(model_name, prompt, False, timeout)
+                chunks = []
+                for chunk in self.transport.generate(model_name, prompt, True, timeout):
+                    chunks.append(chunk)
+                    delivered = True
+                    on_text(chunk)
+                return "".join(chunks)
+            except Exception as e:
+                attempt += 1
+                if delivered or attempt > self.max_retries or not is_transient(e):
+                    raise
+                wait = self._retry_wait(e, attempt)
+                if wait >= give_up_at - time.monotonic():
+                    raise
+                logger.warning(
+                    f"Gemini call failed ({e}), retry {attempt} in {wait:.1f}s"
+                )
+                time.sleep(wait)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    This process's Gemini client, created on first use.
+
+    The transport is chosen by ``settings.GEMINI_TRANSPORT``: "sdk" calls
+    the API with ``GEMINI_API_KEY``, "fake" answers offline. Timeouts and
+    retries come from ``GEMINI_TIMEOUT``, ``GEMINI_DEADLINE`` and
+    ``GEMINI_MAX_RETRIES``. Created lazily, so each forked worker process
+    builds its own.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if getattr(settings, "GEMINI_TRANSPORT", "sdk") == "fake":
+                transport = FakeTransport()
+            else:
+                api_key = getattr(settings, "GEMINI_API_KEY", None)
+                if not api_key:
+                    raise ValueError(
+                        "GEMINI_API_KEY not found in settings.py or environment variables."
+                    )
+                transport = SDKTransport(api_key)
+            _client = GeminiClient(
+                transport,
+                timeout=getattr(settings, "GEMINI_TIMEOUT", 30.0),
+                deadline=getattr(settings, "GEMINI_DEADLINE", 60.0),
+                max_retries=getattr(settings, "GEMINI_MAX_RETRIES", 3),
+            )
+        return _client
+
+
+def set_client(client):
+    """
+    Replace this process's client, e.g. with one over a ``FakeTransport``;
+    ``None`` makes the next ``get_client`` build a fresh one from settings.
+    """
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,201 @@
+import json
+import math
+import re
+import threading
+import zlib
+from collections import Counter, defaultdict, namedtuple
+from pathlib import Path
+
+# Questions served when Gemini cannot be used. One JSON object per line with
+# the question's ``subject``, ``topic`` and ``keywords``, used for ranking,
+# and the ``question`` itself in the form parse_quiz_response returns.
+BANK_PATH = Path(__file__).resolve().parent / "data" / "fallback_questions.jsonl"
+
+# Words that say nothing about a topic
+STOP_WORDS = frozenset(
+    "a about an and are as at be by does for from how in into is it its of on "
+    "or the this to was what when where which who why with".split()
+)
+
+# Weight of a word by the field it appears in: topic words count most
+FIELD_WEIGHTS = {
+    "topic": 3.0,
+    "subject": 2.0,
+    "keywords": 2.0,
+    "text": 1.0,
+    "answers": 0.5,
+}
+
+# Trigrams count for less than whole words; they match typos and word forms
+# ("photosynthetic", "mitocondria") that share no word with the bank
+TRIGRAM_WEIGHT = 0.3
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Inverted index of a bank: term -> [(line number, weight)], the inverse
+# document frequency of each term, the byte offset and question type of each
+# line, and the line numbers of each question type
+BankIndex = namedtuple("BankIndex", ["postings", "idf", "offsets", "types", "by_type"])
+
+
+def terms(text, weight=1.0):
+    """
+    Index terms of a text: its words, except stop words, and their
+    character trigrams, which are prefixed with "#".
+
+    Returns:
+        Counter: Weight of each term
+    """
+    found = Counter()
+    for word in WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        found[word] += weight
+        padded = f" {word} "
+        for start in range(len(padded) - 2):
+            found["#" + padded[start : start + 3]] += weight * TRIGRAM_WEIGHT
+    return found
+
+
+def _record_terms(record):
+    question = record["question"]
+    answers = [choice["text"] for choice in question.get("choices", [])]
+    answers += [question.get("explanation", ""), question.get("sample_answer", "")]
+    fields = {
+        "topic": record.get("topic", ""),
+        "subject": record.get("subject", ""),
+        "keywords": " ".join(record.get("keywords", [])),
+        "text": question["text"],
+        "answers": " ".join(answers),
+    }
+    found = Counter()
+    for field, text in fields.items():
+        found.update(terms(text, FIELD_WEIGHTS[field]))
+    return found
+
+
+class FallbackBank:
+    """
+    Fallback questions ranked by relevance to a topic.
+
+    The index is built on first use, in one pass over the bank file: an
+    inverted index of words and trigrams with TF-IDF weights normalized per
+    question. Only the index and the byte offset of each question stay in
+    memory; the questions a search returns are read from the file, so each
+    worker process keeps a small index rather than the whole bank.
+
+    Args:
+        path: The bank file, see ``BANK_PATH``
+    """
+
+    def __init__(self, path=BANK_PATH):
+        self.path = Path(path)
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self):
+        """The bank's index, built on first call."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+        return self._index
+
+    def _build(self):
+        offsets, types, documents = [], [], []
+        document_frequency = Counter()
+        with open(self.path, "rb") as bank:
+            offset = 0
+            for line in bank:
+                if line.strip():
+                    record = json.loads(line)
+                    found = _record_terms(record)
+                    offsets.append(offset)
+                    types.append(record["question"]["type"])
+                    documents.append(found)
+                    document_frequency.update(found.keys())
+                offset += len(line)
+
+        count = len(documents)
+        idf = {
+            term: math.log(1 + count / frequency)
+            for term, frequency in document_frequency.items()
+        }
+        postings = defaultdict(list)
+        for number, found in enumerate(documents):
+            weights = {term: tf * idf[term] for term, tf in found.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            for term, weight in weights.items():
+                postings[term].append((number, weight / norm))
+
+        by_type = defaultdict(list)
+        for number, question_type in enumerate(types):
+            by_type[question_type].append(number)
+        return BankIndex(dict(postings), idf, offsets, types, dict(by_type))
+
+    def rank(self, topic, question_type):
+        """
+        Questions of a type that share terms with a topic, best match first.
+
+        Returns:
+            list: Line numbers of the matching questions
+        """
+        index = self.index()
+        scores = defaultdict(float)
+        for term, weight in terms(topic).items():
+            idf = index.idf.get(term)
+            if idf is None:
+                continue
+            for number, document_weight in index.postings[term]:
+                if index.types[number] == question_type:
+                    scores[number] += weight * idf * document_weight
+        return sorted(scores, key=lambda number: (-scores[number], number))
+
+    def search(self, topic, question_type, limit):
+        """
+        Up to ``limit`` questions of a type for a topic.
+
+        The best matches come first. When fewer questions match than asked
+        for, the rest are taken from the other questions of the type,
+        starting at a position derived from the topic, so that unrelated
+        topics do not all get the same questions.
+
+        Args:
+            topic (str): Topic the questions should be about
+            question_type (str): multiple_choice, true_false or short_answer
+            limit (int): Number of questions wanted
+
+        Returns:
+            list: Question dicts, without their "order"
+        """
+        chosen = self.rank(topic, question_type)[:limit]
+        pool = self.index().by_type.get(question_type, [])
+        if len(chosen) < limit and pool:
+            start = zlib.crc32(topic.lower().encode())
+            taken = set(chosen)
+            for step in range(len(pool)):
+                if len(chosen) >= limit:
+                    break
+                number = pool[(start + step) % len(pool)]
+                if number not in taken:
+                    chosen.append(number)
+        return self.read(chosen)
+
+    def read(self, numbers):
+        """The questions on the given lines of the bank, in that order."""
+        offsets = self.index().offsets
+        questions = []
+        with open(self.path, "rb") as bank:
+            for number in numbers:
+                bank.seek(offsets[number])
+                questions.append(json.loads(bank.readline())["question"])
+        return questions
+
+
+# Bank used by core.ai.gemini; its index is built by the first fallback
+default_bank = FallbackBank()
+
+
+def fallback_questions(topic, question_type, limit):
+    """Questions from the default bank, see ``FallbackBank.search``."""
+    return default_bank.search(topic, question_type, limit)
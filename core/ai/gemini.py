@@ -1,138 +1,38 @@
 import json
 import logging
+import math
 import re
-import time
-from datetime import datetime, timedelta
 from functools import wraps
 
 from django.conf import settings
-from django.core.cache import cache
 
-import google.generativeai as genai
+from ..rate_limits import acquire
+from .client import (
+    GEMINI_MODEL,
+    extract_retry_delay,
+    get_client,
+    is_quota_error,
+)
+from .fallback_bank import fallback_questions
+from .quiz_parser import QuizStreamParser, parse_quiz_text
+from .response_cache import cached_response
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Mock data for fallback when API is unavailable
-MOCK_QUIZ_DATA = {
-    "multiple_choice": {
-        "history": [
-            {
-                "order": 1,
-                "type": "multiple_choice",
-                "text": "Which event marked the beginning of World War II?",
-                "choices": [
-                    {"letter": "A", "text": "Pearl Harbor attack"},
-                    {"letter": "B", "text": "German invasion of Poland"},
-                    {"letter": "C", "text": "Battle of Britain"},
-                    {"letter": "D", "text": "D-Day landings"},
-                ],
-                "correct_answer": "B",
-                "explanation": "Germany invaded Poland on September 1, 1939, which prompted Britain and France to declare war on Germany.",
-            },
-            {
-                "order": 2,
-                "type": "multiple_choice",
-                "text": "Who was the first President of the United States?",
-                "choices": [
-                    {"letter": "A", "text": "Thomas Jefferson"},
-                    {"letter": "B", "text": "George Washington"},
-                    {"letter": "C", "text": "John Adams"},
-                    {"letter": "D", "text": "Benjamin Franklin"},
-                ],
-                "correct_answer": "B",
-                "explanation": "George Washington served as the first President from 1789 to 1797.",
-            },
-        ],
-        "science": [
-            {
-                "order": 1,
-                "type": "multiple_choice",
-                "text": "What is the chemical symbol for water?",
-                "choices": [
-                    {"letter": "A", "text": "H2O"},
-                    {"letter": "B", "text": "CO2"},
-                    {"letter": "C", "text": "O2"},
-                    {"letter": "D", "text": "N2"},
-                ],
-                "correct_answer": "A",
-                "explanation": "Water consists of two hydrogen atoms and one oxygen atom, hence H2O.",
-            },
-            {
-                "order": 2,
-                "type": "multiple_choice",
-                "text": "Which planet is closest to the Sun?",
-                "choices": [
-                    {"letter": "A", "text": "Venus"},
-                    {"letter": "B", "text": "Earth"},
-                    {"letter": "C", "text": "Mercury"},
-                    {"letter": "D", "text": "Mars"},
-                ],
-                "correct_answer": "C",
-                "explanation": "Mercury is the innermost planet in our solar system.",
-            },
-        ],
-    },
-    "true_false": [
-        {
-            "order": 1,
-            "type": "true_false",
-            "text": "The Earth revolves around the Sun.",
-            "correct_answer": True,
-            "explanation": "The Earth orbits the Sun in an elliptical path, completing one revolution in about 365.25 days.",
-        },
-        {
-            "order": 2,
-            "type": "true_false",
-            "text": "Photosynthesis occurs only in the dark.",
-            "correct_answer": False,
-            "explanation": "Photosynthesis requires light energy and primarily occurs during daylight hours.",
-        },
-    ],
-    "short_answer": [
-        {
-            "order": 1,
-            "type": "short_answer",
-            "text": "Explain the process of photosynthesis.",
-            "sample_answer": "Photosynthesis is the process by which plants convert light energy into chemical energy. It involves the absorption of carbon dioxide and water to produce glucose and oxygen using chlorophyll.",
-        },
-        {
-            "order": 2,
-            "type": "short_answer",
-            "text": "What are the main causes of climate change?",
-            "sample_answer": "The main causes include greenhouse gas emissions from burning fossil fuels, deforestation, industrial processes, and agricultural practices that increase atmospheric CO2 levels.",
-        },
-    ],
-}
-
 
 def get_fallback_quiz_data(topic, num_questions, question_type):
-    """Generate fallback quiz data when API is unavailable."""
-
-    # Determine category based on topic keywords
-    topic_lower = topic.lower()
-    if any(
-        word in topic_lower
-        for word in ["history", "war", "president", "ancient", "medieval"]
-    ):
-        category = "history"
-    elif any(
-        word in topic_lower
-        for word in ["science", "biology", "chemistry", "physics", "planet"]
-    ):
-        category = "science"
-    else:
-        category = "science"  # default
-
-    if question_type == "multiple_choice":
-        questions = MOCK_QUIZ_DATA["multiple_choice"].get(
-            category, MOCK_QUIZ_DATA["multiple_choice"]["science"]
-        )
-    else:
-        questions = MOCK_QUIZ_DATA[question_type]
+    """
+    Generate fallback quiz data when API is unavailable.
 
-    # Select requested number of questions
-    selected_questions = questions[: min(num_questions, len(questions))]
+    Questions come from the fallback bank, ranked by relevance to the topic.
+    """
+    selected_questions = [
+        {"order": order, **question}
+        for order, question in enumerate(
+            fallback_questions(topic or "", question_type, num_questions), 1
+        )
+    ]
 
     # Generate mock raw text
     raw_text = "\n---\n".join(
@@ -435,34 +335,48 @@ Note: This syllabus is subject to change. Students will be notified of any modif
     return content
 
 
+# Token bucket shared by every Gemini call: the quota belongs to the API key
+GEMINI_RATE_BUCKET = "gemini"
+
+
 # Rate limiting decorator
 def rate_limit_gemini(max_requests_per_minute=10):
     """
     Decorator to implement rate limiting for Gemini API calls.
+
+    Calls take a token from the ``GEMINI_RATE_BUCKET`` token bucket, which
+    is shared by all worker processes, holds ``max_requests_per_minute``
+    tokens and refills at that rate. When it is empty a call waits up to
+    ``settings.GEMINI_RATE_LIMIT_WAIT`` seconds for a token before it is
+    rejected.
+
+    Quota errors raised by the call are returned as a ``quota_exceeded``
+    result, so generators that catch their own errors re-raise those.
     """
 
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = f"gemini_rate_limit_{func.__name__}"
-            current_requests = cache.get(cache_key, 0)
-
-            if current_requests >= max_requests_per_minute:
-                logger.warning(f"Rate limit exceeded for {func.__name__}. Waiting...")
+            token = acquire(
+                GEMINI_RATE_BUCKET,
+                rate=max_requests_per_minute / 60,
+                capacity=max_requests_per_minute,
+                max_wait=getattr(settings, "GEMINI_RATE_LIMIT_WAIT", 0),
+            )
+            if not token.acquired:
+                logger.warning(f"Rate limit exceeded for {func.__name__}.")
                 return {
                     "error": "Rate limit exceeded. Please wait a moment before trying again.",
                     "rate_limited": True,
+                    "retry_after": math.ceil(token.retry_after),
                 }
 
-            # Increment counter
-            cache.set(cache_key, current_requests + 1, 60)  # Reset every minute
-
             try:
                 result = func(*args, **kwargs)
                 return result
             except Exception as e:
                 error_str = str(e)
-                if "429" in error_str or "quota" in error_str.lower():
+                if is_quota_error(e):
                     logger.error(f"Quota exceeded in {func.__name__}: {error_str}")
                     # Extract retry delay if available
                     retry_delay = extract_retry_delay(error_str)
@@ -479,33 +393,19 @@ def rate_limit_gemini(max_requests_per_minute=10):
     return decorator
 
 
-def extract_retry_delay(error_message):
+def generate_text(prompt, on_text=None):
     """
-    Extract retry delay from error message if available.
-    """
-    try:
-        if "seconds:" in error_message:
-            import re
-
-            match = re.search(r"seconds: (\d+)", error_message)
-            if match:
-                return int(match.group(1))
-        return 60  # Default to 1 minute
-    except:
-        return 60
+    Run a prompt and return the full response text.
 
+    Args:
+        prompt (str): The prompt to send to Gemini
+        on_text (callable): Called with each chunk of text as it is generated;
+            when given the response is streamed instead of awaited whole
 
-# Configure Gemini AI API
-def configure_gemini():
-    """
-    Configures the Gemini API with the key from Django settings.
+    Returns:
+        str: The response text
     """
-    api_key = getattr(settings, "GEMINI_API_KEY", None)
-    if not api_key:
-        raise ValueError(
-            "GEMINI_API_KEY not found in settings.py or environment variables."
-        )
-    genai.configure(api_key=api_key)
+    return get_client().generate(prompt, on_text)
 
 
 # Generate exam content using Gemini AI
@@ -520,12 +420,8 @@ def generate_exam_content(prompt_text):
     Returns:
         list: A list of dictionaries with 'question_text' and 'answer'.
     """
-    configure_gemini()
-
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt_text)
-        text = response.text if hasattr(response, "text") else str(response)
+        text = generate_text(prompt_text)
 
         # For now, we just return mock content. Replace this with a real parser.
         return [
@@ -538,8 +434,9 @@ def generate_exam_content(prompt_text):
         return [{"question_text": f"Error: {str(e)}", "answer": ""}]
 
 
+@cached_response(GEMINI_MODEL)
 @rate_limit_gemini(max_requests_per_minute=8)
-def generate_lesson_plan(topic, duration, difficulty_level):
+def generate_lesson_plan(topic, duration, difficulty_level, on_text=None):
     """
     Generate a structured lesson plan using Gemini AI.
 
@@ -547,12 +444,11 @@ def generate_lesson_plan(topic, duration, difficulty_level):
         topic (str): The lesson topic
         duration (str): Duration of the lesson (e.g., "60 minutes")
         difficulty_level (str): Beginner, Intermediate, or Advanced
+        on_text (callable): Streams the content, see ``generate_text``
 
     Returns:
         dict: Structured lesson plan
     """
-    configure_gemini()
-
     prompt = f"""
     Create a detailed lesson plan for the topic: {topic}
     Duration: {duration}
@@ -572,38 +468,21 @@ def generate_lesson_plan(topic, duration, difficulty_level):
     """
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
         return {
             "topic": topic,
             "duration": duration,
             "difficulty": difficulty_level,
-            "content": response.text,
+            "content": generate_text(prompt, on_text),
         }
     except Exception as e:
+        if is_quota_error(e):
+            raise
         return {"error": str(e)}
 
 
-@rate_limit_gemini(max_requests_per_minute=8)
-def generate_quiz_questions(topic, num_questions=5, question_type="multiple_choice"):
-    """
-    Generate quiz questions on a specific topic.
-
-    Args:
-        topic (str): The topic for questions
-        num_questions (int): Number of questions to generate
-        question_type (str): Type of questions (multiple_choice, true_false, short_answer)
-
-    Returns:
-        dict: Structured quiz data with parsed questions
-    """
-    configure_gemini()
-
-    if question_type == "multiple_choice":
-        prompt = f"""
-        Create {num_questions} multiple choice questions about {topic}.
-        Format each question EXACTLY as follows (no extra formatting):
-        
+# Question formats the model is asked to follow, by question type
+QUIZ_FORMATS = {
+    "multiple_choice": """
         QUESTION: [Question text]
         A) [Option A]
         B) [Option B]
@@ -612,56 +491,81 @@ def generate_quiz_questions(topic, num_questions=5, question_type="multiple_choi
         CORRECT: [A/B/C/D]
         EXPLANATION: [Brief explanation]
         ---
-        
-        Please ensure each question follows this exact format.
-        """
-    elif question_type == "true_false":
-        prompt = f"""
-        Create {num_questions} true/false questions about {topic}.
-        Format each question EXACTLY as follows:
-        
+        """,
+    "true_false": """
         QUESTION: [Statement]
         CORRECT: [True/False]
         EXPLANATION: [Brief explanation]
         ---
-        
-        Please ensure each question follows this exact format.
-        """
-    else:  # short_answer
-        prompt = f"""
-        Create {num_questions} short answer questions about {topic}.
-        Format each question EXACTLY as follows:
-        
+        """,
+    "short_answer": """
         QUESTION: [Question text]
         SAMPLE_ANSWER: [Sample answer in 2-3 sentences]
         ---
-        
+        """,
+}
+QUIZ_KINDS = {"multiple_choice": "multiple choice", "true_false": "true/false"}
+
+
+def quiz_format(question_type):
+    """Format block of a question type; unknown types get short answers."""
+    return QUIZ_FORMATS.get(question_type, QUIZ_FORMATS["short_answer"])
+
+
+@cached_response(GEMINI_MODEL)
+@rate_limit_gemini(max_requests_per_minute=8)
+def generate_quiz_questions(
+    topic, num_questions=5, question_type="multiple_choice", on_text=None
+):
+    """
+    Generate quiz questions on a specific topic.
+
+    Args:
+        topic (str): The topic for questions
+        num_questions (int): Number of questions to generate
+        question_type (str): Type of questions (multiple_choice, true_false, short_answer)
+        on_text (callable): Streams the questions, see ``generate_text``;
+            they are then parsed as the text arrives
+
+    Returns:
+        dict: Structured quiz data with parsed questions
+    """
+    prompt = f"""
+        Create {num_questions} {QUIZ_KINDS.get(question_type, "short answer")} questions about {topic}.
+        Format each question EXACTLY as follows (no extra formatting):
+        {quiz_format(question_type)}
         Please ensure each question follows this exact format.
         """
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
+        if on_text is None:
+            text = generate_text(prompt)
+
+            # Parse the response into structured data
+            parsed_questions = parse_quiz_response(text, question_type)
+        else:
+            parser = QuizStreamParser(question_type)
+            parsed_questions = []
+
+            def parse_chunk(chunk):
+                parsed_questions.extend(parser.feed(chunk))
+                on_text(chunk)
 
-        # Parse the response into structured data
-        parsed_questions = parse_quiz_response(response.text, question_type)
+            text = generate_text(prompt, parse_chunk)
+            parsed_questions.extend(parser.close())
 
         return {
             "topic": topic,
             "question_type": question_type,
             "num_questions": num_questions,
-            "questions": response.text,
+            "questions": text,
             "parsed_questions": parsed_questions,
         }
     except Exception as e:
         error_str = str(e)
 
         # Check if it's a quota or rate limit error
-        if (
-            "429" in error_str
-            or "quota" in error_str.lower()
-            or "exceeded" in error_str.lower()
-        ):
+        if is_quota_error(e):
             logger.warning(
                 f"Quota/rate limit exceeded, using fallback data: {error_str}"
             )
@@ -695,118 +599,133 @@ def parse_quiz_response(response_text, question_type):
     Returns:
         list: List of structured question dictionaries
     """
-    questions = []
+    return parse_quiz_text(response_text, question_type)
 
-    try:
-        # Split by separator
-        question_blocks = response_text.split("---")
-
-        for i, block in enumerate(question_blocks):
-            block = block.strip()
-            if not block:
-                continue
 
-            question_data = {"order": i + 1, "type": question_type}
+def generate_quiz_batch(topics, num_questions=5, question_type="multiple_choice"):
+    """
+    Generate quizzes on several topics with a single Gemini call.
 
-            if question_type == "multiple_choice":
-                question_data = parse_multiple_choice(block, i + 1)
-            elif question_type == "true_false":
-                question_data = parse_true_false(block, i + 1)
-            else:  # short_answer
-                question_data = parse_short_answer(block, i + 1)
+    Unlike the other generators this is neither rate limited nor cached and
+    lets errors propagate: ``core.quiz_batches`` takes the rate limit token
+    itself, so that calls can run on worker threads without touching the
+    database, and reports failures per topic instead of showing demo content.
 
-            if question_data:
-                questions.append(question_data)
+    Args:
+        topics (list): Topic names
+        num_questions (int): Questions per topic
+        question_type (str): Type of questions (multiple_choice, true_false, short_answer)
 
-    except Exception as e:
-        print(f"Error parsing quiz response: {e}")
+    Returns:
+        list: ``(text, parsed_questions)`` pairs aligned with ``topics``; a
+        topic missing from the response has empty text and no questions
+    """
+    topic_list = "\n".join(
+        f"        {number}. {topic}" for number, topic in enumerate(topics, 1)
+    )
+    prompt = f"""
+        Create {num_questions} {QUIZ_KINDS.get(question_type, "short answer")} questions about each of these {len(topics)} topics:
+{topic_list}
 
-    return questions
+        Start the questions of each topic with a line "TOPIC <number>: <topic>",
+        using the numbers above. Format each question EXACTLY as follows (no extra formatting):
+        {quiz_format(question_type)}
+        Please ensure each question follows this exact format.
+        """
+    return parse_quiz_batch_response(generate_text(prompt), len(topics), question_type)
 
 
-def parse_multiple_choice(block, order):
-    """Parse multiple choice question block."""
-    lines = [line.strip() for line in block.split("\n") if line.strip()]
+# Header line opening a topic's questions in a batch response
+TOPIC_HEADER = re.compile(r"^\W*TOPIC\s+(\d+)\s*:.*$", re.MULTILINE | re.IGNORECASE)
 
-    question_text = ""
-    choices = []
-    correct_answer = ""
-    explanation = ""
 
-    for line in lines:
-        if line.startswith("QUESTION:"):
-            question_text = line.replace("QUESTION:", "").strip()
-        elif line.startswith(("A)", "B)", "C)", "D)")):
-            choice_letter = line[0]
-            choice_text = line[3:].strip()
-            choices.append({"letter": choice_letter, "text": choice_text})
-        elif line.startswith("CORRECT:"):
-            correct_answer = line.replace("CORRECT:", "").strip()
-        elif line.startswith("EXPLANATION:"):
-            explanation = line.replace("EXPLANATION:", "").strip()
+def parse_quiz_batch_response(response_text, count, question_type):
+    """
+    Split a batch response at its topic headers and parse each topic.
 
-    if question_text and choices:
-        return {
-            "order": order,
-            "type": "multiple_choice",
-            "text": question_text,
-            "choices": choices,
-            "correct_answer": correct_answer,
-            "explanation": explanation,
-        }
-    return None
+    Args:
+        response_text (str): Raw AI response
+        count (int): Number of topics asked for
+        question_type (str): Type of questions
 
+    Returns:
+        list: ``(text, parsed_questions)`` pairs for topics 1 to ``count``
+    """
+    sections = [""] * count
+    headers = list(TOPIC_HEADER.finditer(response_text))
+    for header, following in zip(headers, headers[1:] + [None]):
+        number = int(header.group(1))
+        end = following.start() if following else len(response_text)
+        if 1 <= number <= count and not sections[number - 1]:
+            sections[number - 1] = response_text[header.end() : end].strip()
+    return [
+        (text, parse_quiz_response(text, question_type) if text else [])
+        for text in sections
+    ]
 
-def parse_true_false(block, order):
-    """Parse true/false question block."""
-    lines = [line.strip() for line in block.split("\n") if line.strip()]
 
-    question_text = ""
-    correct_answer = ""
-    explanation = ""
+@rate_limit_gemini(max_requests_per_minute=8)
+def grade_short_answers(items):
+    """
+    Score a batch of short answers with a single Gemini call.
 
-    for line in lines:
-        if line.startswith("QUESTION:"):
-            question_text = line.replace("QUESTION:", "").strip()
-        elif line.startswith("CORRECT:"):
-            correct_answer = line.replace("CORRECT:", "").strip()
-        elif line.startswith("EXPLANATION:"):
-            explanation = line.replace("EXPLANATION:", "").strip()
+    Args:
+        items (list): Dicts with ``question``, ``sample_answer``, ``answer``
+            and ``points``
 
-    if question_text:
-        return {
-            "order": order,
-            "type": "true_false",
-            "text": question_text,
-            "correct_answer": correct_answer.lower() == "true",
-            "explanation": explanation,
-        }
-    return None
+    Returns:
+        dict: ``scores``, a list aligned with ``items`` of dicts with
+        ``score`` (fraction of the points earned, 0 to 1) and ``feedback``,
+        or ``error`` when the batch could not be graded
+    """
+    answers = "\n".join(f"""
+        ANSWER {number}:
+        QUESTION: {item["question"]}
+        REFERENCE: {item["sample_answer"] or "(none provided)"}
+        POINTS: {item["points"]}
+        STUDENT_ANSWER: {item["answer"]}
+        """ for number, item in enumerate(items, 1))
+    prompt = f"""
+    Grade each of the following {len(items)} short answers against its
+    question and reference answer.
+    {answers}
 
+    Respond with ONLY a JSON array containing one object per answer, in order:
+    [{{"score": <fraction of points earned between 0 and 1>, "feedback": "<one sentence>"}}]
+    """
 
-def parse_short_answer(block, order):
-    """Parse short answer question block."""
-    lines = [line.strip() for line in block.split("\n") if line.strip()]
+    try:
+        text = generate_text(prompt)
+        return {"scores": parse_short_answer_scores(text, len(items))}
+    except Exception as e:
+        logger.warning(f"Short answer grading failed: {e}")
+        return {"error": str(e)}
 
-    question_text = ""
-    sample_answer = ""
 
-    for line in lines:
-        if line.startswith("QUESTION:"):
-            question_text = line.replace("QUESTION:", "").strip()
-        elif line.startswith("SAMPLE_ANSWER:"):
-            sample_answer = line.replace("SAMPLE_ANSWER:", "").strip()
+def parse_short_answer_scores(response_text, count):
+    """
+    Parse the JSON score array returned for a short answer batch.
 
-    if question_text:
-        return {
-            "order": order,
-            "type": "short_answer",
-            "text": question_text,
-            "sample_answer": sample_answer,
+    Raises:
+        ValueError: If the response holds no array of ``count`` scores
+    """
+    start = response_text.find("[")
+    end = response_text.rfind("]")
+    if start == -1 or end < start:
+        raise ValueError("No score array in grading response")
+    scores = json.loads(response_text[start : end + 1])
+    if not isinstance(scores, list) or len(scores) != count:
+        raise ValueError(f"Expected {count} scores in grading response")
+    return [
+        {
+            "score": min(max(float(entry.get("score", 0)), 0.0), 1.0),
+            "feedback": str(entry.get("feedback", "")),
         }
-    return None
+        for entry in scores
+    ]
 
 
+@cached_response(GEMINI_MODEL)
 @rate_limit_gemini(max_requests_per_minute=8)
 def generate_assignment_rubric(assignment_description, grading_criteria):
     """
@@ -819,8 +738,6 @@ def generate_assignment_rubric(assignment_description, grading_criteria):
     Returns:
         str: Generated rubric
     """
-    configure_gemini()
-
     prompt = f"""
     Create a detailed grading rubric for the following assignment:
     
@@ -838,13 +755,14 @@ def generate_assignment_rubric(assignment_description, grading_criteria):
     """
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(prompt)
     except Exception as e:
+        if is_quota_error(e):
+            raise
         return f"Error generating rubric: {str(e)}"
 
 
+@cached_response(GEMINI_MODEL)
 @rate_limit_gemini(max_requests_per_minute=8)
 def explain_concept(concept, grade_level="college"):
     """
@@ -857,8 +775,6 @@ def explain_concept(concept, grade_level="college"):
     Returns:
         str: Explanation of the concept
     """
-    configure_gemini()
-
     prompt = f"""
     Explain the concept of "{concept}" in a way that's appropriate for {grade_level} level students.
     
@@ -873,15 +789,16 @@ def explain_concept(concept, grade_level="college"):
     """
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(prompt)
     except Exception as e:
+        if is_quota_error(e):
+            raise
         return f"Error explaining concept: {str(e)}"
 
 
+@cached_response(GEMINI_MODEL)
 @rate_limit_gemini(max_requests_per_minute=8)
-def generate_course_syllabus(course_title, duration, topics_list):
+def generate_course_syllabus(course_title, duration, topics_list, on_text=None):
     """
     Generate a comprehensive course syllabus.
 
@@ -889,12 +806,11 @@ def generate_course_syllabus(course_title, duration, topics_list):
         course_title (str): Title of the course
         duration (str): Course duration (e.g., "16 weeks")
         topics_list (str): Comma-separated list of topics to cover
+        on_text (callable): Streams the syllabus, see ``generate_text``
 
     Returns:
         str: Generated syllabus
     """
-    configure_gemini()
-
     prompt = f"""
     Create a comprehensive course syllabus for:
     
@@ -916,8 +832,8 @@ def generate_course_syllabus(course_title, duration, topics_list):
     """
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_text(prompt, on_text)
     except Exception as e:
+        if is_quota_error(e):
+            raise
         return f"Error generating syllabus: {str(e)}"
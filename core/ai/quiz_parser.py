@@ -0,0 +1,235 @@
+import re
+
+# Field labels of the quiz format (lower case) -> question dict key
+FIELD_LABELS = {
+    "question": "text",
+    "correct": "correct_answer",
+    "correct answer": "correct_answer",
+    "explanation": "explanation",
+    "sample_answer": "sample_answer",
+    "sample answer": "sample_answer",
+}
+
+# "QUESTION: ...", also wrapped in markdown emphasis, numbered ("Question 2:")
+# or after a heading mark or list number
+LABEL_LINE = re.compile(
+    r"[*#>\s]*(?:\d+[.)]\s*)?"
+    r"(question|correct(?: answer)?|explanation|sample[ _]answer)(?:\s+\d+)?"
+    r"\s*\**\s*:\s*\**\s*(.*)",
+    re.IGNORECASE,
+)
+
+# "A) ..." or "A. ..." option lines of multiple choice questions
+CHOICE_LINE = re.compile(r"[*\s]*\(?([A-Z])[).]\**\s+(.*)")
+
+# Line closing a question
+SEPARATOR = re.compile(r"\s*-{3,}\s*$")
+
+# Letter at the start of a multiple choice key such as "B", "(B)" or "B) Paris"
+KEY_LETTER = re.compile(r"[\s*(]*([A-Z])\b")
+
+# Words one of which a label line contains before its colon, and characters
+# an option line starts with before its letter; lines without them skip the
+# regular expressions above
+LABEL_WORDS = ("question", "correct", "explanation", "sample")
+OPTION_MARKS = "*("
+
+# Letters of multiple choice options, in order
+OPTION_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _clean(value):
+    """Value with surrounding whitespace and markdown emphasis removed."""
+    value = value.strip()
+    return value.strip("*").strip() if "*" in value else value
+
+
+def _label(line):
+    """
+    ``(field, value)`` of a decorated label line such as "**Question 2:**",
+    or None for other lines.
+    """
+    head = line.partition(":")[0].lower()
+    if not any(word in head for word in LABEL_WORDS):
+        return None
+    match = LABEL_LINE.match(line)
+    if match:
+        return FIELD_LABELS[match.group(1).lower()], _clean(match.group(2))
+    return None
+
+
+def _option(line, letter):
+    """
+    Text of a decorated option line for ``letter`` such as "**(B)** Mars",
+    or None for other lines.
+    """
+    if line[0] != letter and line[0] not in OPTION_MARKS:
+        return None
+    match = CHOICE_LINE.match(line)
+    if match and match.group(1) == letter:
+        return _clean(match.group(2))
+    return None
+
+
+class QuizStreamParser:
+    """
+    Single-pass parser of quiz text in the format Gemini is prompted for.
+
+    Text can be fed in chunks of any size as it is generated; each call to
+    ``feed`` returns the questions completed by that chunk, so questions are
+    available as soon as their ``---`` separator (or the next ``QUESTION:``)
+    arrives. ``close`` flushes the last question once the text ends.
+
+    Each line moves a small state machine: a label line starts a field, an
+    option line (``A)`` to ``Z)``, in order) adds a choice, and any other
+    line continues the current field, so question text and explanations may
+    span several lines. Questions that cannot be keyed are dropped: multiple
+    choice questions without options, and true/false questions without a
+    true or false answer.
+
+    Args:
+        question_type (str): multiple_choice, true_false or short_answer
+    """
+
+    def __init__(self, question_type):
+        self.question_type = question_type
+        self._multiple_choice = question_type == "multiple_choice"
+        self._buffer = ""
+        self._question = None
+        self._field = None
+        self._order = 0
+
+    def feed(self, chunk):
+        """
+        Parse a chunk of text.
+
+        Returns:
+            list: Question dicts completed by this chunk
+        """
+        if "\n" not in chunk:
+            self._buffer += chunk
+            return []
+        lines = chunk.split("\n")
+        lines[0] = self._buffer + lines[0]
+        self._buffer = lines.pop()
+        return self._lines(lines)
+
+    def close(self):
+        """
+        Parse what is left once the text is complete.
+
+        Returns:
+            list: The last question, if it is complete
+        """
+        questions = self._lines([self._buffer])
+        self._buffer = ""
+        last = self._close()
+        return questions + [last] if last else questions
+
+    def _lines(self, lines):
+        """Advance the state machine line by line; returns closed questions."""
+        questions = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            first = line[0]
+            if first == "-" and SEPARATOR.match(line):
+                closed = self._close()
+                if closed:
+                    questions.append(closed)
+                continue
+
+            question = self._question
+            label = None
+            if ":" in line:
+                # Plain "QUESTION: ..." lines are looked up, others matched
+                head, _, value = line.partition(":")
+                field = FIELD_LABELS.get(head.lower())
+                if field:
+                    value = value.strip()
+                    label = field, _clean(value) if "*" in value else value
+                else:
+                    label = _label(line)
+            if label:
+                field, value = label
+                if field == "text" and question and question.get("text"):
+                    # A new question without a separator before it
+                    closed = self._close()
+                    if closed:
+                        questions.append(closed)
+                    question = None
+                if question is None:
+                    question = self._question = {"choices": []}
+                question[field] = value
+                self._field = field
+                continue
+
+            if question is None:
+                # Text before the first question, such as an introduction
+                continue
+
+            field = self._field
+            if self._multiple_choice and (field == "text" or field == "choices"):
+                choices = question["choices"]
+                if len(choices) < len(OPTION_LETTERS):
+                    letter = OPTION_LETTERS[len(choices)]
+                    # Plain "A) ..." lines are sliced, others matched
+                    if (
+                        first == letter
+                        and line[1:2] in (")", ".")
+                        and line[2:3].isspace()
+                    ):
+                        option = line[2:].strip()
+                        if "*" in option:
+                            option = _clean(option)
+                    else:
+                        option = _option(line, letter)
+                    if option is not None:
+                        choices.append({"letter": letter, "text": option})
+                        self._field = "choices"
+                        continue
+
+            if field == "choices":
+                choice = question["choices"][-1]
+                choice["text"] = f"{choice['text']} {line}"
+            elif field:
+                question[field] = f"{question[field]}\n{line}"
+        return questions
+
+    def _close(self):
+        """End the current question; returns it when it is complete."""
+        data, self._question, self._field = self._question, None, None
+        if not data or not data.get("text"):
+            return None
+
+        question = {"type": self.question_type, "text": data["text"]}
+        correct = data.get("correct_answer", "")
+        if self.question_type == "multiple_choice":
+            if not data["choices"]:
+                return None
+            letter = KEY_LETTER.match(correct)
+            question.update(
+                choices=data["choices"],
+                correct_answer=letter.group(1) if letter else correct,
+                explanation=data.get("explanation", ""),
+            )
+        elif self.question_type == "true_false":
+            answer = correct.lower().rstrip(".")
+            if answer not in ("true", "false"):
+                return None
+            question.update(
+                correct_answer=answer == "true",
+                explanation=data.get("explanation", ""),
+            )
+        else:
+            question["sample_answer"] = data.get("sample_answer", "")
+
+        self._order += 1
+        return {"order": self._order, **question}
+
+
+def parse_quiz_text(text, question_type):
+    """Parse complete quiz text; see ``QuizStreamParser``."""
+    parser = QuizStreamParser(question_type)
+    return parser.feed(text) + parser.close()
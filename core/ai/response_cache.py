@@ -0,0 +1,189 @@
+import hashlib
+import inspect
+import json
+import logging
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import AIResponseCache, PlatformCounter
+
+logger = logging.getLogger(__name__)
+
+# PlatformCounter rows counting cache lookups
+HIT_COUNTER = "gemini_cache_hits"
+MISS_COUNTER = "gemini_cache_misses"
+
+# Result flags marking fallback or failed responses, which are never stored
+UNCACHEABLE_FLAGS = ("error", "is_demo", "quota_exceeded", "rate_limited")
+
+
+def _normalize(value):
+    """Argument value in canonical form: strings with whitespace collapsed."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    return value
+
+
+def response_key(func, model_name, args, kwargs):
+    """
+    Content address of a call: a SHA-256 hash of the function name, its
+    arguments bound to its signature with defaults filled in, and the model.
+    Callable arguments, such as streaming callbacks, only observe the response
+    and are left out.
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {
+        name: value for name, value in bound.arguments.items() if not callable(value)
+    }
+    payload = json.dumps(
+        {
+            "function": func.__name__,
+            "arguments": _normalize(arguments),
+            "model": model_name,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(result):
+    """Whether a response is a real answer rather than an error or fallback."""
+    if isinstance(result, dict):
+        return not any(result.get(flag) for flag in UNCACHEABLE_FLAGS)
+    if isinstance(result, str):
+        return bool(result) and not result.startswith("Error ")
+    return result is not None
+
+
+def _count(name):
+    if not PlatformCounter.objects.filter(name=name).update(value=F("value") + 1):
+        PlatformCounter.objects.get_or_create(name=name)
+        PlatformCounter.objects.filter(name=name).update(value=F("value") + 1)
+
+
+def lookup(key):
+    """
+    Stored response for a key, or None when there is no live entry.
+
+    A hit refreshes the entry's position in the LRU order.
+    """
+    now = timezone.now()
+    response = (
+        AIResponseCache.objects.filter(key=key, expires_at__gt=now)
+        .values_list("response", flat=True)
+        .first()
+    )
+    if response is None:
+        _count(MISS_COUNTER)
+        return None
+    AIResponseCache.objects.filter(key=key).update(hits=F("hits") + 1, last_used_at=now)
+    _count(HIT_COUNTER)
+    return response
+
+
+def store(key, function, model_name, response):
+    """Save a response and evict entries beyond the configured bound."""
+    now = timezone.now()
+    AIResponseCache.objects.update_or_create(
+        key=key,
+        defaults={
+            "function": function,
+            "model_name": model_name,
+            "response": response,
+            "hits": 0,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=settings.GEMINI_CACHE_TTL),
+        },
+    )
+    evict()
+
+
+def evict(max_entries=None):
+    """
+    Drop expired entries, then the least recently used ones over the bound.
+
+    Args:
+        max_entries (int): Entries to keep, defaults to
+            ``settings.GEMINI_CACHE_MAX_ENTRIES``
+
+    Returns:
+        int: Number of entries deleted
+    """
+    if max_entries is None:
+        max_entries = settings.GEMINI_CACHE_MAX_ENTRIES
+    deleted, _ = AIResponseCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    stale = list(
+        AIResponseCache.objects.order_by("-last_used_at", "-id").values_list(
+            "id", flat=True
+        )[max_entries:]
+    )
+    if stale:
+        deleted += AIResponseCache.objects.filter(id__in=stale).delete()[0]
+    return deleted
+
+
+def cache_stats():
+    """
+    Cache counters for monitoring.
+
+    Returns:
+        dict: ``hits``, ``misses``, ``hit_rate`` (None before any lookup) and
+        the number of stored ``entries``
+    """
+    counters = dict(
+        PlatformCounter.objects.filter(
+            name__in=[HIT_COUNTER, MISS_COUNTER]
+        ).values_list("name", "value")
+    )
+    hits = counters.get(HIT_COUNTER, 0)
+    misses = counters.get(MISS_COUNTER, 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+        "entries": AIResponseCache.objects.count(),
+    }
+
+
+def cached_response(model_name):
+    """
+    Decorator serving repeated Gemini calls from the response cache.
+
+    Calls are keyed with ``response_key``, so the same form submitted again
+    reuses the stored response without touching the API or its rate limit.
+    Errors and fallback content are not stored. The wrapped function takes
+    an extra ``use_cache`` keyword; ``use_cache=False`` skips the lookup and
+    replaces the stored response with a fresh one.
+
+    Args:
+        model_name (str): Model the function calls, part of the key so that
+            switching models does not serve old responses
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, use_cache=True, **kwargs):
+            key = response_key(func, model_name, args, kwargs)
+            if use_cache:
+                response = lookup(key)
+                if response is not None:
+                    logger.info(f"Gemini cache hit for {func.__name__}")
+                    return response
+            result = func(*args, **kwargs)
+            if is_cacheable(result):
+                store(key, func.__name__, model_name, result)
+            return result
+
+        return wrapper
+
+    return decorator
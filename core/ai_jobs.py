@@ -0,0 +1,284 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import ai
+from .models import AIJob
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> (core.ai generator, its fallback, argument names in order)
+JOB_FUNCTIONS = {
+    "lesson_plan": (
+        "generate_lesson_plan",
+        "get_fallback_lesson_plan",
+        ("topic", "duration", "difficulty_level"),
+    ),
+    "quiz": (
+        "generate_quiz_questions",
+        "get_fallback_quiz_data",
+        ("topic", "num_questions", "question_type"),
+    ),
+    "rubric": (
+        "generate_assignment_rubric",
+        "get_fallback_rubric",
+        ("assignment_description", "grading_criteria"),
+    ),
+    "explanation": (
+        "explain_concept",
+        "get_fallback_explanation",
+        ("concept", "grade_level"),
+    ),
+    "syllabus": (
+        "generate_course_syllabus",
+        "get_fallback_syllabus",
+        ("course_title", "duration", "topics_list"),
+    ),
+}
+
+# Job kinds run by a function of their own instead of a single generator call:
+# kind -> (function in core.quiz_batches, argument names)
+BATCH_FUNCTIONS = {
+    "quiz_batch": (
+        "run_quiz_batch",
+        ("course_id", "topics", "num_questions", "question_type"),
+    ),
+}
+
+# Job kinds whose generator streams its text through an ``on_text`` callback
+STREAMING_KINDS = ("lesson_plan", "quiz", "syllabus")
+
+# Streamed text is written to the job at most this often, in seconds
+STREAM_FLUSH_INTERVAL = 0.2
+
+# Jobs run per worker pass, claimed one at a time as each starts
+JOBS_PER_PASS = 10
+
+# A running job not heard from for this many seconds is assumed lost with its
+# worker and is claimed again, up to MAX_JOB_ATTEMPTS runs in total. Jobs
+# refresh ``started_at`` as they stream text or save progress (see
+# ``keep_alive``), so only silent jobs go stale
+JOB_STALE_AFTER = 10 * 60
+MAX_JOB_ATTEMPTS = 3
+
+
+def submit_job(user, kind, **arguments):
+    """
+    Queue an AI generation job and return it without waiting for the model.
+
+    Queued jobs are run by ``manage.py run_ai_jobs``. With
+    ``AI_JOB_MODE = "eager"`` they are instead run in this process once the
+    current transaction commits, which needs no worker and is meant for
+    development and tests.
+
+    Args:
+        user (User): The instructor requesting the content
+        kind (str): One of ``JOB_FUNCTIONS`` or ``BATCH_FUNCTIONS``
+        **arguments: The generator's arguments, by name
+
+    Returns:
+        AIJob: The queued job
+    """
+    if kind in BATCH_FUNCTIONS:
+        names = BATCH_FUNCTIONS[kind][1]
+    elif kind in JOB_FUNCTIONS:
+        names = JOB_FUNCTIONS[kind][2]
+    else:
+        raise ValueError(f"Unknown AI job kind: {kind}")
+    unknown = set(arguments) - set(names)
+    if unknown:
+        raise ValueError(f"Unexpected arguments for {kind}: {', '.join(unknown)}")
+
+    job = AIJob.objects.create(requested_by=user, kind=kind, arguments=arguments)
+    if getattr(settings, "AI_JOB_MODE", "worker") == "eager":
+        transaction.on_commit(lambda: run_pending_jobs(job_ids=[job.pk]))
+    return job
+
+
+def generate(kind, arguments, on_text=None):
+    """
+    Call the Gemini generator of a job kind, falling back to demo content.
+
+    Args:
+        kind (str): One of ``JOB_FUNCTIONS``
+        arguments (dict): The generator's arguments, by name
+        on_text (callable): Receives text chunks as they are generated, for
+            kinds in ``STREAMING_KINDS``
+
+    Returns:
+        tuple: ``(result, warning)``, the warning set when demo content is
+        returned instead of generated content
+
+    Raises:
+        RuntimeError: If the generator returned an error other than a quota
+            or rate limit, as an ``error`` dict or an "Error ..." string
+    """
+    generator, fallback, names = JOB_FUNCTIONS[kind]
+    values = [arguments.get(name) for name in names]
+    streaming = {"on_text": on_text} if on_text and kind in STREAMING_KINDS else {}
+    result = getattr(ai, generator)(*values, **streaming)
+
+    if isinstance(result, dict):
+        if result.get("rate_limited"):
+            return (
+                getattr(ai, fallback)(*values),
+                "Rate limit reached. Showing demo content. Please wait before "
+                "trying AI generation again.",
+            )
+        if result.get("quota_exceeded"):
+            retry_after = result.get("retry_after", 60)
+            if not result.get("is_demo"):
+                result = getattr(ai, fallback)(*values)
+            return (
+                result,
+                f"API quota exceeded. Showing demo content. Wait {retry_after} "
+                "seconds for AI generation or upgrade your Gemini API plan.",
+            )
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+    elif isinstance(result, str) and result.startswith("Error "):
+        # Text generators report their failures as text
+        raise RuntimeError(result)
+    return result, ""
+
+
+def claim_jobs(job_ids=None, limit=1):
+    """
+    Mark queued jobs, and running jobs left behind by a dead worker, as
+    running by this worker.
+
+    Claim only jobs about to start: a claimed job left waiting behind others
+    could go stale and be claimed again by another worker.
+
+    Jobs are locked while they are claimed (skipping rows another worker
+    holds, where the database supports it) and the transaction is committed
+    before any model call, so generation never holds a lock.
+
+    Returns:
+        list: The claimed jobs, oldest first
+    """
+    now = timezone.now()
+    stale = Q(status="running", started_at__lt=now - timedelta(seconds=JOB_STALE_AFTER))
+    with transaction.atomic():
+        AIJob.objects.filter(stale, attempts__gte=MAX_JOB_ATTEMPTS).update(
+            status="failed", error="The job did not finish.", finished_at=now
+        )
+        jobs = AIJob.objects.filter(Q(status="queued") | stale).order_by("created_at")
+        if job_ids is not None:
+            jobs = jobs.filter(pk__in=job_ids)
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        jobs = list(jobs[:limit])
+        AIJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status="running",
+            started_at=now,
+            attempts=F("attempts") + 1,
+            streamed_text="",
+        )
+    for job in jobs:
+        job.status = "running"
+        job.started_at = now
+        job.streamed_text = ""
+    return jobs
+
+
+def _text_streamer(job):
+    """
+    ``on_text`` callback appending chunks to ``job.streamed_text``.
+
+    The first chunk is written at once and later ones at most every
+    ``STREAM_FLUSH_INTERVAL`` seconds; ``run_job`` saves the rest.
+    """
+    flushed = 0.0
+
+    def on_text(chunk):
+        nonlocal flushed
+        job.streamed_text += chunk
+        now = time.monotonic()
+        if now - flushed >= STREAM_FLUSH_INTERVAL:
+            keep_alive(job, streamed_text=job.streamed_text)
+            flushed = now
+
+    return on_text
+
+
+def keep_alive(job, **fields):
+    """
+    Refresh a running job's ``started_at`` so it does not go stale, saving
+    ``fields`` in the same statement.
+    """
+    job.started_at = timezone.now()
+    AIJob.objects.filter(pk=job.pk).update(started_at=job.started_at, **fields)
+
+
+def run_batch(job):
+    """
+    Run a job of one of the ``BATCH_FUNCTIONS`` kinds.
+
+    Returns:
+        tuple: ``(result, warning)``, the warning set when some items failed
+    """
+    from . import quiz_batches
+
+    function, names = BATCH_FUNCTIONS[job.kind]
+    result = getattr(quiz_batches, function)(
+        job, **{name: job.arguments.get(name) for name in names}
+    )
+    warning = ""
+    if result.get("failed"):
+        total = result["created"] + result["failed"]
+        warning = f"{result['failed']} of {total} topics could not be generated."
+    return result, warning
+
+
+def run_job(job):
+    """Generate a claimed job's content and store the outcome on the job."""
+    on_text = _text_streamer(job) if job.kind in STREAMING_KINDS else None
+    try:
+        if job.kind in BATCH_FUNCTIONS:
+            job.result, job.warning = run_batch(job)
+        else:
+            job.result, job.warning = generate(job.kind, job.arguments, on_text)
+        job.status = "done"
+    except Exception as e:
+        logger.warning(f"AI job {job.pk} failed: {e}")
+        job.error = str(e)
+        job.status = "failed"
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=[
+            "result",
+            "streamed_text",
+            "progress",
+            "warning",
+            "error",
+            "status",
+            "finished_at",
+        ]
+    )
+
+
+def run_pending_jobs(job_ids=None, limit=JOBS_PER_PASS):
+    """
+    Claim and run a pass of queued jobs, one at a time.
+
+    Args:
+        job_ids (list): Restrict the pass to these jobs
+        limit (int): Maximum jobs run in this pass
+
+    Returns:
+        int: Number of jobs run
+    """
+    ran = 0
+    while ran < limit:
+        jobs = claim_jobs(job_ids=job_ids)
+        if not jobs:
+            break
+        run_job(jobs[0])
+        ran += 1
+    return ran
@@ -26,4 +26,11 @@ class CourseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Course
-        fields = ["id", "title", "description", "instructor"]
+        fields = [
+            "id",
+            "title",
+            "description",
+            "instructor",
+            "max_students",
+            "enrollment_count",
+        ]
@@ -0,0 +1,189 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Course, Enrollment, PlatformCounter, User
+
+# Counter name -> model whose rows it counts
+COUNTED_MODELS = {
+    "users": User,
+    "courses": Course,
+    "enrollments": Enrollment,
+}
+
+
+def adjust_counter(name, delta):
+    """
+    Add ``delta`` to a counter with a single atomic UPDATE.
+
+    The update runs in the caller's transaction, so a rolled back insert or
+    delete rolls its count back too. Counters that have not been seeded yet are
+    left alone; ``counter_values`` seeds them with an exact count on first read.
+    """
+    PlatformCounter.objects.filter(name=name).update(value=F("value") + delta)
+
+
+def reconcile_counters(names=None):
+    """
+    Recount tracked tables and overwrite the stored counters.
+
+    Each counter row is locked before its table is counted, so writers that
+    commit while the recount runs wait for it and then apply their own delta
+    on top of the fresh value instead of being lost.
+
+    Args:
+        names (list): Counter names to reconcile, defaults to all of them
+
+    Returns:
+        dict: ``{name: (stored, actual)}`` with the value found before the
+        recount and the exact value written
+    """
+    results = {}
+    for name in names or COUNTED_MODELS:
+        with transaction.atomic():
+            PlatformCounter.objects.get_or_create(name=name)
+            counter = PlatformCounter.objects.select_for_update().get(name=name)
+            actual = COUNTED_MODELS[name].objects.count()
+            results[name] = (counter.value, actual)
+            if counter.value != actual:
+                counter.value = actual
+                counter.save(update_fields=["value", "updated_at"])
+    return results
+
+
+def counter_values():
+    """Current value of every tracked counter, seeding any that are missing."""
+    values = dict(
+        PlatformCounter.objects.filter(name__in=COUNTED_MODELS).values_list(
+            "name", "value"
+        )
+    )
+    missing = [name for name in COUNTED_MODELS if name not in values]
+    if missing:
+        values.update(
+            (name, actual) for name, (_, actual) in reconcile_counters(missing).items()
+        )
+    return values
+
+
+def estimated_count(model):
+    """
+    Row count estimate for a model's table from the planner statistics.
+
+    Reads ``pg_class.reltuples`` on PostgreSQL and
+    ``information_schema.tables.table_rows`` on MySQL, neither of which touches
+    the table itself. Returns None when the backend keeps no such statistics
+    or the table has never been analyzed.
+    """
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+    elif connection.vendor == "mysql":
+        sql = (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s"
+        )
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that have never been vacuumed or analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def platform_totals(estimate=None):
+    """
+    User, course and enrollment totals for the admin dashboards.
+
+    Values come from the maintained counters table. In estimate mode, enabled
+    per call or with ``PLATFORM_COUNTS_MODE = "estimate"``, planner statistics
+    are used instead where the backend provides them.
+
+    Returns:
+        dict: ``total_users``, ``total_courses`` and ``total_enrollments``
+    """
+    if estimate is None:
+        estimate = getattr(settings, "PLATFORM_COUNTS_MODE", "counter") == "estimate"
+
+    values = {}
+    if estimate:
+        for name, model in COUNTED_MODELS.items():
+            value = estimated_count(model)
+            if value is not None:
+                values[name] = value
+    if len(values) < len(COUNTED_MODELS):
+        values = {**counter_values(), **values}
+    return {f"total_{name}": values[name] for name in COUNTED_MODELS}
+
+
+# ======================
+# COURSE ENROLLMENT COUNTS
+# ======================
+
+
+def adjust_enrollment_count(enrollment, delta):
+    """
+    Apply an enroll (+1) or unenroll (-1) to ``Course.enrollment_count``.
+
+    The stored count is changed with one atomic F() UPDATE in the caller's
+    transaction and clamped at zero so drift can never trip the column's
+    non-negative constraint. A course already loaded on the enrollment is
+    patched in memory too, so callers see the new count without a refresh.
+    """
+    Course.objects.filter(pk=enrollment.course_id).update(
+        enrollment_count=Greatest(F("enrollment_count") + delta, 0)
+    )
+    if Enrollment.course.is_cached(enrollment):
+        course = enrollment.course
+        course.enrollment_count = max(course.enrollment_count + delta, 0)
+
+
+def reconcile_enrollment_counts(course_ids=None, batch_size=500):
+    """
+    Recount enrollments and correct stored ``Course.enrollment_count`` values.
+
+    Courses are processed in batches; each batch is row-locked before its
+    enrollments are counted, so concurrent enrolls are applied after the
+    corrected value rather than overwritten by it.
+
+    Args:
+        course_ids (list): Courses to reconcile, defaults to every course
+        batch_size (int): Courses locked and recounted per transaction
+
+    Returns:
+        dict: ``{course_id: (stored, actual)}`` for every corrected course
+    """
+    courses = Course.objects.order_by("pk")
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+    ids = list(courses.values_list("pk", flat=True))
+
+    corrected = {}
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        with transaction.atomic():
+            locked = list(
+                Course.objects.select_for_update()
+                .filter(pk__in=batch)
+                .only("pk", "enrollment_count")
+            )
+            actual = dict(
+                Enrollment.objects.filter(course_id__in=batch)
+                .order_by()
+                .values("course")
+                .annotate(total=Count("pk"))
+                .values_list("course", "total")
+            )
+            stale = []
+            for course in locked:
+                value = actual.get(course.pk, 0)
+                if course.enrollment_count != value:
+                    corrected[course.pk] = (course.enrollment_count, value)
+                    course.enrollment_count = value
+                    stale.append(course)
+            Course.objects.bulk_update(stale, ["enrollment_count"])
+    return corrected
@@ -0,0 +1,179 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+
+from .models import Assignment, Course, Enrollment, Exam, ExamSubmission, User
+
+# Signals drop cached stats as soon as changes to their inputs commit; the
+# timeout only bounds staleness when the cache backend is not shared between
+# workers.
+STATS_CACHE_TIMEOUT = 300
+
+# Number of course cards shown on the instructor dashboard
+DASHBOARD_COURSE_LIMIT = 6
+
+
+class SubqueryCount(Subquery):
+    """COUNT(*) over a correlated subquery, usable as an annotation."""
+
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = IntegerField()
+
+
+def instructor_stats_key(instructor_id):
+    return f"instructor_dashboard_stats_{instructor_id}"
+
+
+def instructor_dashboard_stats(user):
+    """
+    Headline numbers and course cards for the instructor dashboard.
+
+    The three counts come from one query with correlated COUNT subqueries and
+    the course cards, which carry their stored ``enrollment_count``, from one
+    more. The result is cached per instructor until ``invalidate_instructor_stats`` is called.
+
+    Returns:
+        dict: ``my_courses_count``, ``total_students``, ``pending_reviews`` and
+        ``my_courses``
+    """
+    key = instructor_stats_key(user.pk)
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    stats = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            my_courses_count=SubqueryCount(
+                Course.objects.filter(instructor=OuterRef("pk")).values("pk")
+            ),
+            total_students=SubqueryCount(
+                Enrollment.objects.filter(course__instructor=OuterRef("pk")).values(
+                    "pk"
+                )
+            ),
+            pending_reviews=SubqueryCount(
+                ExamSubmission.objects.filter(
+                    exam__course__instructor=OuterRef("pk"), graded_at__isnull=True
+                ).values("pk")
+            ),
+        )
+        .values("my_courses_count", "total_students", "pending_reviews")
+        .get()
+    )
+    stats["my_courses"] = list(
+        Course.objects.filter(instructor=user).order_by("id")[:DASHBOARD_COURSE_LIMIT]
+    )
+    cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_instructor_stats(instructor_id):
+    """
+    Drop an instructor's cached stats once the current transaction commits.
+
+    Dropping them earlier would let a read before the commit cache the old
+    stats again for the full timeout.
+    """
+    if instructor_id is not None:
+        key = instructor_stats_key(instructor_id)
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+def student_completion_key(student_id):
+    return f"student_completion_{student_id}"
+
+
+def student_completion(user):
+    """
+    Course and assignment completion percentages for a student's dashboard.
+
+    Totals and the student's submissions are counted per course with one
+    grouped aggregate over assignments and one over exams, however many
+    courses the student is enrolled in. Courses without any assignments or
+    exams are left out of the course average. Cached per student.
+
+    Returns:
+        dict: ``course_completion`` and ``assignment_completion`` as whole
+        percentages
+    """
+    key = student_completion_key(user.pk)
+    completion = cache.get(key)
+    if completion is not None:
+        return completion
+
+    enrolled = Enrollment.objects.filter(student=user).values("course")
+    per_course = {}
+    for model in (Assignment, Exam):
+        counts = (
+            model.objects.filter(course__in=enrolled)
+            .values("course")
+            .annotate(
+                total=Count("id", distinct=True),
+                done=Count("id", filter=Q(submissions__student=user), distinct=True),
+            )
+            .order_by()
+        )
+        for row in counts:
+            totals = per_course.setdefault(row["course"], {})
+            totals[model] = (row["total"], row["done"])
+
+    def percent(done, total):
+        return round(done * 100 / total) if total else 0
+
+    assignment_total = sum(t.get(Assignment, (0, 0))[0] for t in per_course.values())
+    assignment_done = sum(t.get(Assignment, (0, 0))[1] for t in per_course.values())
+    course_percents = [
+        percent(
+            sum(done for _, done in totals.values()),
+            sum(total for total, _ in totals.values()),
+        )
+        for totals in per_course.values()
+    ]
+    completion = {
+        "course_completion": (
+            round(sum(course_percents) / len(course_percents)) if course_percents else 0
+        ),
+        "assignment_completion": percent(assignment_done, assignment_total),
+    }
+    cache.set(key, completion, STATS_CACHE_TIMEOUT)
+    return completion
+
+
+def invalidate_student_completion(student_ids):
+    """
+    Drop students' cached completion once the current transaction commits,
+    like ``invalidate_instructor_stats``.
+    """
+    keys = [student_completion_key(pk) for pk in student_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_course_completion(course_id):
+    """
+    Drop completion for every student in a course whose items changed, once
+    the current transaction commits.
+    """
+    transaction.on_commit(
+        lambda: invalidate_student_completion(
+            Enrollment.objects.filter(course_id=course_id).values_list(
+                "student_id", flat=True
+            )
+        )
+    )
+
+
+def exam_instructor_id(exam_id):
+    return (
+        Exam.objects.filter(pk=exam_id)
+        .values_list("course__instructor_id", flat=True)
+        .first()
+    )
+
+
+def course_instructor_id(course_id):
+    return (
+        Course.objects.filter(pk=course_id)
+        .values_list("instructor_id", flat=True)
+        .first()
+    )
@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Course, Enrollment
+
+# Outcomes of an enrollment attempt
+ENROLLED = "enrolled"
+ALREADY_ENROLLED = "already_enrolled"
+FULL = "full"
+
+EnrollmentResult = namedtuple("EnrollmentResult", ["status", "enrollment"])
+
+
+def enroll_student(student, course):
+    """
+    Enroll a student in a course without ever exceeding ``max_students``.
+
+    A seat is claimed first with a single conditional UPDATE that only
+    increments ``enrollment_count`` while it is below capacity. That statement
+    takes the course row's write lock, so concurrent attempts on the same
+    course queue behind it instead of racing on a stale count, and on SQLite it
+    opens the write transaction up front rather than upgrading a read lock.
+    The enrollment row is then inserted; the ``(student, course)`` unique
+    constraint turns a duplicate into a rolled back claim.
+
+    Args:
+        student (User): The student to enroll
+        course (Course): The course to enroll in
+
+    Returns:
+        EnrollmentResult: ``status`` is ``ENROLLED``, ``ALREADY_ENROLLED`` or
+        ``FULL``; ``enrollment`` is the new row when one was created
+    """
+    with transaction.atomic():
+        claimed = Course.objects.filter(
+            pk=course.pk, enrollment_count__lt=F("max_students")
+        ).update(enrollment_count=F("enrollment_count") + 1)
+        if not claimed:
+            if Enrollment.objects.filter(student=student, course=course).exists():
+                return EnrollmentResult(ALREADY_ENROLLED, None)
+            return EnrollmentResult(FULL, None)
+
+        enrollment = Enrollment(student=student, course=course)
+        # The seat is already counted; see core.signals
+        enrollment._seat_claimed = True
+        try:
+            with transaction.atomic():
+                enrollment.save()
+        except IntegrityError:
+            # Release the claimed seat along with everything else above
+            transaction.set_rollback(True)
+            return EnrollmentResult(ALREADY_ENROLLED, None)
+
+    course.enrollment_count += 1
+    return EnrollmentResult(ENROLLED, enrollment)
@@ -0,0 +1,400 @@
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+
+from .models import (
+    Assignment,
+    AssignmentSubmission,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    GradebookSnapshot,
+    User,
+)
+
+
+class Gradebook:
+    """
+    Dense student x item grade matrix for a single course.
+
+    Columns are the course's assignments followed by its exams, each a dict with
+    ``kind``, ``id`` and ``title``; rows follow enrollment order. Missing grades
+    are stored as None.
+    """
+
+    def __init__(self, course, students, columns, matrix):
+        self.course = course
+        self.students = students
+        self.columns = columns
+        self.matrix = matrix
+
+    @property
+    def assignments(self):
+        return [column for column in self.columns if column["kind"] == "assignment"]
+
+    @property
+    def exams(self):
+        return [column for column in self.columns if column["kind"] == "exam"]
+
+    def rows(self):
+        """Yield one template-friendly dict per student."""
+        split = len(self.assignments)
+        for student, grades in zip(self.students, self.matrix):
+            yield {
+                "student": student,
+                "assignment_grades": grades[:split],
+                "exam_grades": grades[split:],
+                "overall_grade": overall_grade(grades),
+            }
+
+
+def overall_grade(grades):
+    """Average of the grades that are present, or 0 when none are."""
+    scored = [grade for grade in grades if grade is not None]
+    return round(sum(scored) / len(scored), 1) if scored else 0
+
+
+def course_columns(course):
+    """Gradebook columns for a course: assignments, then exams, by id."""
+    return [
+        {"kind": "assignment", "id": item_id, "title": title}
+        for item_id, title in Assignment.objects.filter(course=course)
+        .order_by("id")
+        .values_list("id", "title")
+    ] + [
+        {"kind": "exam", "id": item_id, "title": title}
+        for item_id, title in Exam.objects.filter(course=course)
+        .order_by("id")
+        .values_list("id", "title")
+    ]
+
+
+def build_gradebook(course):
+    """
+    Build the gradebook for a course in a fixed number of queries.
+
+    Enrolled students, assignments, exams and both submission tables are each
+    fetched once, then pivoted in memory into a dense matrix.
+
+    Args:
+        course (Course): The course to build the gradebook for
+
+    Returns:
+        Gradebook: The populated grade matrix
+    """
+    students = []
+    row_index = {}
+    enrollments = (
+        Enrollment.objects.filter(course=course)
+        .select_related("student")
+        .order_by("id")
+    )
+    for enrollment in enrollments:
+        if enrollment.student_id not in row_index:
+            row_index[enrollment.student_id] = len(students)
+            students.append(enrollment.student)
+
+    columns = course_columns(course)
+    column_index = {
+        (column["kind"], column["id"]): index for index, column in enumerate(columns)
+    }
+
+    matrix = [[None] * len(columns) for _ in students]
+    filled = set()
+
+    def place(kind, item_id, student_id, grade):
+        row = row_index.get(student_id)
+        column = column_index.get((kind, item_id))
+        if row is None or column is None or (row, column) in filled:
+            return
+        filled.add((row, column))
+        matrix[row][column] = grade
+
+    assignment_grades = (
+        AssignmentSubmission.objects.filter(assignment__course=course)
+        .order_by("id")
+        .values_list("assignment_id", "student_id", "grade")
+    )
+    for assignment_id, student_id, grade in assignment_grades:
+        place("assignment", assignment_id, student_id, grade)
+
+    # Exam submissions are not unique per student; keep the earliest, which
+    # matches what the per-cell ``.first()`` lookups used to return.
+    exam_grades = (
+        ExamSubmission.objects.filter(exam__course=course)
+        .order_by("id")
+        .values_list("exam_id", "student_id", "grade")
+    )
+    for exam_id, student_id, grade in exam_grades:
+        place("exam", exam_id, student_id, grade)
+
+    return Gradebook(course, students, columns, matrix)
+
+
+class _StudentCursor:
+    """Walk rows sorted by student id, handing out one student's rows at a time."""
+
+    def __init__(self, rows):
+        self._groups = groupby(rows, key=itemgetter(0))
+        self._advance()
+
+    def _advance(self):
+        self._current = next(self._groups, None)
+
+    def take(self, student_id):
+        while self._current is not None and self._current[0] < student_id:
+            self._advance()
+        if self._current is None or self._current[0] != student_id:
+            return []
+        rows = list(self._current[1])
+        self._advance()
+        return rows
+
+
+def stream_gradebook(course, chunk_size=2000):
+    """
+    Stream a course gradebook one student at a time.
+
+    Enrollments and both submission tables are read with chunked
+    ``.iterator()`` cursors sorted by student and merged on the fly, so memory
+    use does not grow with enrollment. Cells follow the same rules as
+    ``build_gradebook``.
+
+    Args:
+        course (Course): The course to export
+        chunk_size (int): Rows fetched per database round-trip
+
+    Returns:
+        tuple: ``(columns, rows)`` where ``rows`` lazily yields
+        ``(student, grades)`` and ``student`` is
+        ``(id, username, first_name, last_name, email)``
+    """
+    columns = course_columns(course)
+    column_index = {
+        (column["kind"], column["id"]): index for index, column in enumerate(columns)
+    }
+
+    def rows():
+        enrollments = (
+            Enrollment.objects.filter(course=course)
+            .order_by("student_id", "id")
+            .values_list(
+                "student_id",
+                "student__username",
+                "student__first_name",
+                "student__last_name",
+                "student__email",
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+        assignment_rows = _StudentCursor(
+            AssignmentSubmission.objects.filter(assignment__course=course)
+            .order_by("student_id", "id")
+            .values_list("student_id", "assignment_id", "grade")
+            .iterator(chunk_size=chunk_size)
+        )
+        exam_rows = _StudentCursor(
+            ExamSubmission.objects.filter(exam__course=course)
+            .order_by("student_id", "id")
+            .values_list("student_id", "exam_id", "grade")
+            .iterator(chunk_size=chunk_size)
+        )
+
+        previous = None
+        for student in enrollments:
+            if student[0] == previous:
+                continue
+            previous = student[0]
+            grades = [None] * len(columns)
+            filled = set()
+            for kind, submissions in (
+                ("assignment", assignment_rows.take(student[0])),
+                ("exam", exam_rows.take(student[0])),
+            ):
+                for _, item_id, grade in submissions:
+                    column = column_index.get((kind, item_id))
+                    if column is not None and column not in filled:
+                        filled.add(column)
+                        grades[column] = grade
+            yield student, grades
+
+    return columns, rows()
+
+
+# ======================
+# MATERIALIZED SNAPSHOTS
+# ======================
+
+
+def get_gradebook(course):
+    """
+    Return the course gradebook, served from its stored snapshot.
+
+    The snapshot is built on first access and afterwards kept current by the
+    signal handlers in ``core.signals``, so a read costs two queries regardless
+    of course size.
+    """
+    snapshot = GradebookSnapshot.objects.filter(course=course).first()
+    if snapshot is None:
+        return rebuild_gradebook(course)
+
+    data = snapshot.data
+    users = User.objects.in_bulk(data["students"])
+    students = [users[student_id] for student_id in data["students"]]
+    return Gradebook(course, students, data["columns"], data["matrix"])
+
+
+def rebuild_gradebook(course):
+    """Rebuild a course gradebook from scratch and store it as the snapshot."""
+    gradebook = build_gradebook(course)
+    data = {
+        "students": [student.id for student in gradebook.students],
+        "columns": gradebook.columns,
+        "matrix": gradebook.matrix,
+    }
+    snapshot, created = GradebookSnapshot.objects.get_or_create(
+        course=course, defaults={"data": data}
+    )
+    if not created:
+        snapshot.data = data
+        snapshot.version += 1
+        snapshot.save(update_fields=["data", "version", "updated_at"])
+    return gradebook
+
+
+def invalidate_gradebook(course_id):
+    """Drop a stored snapshot, e.g. after bulk writes that bypass signals."""
+    GradebookSnapshot.objects.filter(course_id=course_id).delete()
+
+
+def _patch_snapshot(course_id, mutate):
+    """
+    Apply ``mutate(data)`` to a course snapshot under a row lock.
+
+    ``mutate`` returns False when nothing changed, in which case the snapshot
+    is left untouched. Courses without a snapshot are skipped; they are built
+    lazily on the next read.
+    """
+    with transaction.atomic():
+        snapshot = (
+            GradebookSnapshot.objects.select_for_update()
+            .filter(course_id=course_id)
+            .first()
+        )
+        if snapshot is None or mutate(snapshot.data) is False:
+            return
+        snapshot.version += 1
+        snapshot.save(update_fields=["data", "version", "updated_at"])
+
+
+def _current_grade(kind, item_id, student_id):
+    if kind == "assignment":
+        submissions = AssignmentSubmission.objects.filter(
+            assignment_id=item_id, student_id=student_id
+        )
+    else:
+        submissions = ExamSubmission.objects.filter(
+            exam_id=item_id, student_id=student_id
+        )
+    return submissions.order_by("id").values_list("grade", flat=True).first()
+
+
+def _column_grades(kind, item_id):
+    if kind == "assignment":
+        submissions = AssignmentSubmission.objects.filter(assignment_id=item_id)
+    else:
+        submissions = ExamSubmission.objects.filter(exam_id=item_id)
+    grades = {}
+    for student_id, grade in submissions.order_by("id").values_list(
+        "student_id", "grade"
+    ):
+        grades.setdefault(student_id, grade)
+    return grades
+
+
+def _column_position(data, kind, item_id):
+    for index, column in enumerate(data["columns"]):
+        if column["kind"] == kind and column["id"] == item_id:
+            return index
+    return None
+
+
+def patch_cell(course_id, kind, item_id, student_id):
+    """Refresh a single (student, item) grade after a submission changes."""
+
+    def mutate(data):
+        if student_id not in data["students"]:
+            return False
+        column = _column_position(data, kind, item_id)
+        if column is None:
+            return False
+        row = data["students"].index(student_id)
+        data["matrix"][row][column] = _current_grade(kind, item_id, student_id)
+
+    _patch_snapshot(course_id, mutate)
+
+
+def patch_student(course_id, student_id):
+    """Add or remove a student row to match their enrollment state."""
+
+    def mutate(data):
+        enrolled = Enrollment.objects.filter(
+            course_id=course_id, student_id=student_id
+        ).exists()
+        present = student_id in data["students"]
+        if enrolled == present:
+            return False
+        if present:
+            row = data["students"].index(student_id)
+            del data["students"][row]
+            del data["matrix"][row]
+            return
+        data["students"].append(student_id)
+        data["matrix"].append(
+            [
+                _current_grade(column["kind"], column["id"], student_id)
+                for column in data["columns"]
+            ]
+        )
+
+    _patch_snapshot(course_id, mutate)
+
+
+def patch_column(course_id, kind, item_id, title):
+    """Add a new item column, or rename an existing one."""
+
+    def mutate(data):
+        column = _column_position(data, kind, item_id)
+        if column is not None:
+            if data["columns"][column]["title"] == title:
+                return False
+            data["columns"][column]["title"] = title
+            return
+
+        grades = _column_grades(kind, item_id)
+        # Assignments sort before exams, and ids increase within each block.
+        position = len(data["columns"])
+        for index, existing in enumerate(data["columns"]):
+            if (existing["kind"], existing["id"]) > (kind, item_id):
+                position = index
+                break
+        data["columns"].insert(position, {"kind": kind, "id": item_id, "title": title})
+        for student_id, row in zip(data["students"], data["matrix"]):
+            row.insert(position, grades.get(student_id))
+
+    _patch_snapshot(course_id, mutate)
+
+
+def remove_column(course_id, kind, item_id):
+    """Drop an item column when its assignment or exam is deleted."""
+
+    def mutate(data):
+        column = _column_position(data, kind, item_id)
+        if column is None:
+            return False
+        del data["columns"][column]
+        for row in data["matrix"]:
+            del row[column]
+
+    _patch_snapshot(course_id, mutate)
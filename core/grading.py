@@ -0,0 +1,265 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+
+from .models import Choice, Exam, Question, SubmissionAnswer
+
+GradingResult = namedtuple(
+    "GradingResult", ["answers", "score", "max_score", "grade", "needs_review"]
+)
+
+
+# Papers are cached under the exam's paper_version, which core.signals bumps on
+# every question or choice change, so an outdated paper is never read back.
+PAPER_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def exam_paper_key(exam_id, version):
+    return f"exam_paper_{exam_id}_v{version}"
+
+
+def compile_exam_paper(exam):
+    """
+    Compile an exam's questions and choices into a cacheable exam paper.
+
+    One query reads the questions and one reads every choice of the exam, so
+    the cost does not depend on the number of questions.
+
+    Args:
+        exam (Exam): The exam to compile
+
+    Returns:
+        dict: ``questions``, a list in display order of dicts with ``id``,
+        ``text``, ``question_type``, ``points``, ``order`` and ``choices``
+        (``id`` and ``text`` only), and ``answer_key``, which maps question id
+        to ``{"type", "points", "sample_answer", "choices"}`` where ``choices``
+        maps choice id to ``{"text", "is_correct"}``
+    """
+    questions = []
+    answer_key = {}
+    rows = (
+        Question.objects.filter(exam=exam)
+        .order_by("order", "id")
+        .values_list("id", "text", "question_type", "points", "order", "sample_answer")
+    )
+    for question_id, text, question_type, points, order, sample_answer in rows:
+        questions.append(
+            {
+                "id": question_id,
+                "text": text,
+                "question_type": question_type,
+                "points": points,
+                "order": order,
+                "choices": [],
+            }
+        )
+        answer_key[question_id] = {
+            "type": question_type,
+            "points": points,
+            "sample_answer": sample_answer,
+            "choices": {},
+        }
+
+    by_id = {question["id"]: question for question in questions}
+    choices = (
+        Choice.objects.filter(question__exam=exam)
+        .order_by("order", "id")
+        .values_list("id", "question_id", "text", "is_correct")
+    )
+    for choice_id, question_id, text, is_correct in choices:
+        by_id[question_id]["choices"].append({"id": choice_id, "text": text})
+        answer_key[question_id]["choices"][choice_id] = {
+            "text": text,
+            "is_correct": is_correct,
+        }
+    return {"questions": questions, "answer_key": answer_key}
+
+
+def get_exam_paper(exam):
+    """Return the compiled paper for the exam's current version, from cache."""
+    key = exam_paper_key(exam.pk, exam.paper_version)
+    paper = cache.get(key)
+    if paper is None:
+        paper = compile_exam_paper(exam)
+        cache.set(key, paper, PAPER_CACHE_TIMEOUT)
+    return paper
+
+
+def invalidate_exam_paper(exam_id):
+    """Move an exam to a new paper version, e.g. after bulk question writes."""
+    Exam.objects.filter(pk=exam_id).update(paper_version=F("paper_version") + 1)
+
+
+def invalidate_question_paper(question_id):
+    """
+    Move the exam owning a question to a new paper version.
+
+    The exam is matched through the question inside the UPDATE itself, so a
+    choice deleted in a cascade needs no lookup of its question.
+    """
+    Exam.objects.filter(questions=question_id).update(
+        paper_version=F("paper_version") + 1
+    )
+
+
+def load_answer_key(exam):
+    """The exam's answer key, read from its compiled paper."""
+    return get_exam_paper(exam)["answer_key"]
+
+
+def _grade_multiple_choice(question, value):
+    try:
+        choice_id = int(value)
+    except (TypeError, ValueError):
+        choice_id = None
+    choice = question["choices"].get(choice_id)
+    if choice is None:
+        return {"answer": value, "choice_id": None, "is_correct": False}
+    return {
+        "answer": value,
+        "choice_id": choice_id,
+        "choice_text": choice["text"],
+        "is_correct": choice["is_correct"],
+    }
+
+
+def _grade_true_false(question, value):
+    # The key is stored as "True"/"False" choices; the form posts "true"/"false"
+    value_text = str(value).strip().lower()
+    choice_id = None
+    correct = []
+    for key, choice in question["choices"].items():
+        text = choice["text"].strip().lower()
+        if text == value_text:
+            choice_id = key
+        if choice["is_correct"]:
+            correct.append(text)
+    if not correct:
+        return {"answer": value, "choice_id": choice_id, "is_correct": None}
+    return {
+        "answer": value,
+        "choice_id": choice_id,
+        "is_correct": value_text == correct[0],
+    }
+
+
+def grade_answers(answer_key, responses):
+    """
+    Score a set of responses against an answer key in a single pass.
+
+    Multiple choice and true/false answers are marked from the key and earn
+    the question's points when correct. Short answers, and true/false
+    questions without a stored key, are left with ``is_correct`` None for
+    review; they still count towards the maximum score.
+
+    Args:
+        answer_key (dict): As returned by ``load_answer_key``
+        responses (dict): Raw submitted values keyed by question id; questions
+            left unanswered are simply absent
+
+    Returns:
+        GradingResult: ``answers`` ready to store on the submission, points
+        ``score`` and ``max_score``, ``grade`` as a percentage and whether any
+        answer ``needs_review``
+    """
+    answers = {}
+    for question_id, question in answer_key.items():
+        if question_id not in responses:
+            continue
+        value = responses[question_id]
+        if question["type"] == "multiple_choice":
+            answer = _grade_multiple_choice(question, value)
+        elif question["type"] == "true_false":
+            answer = _grade_true_false(question, value)
+        else:
+            answer = {"answer": value, "choice_id": None, "is_correct": None}
+
+        if answer["is_correct"] is None:
+            answer["points_awarded"] = None
+        else:
+            answer["points_awarded"] = (
+                max(question["points"], 0) if answer["is_correct"] else 0
+            )
+        answers[str(question_id)] = answer
+
+    return GradingResult(answers, *score_answers(answer_key, answers))
+
+
+def score_answers(answer_key, answers):
+    """
+    Total the points awarded in a stored set of answers.
+
+    Answers whose ``points_awarded`` is still None are unmarked and make the
+    result need review.
+
+    Returns:
+        tuple: ``(score, max_score, grade, needs_review)`` with ``grade`` as a
+        percentage
+    """
+    score = 0
+    max_score = 0
+    needs_review = False
+    for question_id, question in answer_key.items():
+        max_score += max(question["points"], 0)
+        answer = answers.get(str(question_id))
+        if answer is None:
+            continue
+        if answer.get("points_awarded") is None:
+            needs_review = True
+        else:
+            score += answer["points_awarded"]
+    grade = score / max_score * 100 if max_score else 0
+    return score, max_score, grade, needs_review
+
+
+def answer_rows(submission, answers):
+    """
+    Unsaved ``SubmissionAnswer`` rows for a set of graded answers.
+
+    Args:
+        submission (ExamSubmission): The saved submission the answers belong to
+        answers (dict): As in ``GradingResult.answers``
+
+    Returns:
+        list: One ``SubmissionAnswer`` per answered question
+    """
+    return [
+        SubmissionAnswer(
+            submission=submission,
+            question_id=int(question_id),
+            choice_id=answer.get("choice_id"),
+            # The choice carries the answer; keep raw text only when none matched
+            text="" if answer.get("choice_id") else str(answer["answer"]),
+            is_correct=answer["is_correct"],
+            points_awarded=answer["points_awarded"],
+            feedback=answer.get("feedback", ""),
+        )
+        for question_id, answer in answers.items()
+    ]
+
+
+def save_answers(submission, answers):
+    """Store the graded answers of a submission in one bulk insert."""
+    return SubmissionAnswer.objects.bulk_create(answer_rows(submission, answers))
+
+
+def stored_scores(submission_ids):
+    """
+    Points awarded per submission, summed in the database.
+
+    Returns:
+        dict: submission id to ``(score, unmarked)``, where ``unmarked`` counts
+        answers whose ``points_awarded`` is still None; submissions without
+        answers are absent
+    """
+    rows = (
+        SubmissionAnswer.objects.filter(submission__in=submission_ids)
+        .values("submission")
+        .annotate(
+            score=Sum("points_awarded"),
+            unmarked=Count("id", filter=Q(points_awarded__isnull=True)),
+        )
+        .order_by()
+    )
+    return {row["submission"]: (row["score"] or 0, row["unmarked"]) for row in rows}
@@ -0,0 +1,300 @@
+from django.core.cache import cache
+from django.db.models import Count
+
+from .grading import get_exam_paper
+from .models import SubmissionAnswer
+
+# Reports are dropped by core.signals when a stored submission changes and
+# extended in place when new ones arrive; the timeout only bounds staleness
+# when the cache backend is not shared between workers.
+ITEM_ANALYSIS_CACHE_TIMEOUT = 60 * 60
+
+# Share of submissions in the upper and lower groups of the discrimination index
+DISCRIMINATION_GROUP = 0.27
+
+# Percentiles reported for the score distribution
+SCORE_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def item_analysis_key(exam_id):
+    return f"item_analysis_{exam_id}"
+
+
+def decode_submissions(paper, rows):
+    """
+    Decode stored answer rows into NumPy arrays.
+
+    Args:
+        paper (dict): The exam paper, as returned by ``get_exam_paper``
+        rows (iterable): ``(submission_id, question_id, choice_id,
+            points_awarded)`` tuples of the answers to decode
+
+    Returns:
+        tuple: ``(last_id, points, choices, answered)`` where ``points`` is a
+        (submissions x questions) float array of points awarded, NaN for
+        answers not marked yet, ``choices`` holds the chosen choice id (0 for
+        none) and ``answered`` flags the questions each submission answered;
+        submissions appear in id order
+    """
+    import numpy as np
+
+    question_ids = np.array([question["id"] for question in paper["questions"]])
+    order = np.argsort(question_ids)
+    # Rows of questions removed from the paper meanwhile are dropped
+    known = set(question_ids.tolist())
+    rows = [row for row in rows if row[1] in known]
+    submission_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    submissions, row_index = np.unique(submission_ids, return_inverse=True)
+    col_index = order[
+        np.searchsorted(
+            question_ids[order], np.array([row[1] for row in rows], dtype=np.int64)
+        )
+    ]
+
+    shape = (len(submissions), len(question_ids))
+    points = np.zeros(shape)
+    choices = np.zeros(shape, dtype=np.int64)
+    answered = np.zeros(shape, dtype=bool)
+    points[row_index, col_index] = [
+        np.nan if row[3] is None else row[3] for row in rows
+    ]
+    choices[row_index, col_index] = [row[2] or 0 for row in rows]
+    answered[row_index, col_index] = True
+    last_id = int(submissions[-1]) if len(submissions) else 0
+    return last_id, points, choices, answered
+
+
+def _number(value, digits=3):
+    """A NumPy scalar as a rounded float, or None when it is not a number."""
+    value = float(value)
+    return None if value != value else round(value, digits)
+
+
+def compute_item_statistics(paper, points, choices, answered):
+    """
+    Item-analysis statistics for a set of decoded submissions.
+
+    Unanswered questions score zero and answers that are not marked yet are
+    left out of their question's statistics. All statistics are computed
+    column-wise over the whole submission matrix:
+
+    * ``difficulty``: mean share of the question's points earned (p-value)
+    * ``discrimination``: difficulty in the top 27% of total scores minus the
+      bottom 27%
+    * ``point_biserial``: correlation between the question score and the
+      total score on the other questions
+    * ``distractors``: how often each choice was picked overall and in the
+      upper and lower groups
+
+    Args:
+        paper (dict): The exam paper the arrays were decoded against
+        points, choices, answered: As returned by ``decode_submissions``
+
+    Returns:
+        dict: ``submissions``, ``max_score``, ``distribution`` (``mean``,
+        ``std``, ``min``, ``max``, ``percentiles`` and a ten-bin
+        ``histogram`` of grades) and ``questions``, one dict per question
+    """
+    import numpy as np
+
+    questions = paper["questions"]
+    count = points.shape[0]
+    max_points = np.array(
+        [max(question["points"], 0) for question in questions], dtype=float
+    )
+    max_score = float(max_points.sum())
+
+    marked = ~np.isnan(points)
+    earned = np.where(marked, points, 0.0)
+    totals = earned.sum(axis=1)
+    grades = totals / max_score * 100 if max_score else np.zeros(count)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = earned / max_points
+        scored = marked.sum(axis=0)
+
+        def mean_share(rows):
+            return share[rows].sum(axis=0) / marked[rows].sum(axis=0)
+
+        difficulty = share.sum(axis=0) / scored
+
+        order = np.argsort(totals, kind="stable")
+        group = max(1, int(round(count * DISCRIMINATION_GROUP))) if count > 1 else 0
+        lower, upper = order[:group], order[count - group :]
+        discrimination = (
+            mean_share(upper) - mean_share(lower)
+            if group
+            else np.full(len(questions), np.nan)
+        )
+
+        # Corrected item-total correlation: each question against the rest
+        rest = totals[:, None] - earned
+        rest_mean = np.where(marked, rest, 0.0).sum(axis=0) / scored
+        item_dev = np.where(marked, share - difficulty, 0.0)
+        rest_dev = np.where(marked, rest - rest_mean, 0.0)
+        point_biserial = (item_dev * rest_dev).sum(axis=0) / np.sqrt(
+            (item_dev**2).sum(axis=0) * (rest_dev**2).sum(axis=0)
+        )
+
+    # Distractor counts: every choice of the exam gets one bincount slot
+    slots = sorted(
+        (choice["id"], col)
+        for col, question in enumerate(questions)
+        for choice in question["choices"]
+    )
+    choice_ids = np.array([slot[0] for slot in slots], dtype=np.int64)
+    choice_columns = np.array([slot[1] for slot in slots], dtype=np.int64)
+    picked = np.zeros(len(slots), dtype=np.int64)
+    picked_upper = np.zeros(len(slots), dtype=np.int64)
+    picked_lower = np.zeros(len(slots), dtype=np.int64)
+    if choice_ids.size and count:
+        position = np.clip(np.searchsorted(choice_ids, choices), 0, choice_ids.size - 1)
+        valid = (choice_ids[position] == choices) & (
+            choice_columns[position] == np.arange(len(questions))
+        )
+        picked = np.bincount(position[valid], minlength=choice_ids.size)
+        picked_upper = np.bincount(
+            position[upper][valid[upper]], minlength=choice_ids.size
+        )
+        picked_lower = np.bincount(
+            position[lower][valid[lower]], minlength=choice_ids.size
+        )
+    slot_of = {slot[0]: index for index, slot in enumerate(slots)}
+    is_correct = {
+        choice_id: choice["is_correct"]
+        for question in paper["answer_key"].values()
+        for choice_id, choice in question["choices"].items()
+    }
+
+    report_questions = []
+    for col, question in enumerate(questions):
+        distractors = []
+        for choice in question["choices"]:
+            index = slot_of[choice["id"]]
+            distractors.append(
+                {
+                    "id": choice["id"],
+                    "text": choice["text"],
+                    "is_correct": is_correct[choice["id"]],
+                    "count": int(picked[index]),
+                    "rate": _number(picked[index] / count) if count else None,
+                    "upper": int(picked_upper[index]),
+                    "lower": int(picked_lower[index]),
+                }
+            )
+        report_questions.append(
+            {
+                "id": question["id"],
+                "text": question["text"],
+                "question_type": question["question_type"],
+                "points": question["points"],
+                "responses": int((answered[:, col] & marked[:, col]).sum()),
+                "omitted": int(count - answered[:, col].sum()),
+                "difficulty": _number(difficulty[col]),
+                "discrimination": _number(discrimination[col]),
+                "point_biserial": _number(point_biserial[col]),
+                "distractors": distractors,
+            }
+        )
+
+    if count:
+        histogram, _ = np.histogram(grades, bins=10, range=(0, 100))
+        distribution = {
+            "mean": _number(grades.mean(), 2),
+            "std": _number(grades.std(), 2),
+            "min": _number(grades.min(), 2),
+            "max": _number(grades.max(), 2),
+            "percentiles": dict(
+                zip(
+                    SCORE_PERCENTILES,
+                    (_number(p, 2) for p in np.percentile(grades, SCORE_PERCENTILES)),
+                )
+            ),
+            "histogram": [int(n) for n in histogram],
+        }
+    else:
+        distribution = {
+            "mean": None,
+            "std": None,
+            "min": None,
+            "max": None,
+            "percentiles": dict.fromkeys(SCORE_PERCENTILES),
+            "histogram": [0] * 10,
+        }
+
+    return {
+        "submissions": count,
+        "max_score": max_score,
+        "distribution": distribution,
+        "questions": report_questions,
+    }
+
+
+def exam_item_analysis(exam):
+    """
+    Item-analysis report for an exam, cached and extended incrementally.
+
+    The decoded answer arrays are cached next to the report. A read decodes
+    only submissions stored after the last one seen, appends them and
+    recomputes the statistics, which are cheap compared to decoding. The
+    cache starts over when the exam's paper version changes,
+    ``invalidate_item_analysis`` is called, or submissions up to the last
+    one seen are no longer the ones cached: ids are not committed in order,
+    so a submission can appear below it, as can one whose grading finished.
+    Submissions still waiting for short-answer grading are left out until
+    they are graded, as are submissions without answer rows.
+
+    Returns:
+        dict: As returned by ``compute_item_statistics``
+    """
+    import numpy as np
+
+    key = item_analysis_key(exam.pk)
+    paper = get_exam_paper(exam)
+    cached = cache.get(key)
+    if cached is None or cached["version"] != exam.paper_version:
+        cached = None
+
+    answers = SubmissionAnswer.objects.filter(submission__exam=exam).exclude(
+        submission__grading_status="pending"
+    )
+    if cached is not None:
+        seen = answers.filter(submission__lte=cached["last_id"]).aggregate(
+            submissions=Count("submission", distinct=True)
+        )["submissions"]
+        if seen != cached["submissions"]:
+            cached = None
+
+    rows = answers.values_list("submission", "question", "choice", "points_awarded")
+    if cached is not None:
+        rows = rows.filter(submission__gt=cached["last_id"])
+    last_id, points, choices, answered = decode_submissions(paper, rows.iterator())
+
+    if cached is not None:
+        if not last_id:
+            return cached["report"]
+        points = np.vstack([cached["points"], points])
+        choices = np.vstack([cached["choices"], choices])
+        answered = np.vstack([cached["answered"], answered])
+        last_id = max(last_id, cached["last_id"])
+
+    report = compute_item_statistics(paper, points, choices, answered)
+    cache.set(
+        key,
+        {
+            "version": exam.paper_version,
+            "last_id": last_id,
+            "submissions": len(points),
+            "points": points,
+            "choices": choices,
+            "answered": answered,
+            "report": report,
+        },
+        ITEM_ANALYSIS_CACHE_TIMEOUT,
+    )
+    return report
+
+
+def invalidate_item_analysis(exam_id):
+    """Drop an exam's cached report, e.g. after submissions were regraded."""
+    cache.delete(item_analysis_key(exam_id))
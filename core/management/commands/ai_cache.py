@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.ai.response_cache import cache_stats, evict
+from core.models import AIResponseCache
+
+
+class Command(BaseCommand):
+    help = "Show Gemini response cache statistics, evict stale entries or clear it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--evict",
+            action="store_true",
+            help="Drop expired and least recently used entries over the bound",
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete every stored response"
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = AIResponseCache.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} responses"))
+        elif options["evict"]:
+            self.stdout.write(self.style.SUCCESS(f"Evicted {evict()} responses"))
+
+        stats = cache_stats()
+        hit_rate = "n/a" if stats["hit_rate"] is None else f"{stats['hit_rate']:.1%}"
+        self.stdout.write(
+            f"{stats['entries']} responses stored, {stats['hits']} hits, "
+            f"{stats['misses']} misses (hit rate {hit_rate})"
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.short_answers import (
+    SHORT_ANSWERS_PER_CALL,
+    SUBMISSIONS_PER_PASS,
+    grade_pending_submissions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade pending short-answer quiz submissions with Gemini. Run once, or "
+        "with --loop as a long-lived background worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new submissions"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when no submissions are pending (with --loop)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=SUBMISSIONS_PER_PASS,
+            help="Submissions graded per pass",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SHORT_ANSWERS_PER_CALL,
+            help="Short answers sent per model call",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            graded = grade_pending_submissions(
+                limit=options["limit"], batch_size=options["batch_size"]
+            )
+            if graded:
+                self.stdout.write(self.style.SUCCESS(f"Graded {graded} submissions"))
+            if not options["loop"]:
+                break
+            if graded < options["limit"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Course, User
+from core.quiz_import import QUIZ_FORMATS, import_quizzes
+
+
+class Command(BaseCommand):
+    help = (
+        "Import quizzes from a CSV, GIFT or JSON file into a course. The whole "
+        "file is imported in one transaction, so an error leaves nothing behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", type=int, help="Course to add the quizzes to")
+        parser.add_argument("path", help="Quiz file to import")
+        parser.add_argument(
+            "--format",
+            choices=sorted(QUIZ_FORMATS),
+            help="File format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--created-by",
+            help="Username of the quizzes' author (default: the course instructor)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.select_related("instructor").get(
+                pk=options["course_id"]
+            )
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} not found")
+        author = course.instructor
+        if options["created_by"]:
+            try:
+                author = User.objects.get(username=options["created_by"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['created_by']} not found")
+
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format == "txt":
+            file_format = "gift"
+        if file_format not in QUIZ_FORMATS:
+            raise CommandError(f"Cannot tell the format of {path.name}; pass --format")
+
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as stream:
+                result = import_quizzes(
+                    stream, file_format, course, author, default_title=path.stem
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValueError as e:
+            raise CommandError(f"{path.name}: {e}")
+
+        for exam in result.exams:
+            self.stdout.write(f"{exam.title} (exam {exam.pk})")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.questions} questions into "
+                f"{len(result.exams)} quizzes"
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import COUNTED_MODELS, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount users, courses and enrollments and correct the stored platform "
+        "counters. Run periodically (e.g. nightly from cron) to repair drift "
+        "from bulk writes that bypass model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            choices=sorted(COUNTED_MODELS),
+            help="Counters to reconcile (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        results = reconcile_counters(options["names"] or None)
+        for name, (stored, actual) in results.items():
+            if stored == actual:
+                self.stdout.write(f"{name}: {actual}")
+            else:
+                self.stdout.write(
+                    self.style.WARNING(f"{name}: {stored} -> {actual} (corrected)")
+                )
+        self.stdout.write(self.style.SUCCESS("Platform counters reconciled"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_enrollment_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill or repair the stored Course.enrollment_count column from the "
+        "Enrollment table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "course_ids", nargs="*", type=int, help="Courses to check (default: all)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Courses locked and recounted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        corrected = reconcile_enrollment_counts(
+            options["course_ids"] or None, batch_size=options["batch_size"]
+        )
+        for course_id, (stored, actual) in corrected.items():
+            self.stdout.write(
+                self.style.WARNING(f"Course {course_id}: {stored} -> {actual}")
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Corrected {len(corrected)} enrollment counts")
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Exam
+from core.regrade import regrade_exam
+
+
+class Command(BaseCommand):
+    help = "Rescore all submissions of one or more exams against the current answer key"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam_ids", nargs="+", type=int, help="Exams to regrade")
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.in_bulk(options["exam_ids"])
+        missing = set(options["exam_ids"]) - set(exams)
+        if missing:
+            raise CommandError(
+                f"Exam(s) not found: {', '.join(map(str, sorted(missing)))}"
+            )
+
+        for exam_id in options["exam_ids"]:
+            start = time.perf_counter()
+            result = regrade_exam(exams[exam_id])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{exams[exam_id].title}: {result['answers']} answers remarked, "
+                    f"{result['updated']} of {result['submissions']} submissions "
+                    f"updated in {time.perf_counter() - start:.2f}s"
+                )
+            )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ai_jobs import JOBS_PER_PASS, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued AI generation jobs. Run once, or with --loop as a "
+        "long-lived background worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new jobs"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.5,
+            help="Seconds to sleep when no jobs are queued (with --loop)",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=JOBS_PER_PASS, help="Jobs run per pass"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            ran = run_pending_jobs(limit=options["limit"])
+            if ran:
+                self.stdout.write(self.style.SUCCESS(f"Ran {ran} AI jobs"))
+            if not options["loop"]:
+                break
+            if ran < options["limit"]:
+                time.sleep(options["interval"])
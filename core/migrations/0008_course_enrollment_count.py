@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_enrollment_counts(apps, schema_editor):
+    Course = apps.get_model("core", "Course")
+    Enrollment = apps.get_model("core", "Enrollment")
+    counts = (
+        Enrollment.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Course.objects.update(enrollment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_platformcounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="enrollment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_enrollment_counts, migrations.RunPython.noop),
+    ]
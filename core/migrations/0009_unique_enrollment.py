@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:26
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_enrollments(apps, schema_editor):
+    """Keep the earliest enrollment per (student, course) and recount."""
+    Course = apps.get_model("core", "Course")
+    Enrollment = apps.get_model("core", "Enrollment")
+    PlatformCounter = apps.get_model("core", "PlatformCounter")
+
+    duplicates = (
+        Enrollment.objects.order_by()
+        .values("student", "course")
+        .annotate(first=Min("pk"), total=Count("pk"))
+        .filter(total__gt=1)
+    )
+    affected = set()
+    for row in duplicates.iterator():
+        Enrollment.objects.filter(student=row["student"], course=row["course"]).exclude(
+            pk=row["first"]
+        ).delete()
+        affected.add(row["course"])
+    if not affected:
+        return
+
+    counts = (
+        Enrollment.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Course.objects.filter(pk__in=affected).update(
+        enrollment_count=Coalesce(Subquery(counts), 0)
+    )
+    # Reseeded with an exact count on the next read
+    PlatformCounter.objects.filter(name="enrollments").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_course_enrollment_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_enrollments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="enrollment",
+            constraint=models.UniqueConstraint(
+                fields=("student", "course"), name="unique_enrollment"
+            ),
+        ),
+    ]
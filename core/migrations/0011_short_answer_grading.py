@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_exam_paper_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examsubmission",
+            name="grading_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("review", "Needs review"),
+                    ("graded", "Graded"),
+                ],
+                db_index=True,
+                default="graded",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="sample_answer",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,210 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Submissions converted per batch
+BATCH_SIZE = 500
+
+
+def _batches(ExamSubmission):
+    """Submissions in primary key order, BATCH_SIZE at a time."""
+    last = 0
+    while True:
+        batch = list(
+            ExamSubmission.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .only("id", "exam", "answers")[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        last = batch[-1].pk
+        yield batch
+
+
+def _graded_answers(answers, questions):
+    """
+    The quiz answers of a submission as ``{question id: answer}``, or None
+    when they are free-form exam answers that have no rows to move into.
+    """
+    if not isinstance(answers, dict) or not answers:
+        return None
+    graded = {}
+    for key, answer in answers.items():
+        try:
+            question_id = int(key)
+        except (TypeError, ValueError):
+            return None
+        if question_id not in questions or not isinstance(answer, dict):
+            return None
+        if "answer" not in answer:
+            return None
+        graded[question_id] = answer
+    return graded
+
+
+def move_answers_to_rows(apps, schema_editor):
+    """Convert graded quiz answers from the JSON column into answer rows."""
+    Choice = apps.get_model("core", "Choice")
+    ExamSubmission = apps.get_model("core", "ExamSubmission")
+    Question = apps.get_model("core", "Question")
+    SubmissionAnswer = apps.get_model("core", "SubmissionAnswer")
+
+    for batch in _batches(ExamSubmission):
+        exam_ids = {submission.exam_id for submission in batch}
+        questions = {}
+        for question_id, exam_id, question_type, points in Question.objects.filter(
+            exam__in=exam_ids
+        ).values_list("id", "exam_id", "question_type", "points"):
+            questions.setdefault(exam_id, {})[question_id] = (question_type, points)
+        # Multiple choice answers hold the choice id, true/false ones its text
+        by_id = {}
+        by_text = {}
+        for choice_id, question_id, text in Choice.objects.filter(
+            question__exam__in=exam_ids
+        ).values_list("id", "question_id", "text"):
+            by_id.setdefault(question_id, {})[str(choice_id)] = choice_id
+            by_text.setdefault(question_id, {})[text.strip().lower()] = choice_id
+
+        rows = []
+        converted = []
+        for submission in batch:
+            exam_questions = questions.get(submission.exam_id, {})
+            graded = _graded_answers(submission.answers, exam_questions)
+            if graded is None:
+                continue
+            for question_id, answer in graded.items():
+                question_type, points = exam_questions[question_id]
+                value = str(answer["answer"]).strip()
+                choice_id = None
+                if question_type == "multiple_choice":
+                    choice_id = by_id.get(question_id, {}).get(value)
+                elif question_type == "true_false":
+                    choice_id = by_text.get(question_id, {}).get(value.lower())
+                # Answers marked before points were stored earn the question's
+                # points when correct and none otherwise
+                is_correct = answer.get("is_correct")
+                points_awarded = answer.get("points_awarded")
+                if points_awarded is None and is_correct is not None:
+                    points_awarded = points if is_correct else 0
+                rows.append(
+                    SubmissionAnswer(
+                        submission_id=submission.pk,
+                        question_id=question_id,
+                        choice_id=choice_id,
+                        text="" if choice_id else str(answer["answer"]),
+                        is_correct=is_correct,
+                        points_awarded=points_awarded,
+                        feedback=answer.get("feedback") or "",
+                    )
+                )
+            submission.answers = {}
+            converted.append(submission)
+        SubmissionAnswer.objects.bulk_create(rows)
+        ExamSubmission.objects.bulk_update(converted, ["answers"])
+
+
+def move_rows_to_answers(apps, schema_editor):
+    """Write answer rows back into the JSON column."""
+    ExamSubmission = apps.get_model("core", "ExamSubmission")
+    SubmissionAnswer = apps.get_model("core", "SubmissionAnswer")
+
+    for batch in _batches(ExamSubmission):
+        answers = {}
+        rows = SubmissionAnswer.objects.filter(submission__in=batch).select_related(
+            "question", "choice"
+        )
+        for row in rows:
+            answer = {
+                "answer": row.text,
+                "is_correct": row.is_correct,
+                "points_awarded": row.points_awarded,
+            }
+            if row.choice is not None:
+                if row.question.question_type == "true_false":
+                    answer["answer"] = row.choice.text.strip().lower()
+                else:
+                    answer["answer"] = str(row.choice_id)
+                    answer["choice_text"] = row.choice.text
+            if row.feedback:
+                answer["feedback"] = row.feedback
+            answers.setdefault(row.submission_id, {})[str(row.question_id)] = answer
+
+        converted = [submission for submission in batch if submission.pk in answers]
+        for submission in converted:
+            submission.answers = answers[submission.pk]
+        ExamSubmission.objects.bulk_update(converted, ["answers"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_short_answer_grading"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examsubmission",
+            name="answers",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name="SubmissionAnswer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("text", models.TextField(blank=True)),
+                ("is_correct", models.BooleanField(blank=True, null=True)),
+                ("points_awarded", models.FloatField(blank=True, null=True)),
+                ("feedback", models.TextField(blank=True)),
+                (
+                    "choice",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="submission_answers",
+                        to="core.choice",
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="submission_answers",
+                        to="core.question",
+                    ),
+                ),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="answer_rows",
+                        to="core.examsubmission",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["question", "choice"],
+                        name="core_submis_questio_cead21_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("submission", "question"),
+                        name="unique_submission_answer",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_answers_to_rows, move_rows_to_answers),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_ai_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aijob",
+            name="streamed_text",
+            field=models.TextField(blank=True),
+        ),
+    ]
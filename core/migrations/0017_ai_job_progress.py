@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_rate_limit_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aijob",
+            name="progress",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name="aijob",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("lesson_plan", "Lesson plan"),
+                    ("quiz", "Quiz"),
+                    ("rubric", "Rubric"),
+                    ("explanation", "Concept explanation"),
+                    ("syllabus", "Syllabus"),
+                    ("quiz_batch", "Quiz batch"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
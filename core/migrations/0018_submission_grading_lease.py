@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_ai_job_progress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examsubmission",
+            name="grading_claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
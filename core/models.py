@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -82,6 +84,8 @@ class Course(models.Model):
     )
     duration_weeks = models.IntegerField(default=12)
     max_students = models.IntegerField(default=50)
+    # Maintained by core.signals; repair with `manage.py reconcile_enrollment_counts`
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     thumbnail = models.ImageField(upload_to="course_thumbnails/", blank=True, null=True)
     is_published = models.BooleanField(default=True)
@@ -95,11 +99,11 @@ class Course(models.Model):
 
     @property
     def enrolled_count(self):
-        return self.enrollments.count()
+        return self.enrollment_count
 
     @property
     def is_full(self):
-        return self.enrolled_count >= self.max_students
+        return self.enrollment_count >= self.max_students
 
 
 # Enrollment model
@@ -110,7 +114,14 @@ class Enrollment(models.Model):
     course = models.ForeignKey(
         Course, on_delete=models.CASCADE, related_name="enrollments"
     )
-    enrolled_at = models.DateTimeField(auto_now_add=True)
+    enrolled_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "course"], name="unique_enrollment"
+            )
+        ]
 
     def __str__(self):
         return f"{self.student.username} enrolled in {self.course.title}"
@@ -153,6 +164,8 @@ class Exam(models.Model):
     generated_content = models.TextField(blank=True)  # Raw AI generated content
     time_limit = models.IntegerField(default=60)  # in minutes
     is_published = models.BooleanField(default=True)
+    # Bumped by core.signals whenever a question or choice changes
+    paper_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -174,6 +187,8 @@ class Question(models.Model):
     )
     points = models.IntegerField(default=1)
     order = models.IntegerField(default=0)
+    # Reference answer used when grading short answers
+    sample_answer = models.TextField(blank=True)
 
     class Meta:
         ordering = ["order"]
@@ -200,11 +215,23 @@ class Choice(models.Model):
 
 # ExamSubmission model
 class ExamSubmission(models.Model):
+    GRADING_STATUSES = (
+        ("pending", "Pending"),  # Short answers queued for background grading
+        ("review", "Needs review"),
+        ("graded", "Graded"),
+    )
+
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="submissions")
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    answers = models.JSONField()  # This is the correct field name to match the form
+    # Free-form answers of the exam form; quiz answers live in SubmissionAnswer
+    answers = models.JSONField(default=dict, blank=True)
     grade = models.FloatField(blank=True, null=True)
     feedback = models.TextField(blank=True)
+    grading_status = models.CharField(
+        max_length=20, choices=GRADING_STATUSES, default="graded", db_index=True
+    )
+    # When a short-answer grading worker leased this pending submission
+    grading_claimed_at = models.DateTimeField(blank=True, null=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     graded_at = models.DateTimeField(blank=True, null=True)
 
@@ -212,6 +239,40 @@ class ExamSubmission(models.Model):
         return f"{self.student.username}'s submission for {self.exam.title}"
 
 
+# One marked answer of a quiz submission
+class SubmissionAnswer(models.Model):
+    submission = models.ForeignKey(
+        ExamSubmission, on_delete=models.CASCADE, related_name="answer_rows"
+    )
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name="submission_answers"
+    )
+    # Chosen choice for multiple choice and true/false questions
+    choice = models.ForeignKey(
+        Choice,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="submission_answers",
+    )
+    # Short answer text, or the raw value when it matched no choice
+    text = models.TextField(blank=True)
+    is_correct = models.BooleanField(blank=True, null=True)  # None until marked
+    points_awarded = models.FloatField(blank=True, null=True)
+    feedback = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["submission", "question"], name="unique_submission_answer"
+            )
+        ]
+        indexes = [models.Index(fields=["question", "choice"])]
+
+    def __str__(self):
+        return f"Answer to Q{self.question_id} in submission {self.submission_id}"
+
+
 # Course Category for better organization
 class CourseCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -440,3 +501,97 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"{self.recipient.username} - {self.title}"
+
+
+# Materialized gradebook, patched incrementally by core.signals
+class GradebookSnapshot(models.Model):
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, related_name="gradebook_snapshot"
+    )
+    version = models.PositiveIntegerField(default=0)
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Gradebook for {self.course.title} (v{self.version})"
+
+
+# Platform-wide row counts, maintained by core.signals
+class PlatformCounter(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+# Gemini responses reused for identical requests, see core.ai.response_cache
+class AIResponseCache(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    function = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100)
+    response = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.function} ({self.key[:12]})"
+
+
+# Background AI generation request, run by core.ai_jobs
+class AIJob(models.Model):
+    KINDS = (
+        ("lesson_plan", "Lesson plan"),
+        ("quiz", "Quiz"),
+        ("rubric", "Rubric"),
+        ("explanation", "Concept explanation"),
+        ("syllabus", "Syllabus"),
+        ("quiz_batch", "Quiz batch"),
+    )
+    STATUSES = (
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    # Random ids so job URLs cannot be enumerated
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ai_jobs"
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    arguments = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default="queued")
+    result = models.JSONField(blank=True, null=True)
+    # Text generated so far by kinds that stream, see core.ai_jobs
+    streamed_text = models.TextField(blank=True)
+    # Per-topic state of quiz batches, kept across retries, see core.quiz_batches
+    progress = models.JSONField(default=list, blank=True)
+    warning = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker claims the job and refreshed while it runs
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job {self.id} ({self.status})"
+
+
+# Token buckets shared by every process, see core.rate_limits
+class RateLimitBucket(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    tokens = models.FloatField()
+    # Unix time of the last refill, a float so refills are plain arithmetic
+    updated_at = models.FloatField()
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.2f} tokens"
@@ -0,0 +1,152 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from . import ai
+from .ai_jobs import keep_alive
+from .models import Course
+from .quiz_import import ai_quiz_questions, save_quiz
+from .rate_limits import acquire
+
+logger = logging.getLogger(__name__)
+
+# Rough output tokens the model spends on one question, by question type
+QUESTION_TOKENS = {"multiple_choice": 150, "true_false": 60, "short_answer": 100}
+
+# Output tokens one call may use, well under the model's 8192-token limit
+CALL_OUTPUT_TOKENS = 6000
+
+# Most topics asked in one call; longer lists drift off the format
+MAX_TOPICS_PER_CALL = 8
+
+# Model calls in flight at once per batch
+BATCH_WORKERS = 4
+
+# Batch calls draw from the shared Gemini bucket at the quiz generator's rate,
+# waiting up to RATE_LIMIT_WAIT seconds per call for a token
+REQUESTS_PER_MINUTE = 8
+RATE_LIMIT_WAIT = 120
+
+
+def pack_topics(topics, num_questions, question_type):
+    """
+    Group topics into calls whose expected output fits ``CALL_OUTPUT_TOKENS``.
+
+    Returns:
+        list: Lists of topics, each generated by one call
+    """
+    per_topic = num_questions * QUESTION_TOKENS.get(question_type, 150)
+    size = max(1, min(MAX_TOPICS_PER_CALL, CALL_OUTPUT_TOKENS // per_topic))
+    return [topics[start : start + size] for start in range(0, len(topics), size)]
+
+
+def _save_progress(job):
+    keep_alive(job, progress=job.progress)
+
+
+def _record(job, course, entries, future):
+    """Save the drafts of one finished call and mark its topics."""
+    try:
+        sections = future.result()
+    except Exception as e:
+        logger.warning(f"Quiz batch {job.pk} call failed: {e}")
+        sections = [("", [])] * len(entries)
+        error = str(e)
+    else:
+        error = "No questions were generated for this topic."
+
+    for entry, (text, parsed_questions) in zip(entries, sections):
+        if not parsed_questions:
+            entry.update(status="failed", error=error)
+            continue
+        try:
+            exam = save_quiz(
+                course,
+                job.requested_by,
+                ai_quiz_questions(parsed_questions),
+                title=f"Quiz: {entry['topic']}",
+                instructions="AI-generated quiz. Please answer all questions.",
+                generated_content=text,
+                time_limit=60,
+                is_published=False,
+            )
+        except ValueError as e:
+            entry.update(status="failed", error=f"Invalid question: {e}")
+            continue
+        entry.update(
+            status="done", exam_id=exam.pk, questions=len(parsed_questions), error=""
+        )
+    _save_progress(job)
+
+
+def run_quiz_batch(job, course_id, topics, num_questions, question_type):
+    """
+    Generate a draft exam for each topic of a quiz batch job.
+
+    Topics are packed several to a call with ``pack_topics`` and the calls
+    run on a pool of ``BATCH_WORKERS`` threads. Rate limit tokens are taken
+    here before each call is handed to the pool, and exams and progress are
+    written here as calls finish, so worker threads only talk to the model.
+    Each topic's state is kept in ``job.progress``; topics already done are
+    skipped when a retried job runs again.
+
+    Args:
+        job (AIJob): The claimed ``quiz_batch`` job
+        course_id (int): Course the draft exams are added to
+        topics (list): Topic names
+        num_questions (int): Questions per topic
+        question_type (str): Type of questions
+
+    Returns:
+        dict: ``created`` and ``failed`` topic counts
+
+    Raises:
+        RuntimeError: If no topic could be generated
+    """
+    course = Course.objects.get(pk=course_id)
+    if not job.progress:
+        job.progress = [{"topic": topic, "status": "queued"} for topic in topics]
+    pending = [entry for entry in job.progress if entry["status"] != "done"]
+    for entry in pending:
+        entry.update(status="queued", error="")
+    _save_progress(job)
+
+    calls = pack_topics(pending, num_questions, question_type)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        for entries in calls:
+            if len(in_flight) >= BATCH_WORKERS:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _record(job, course, in_flight.pop(future), future)
+
+            token = acquire(
+                ai.GEMINI_RATE_BUCKET,
+                rate=REQUESTS_PER_MINUTE / 60,
+                capacity=REQUESTS_PER_MINUTE,
+                max_wait=RATE_LIMIT_WAIT,
+            )
+            if not token.acquired:
+                for entry in entries:
+                    entry.update(status="failed", error="Rate limit exceeded.")
+                _save_progress(job)
+                continue
+
+            for entry in entries:
+                entry["status"] = "running"
+            _save_progress(job)
+            future = pool.submit(
+                ai.generate_quiz_batch,
+                [entry["topic"] for entry in entries],
+                num_questions,
+                question_type,
+            )
+            in_flight[future] = entries
+
+        for future in as_completed(list(in_flight)):
+            _record(job, course, in_flight.pop(future), future)
+
+    created = sum(entry["status"] == "done" for entry in job.progress)
+    failed = len(job.progress) - created
+    if not created:
+        raise RuntimeError("No quiz could be generated for any topic.")
+    return {"created": created, "failed": failed}
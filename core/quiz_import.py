@@ -0,0 +1,423 @@
+import csv
+import itertools
+import json
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+
+from .grading import invalidate_exam_paper
+from .models import Choice, Exam, Question
+
+# Questions inserted per bulk_create statement; their choices follow in one more
+IMPORT_BATCH_SIZE = 500
+
+# Title of imported quizzes when the file does not name them
+DEFAULT_QUIZ_TITLE = "Imported quiz"
+
+QUESTION_TYPES = dict(Question.QUESTION_TYPES)
+CHOICE_MAX_LENGTH = Choice._meta.get_field("text").max_length
+
+ImportResult = namedtuple("ImportResult", ["exams", "questions"])
+
+
+def question_spec(
+    text, question_type="multiple_choice", choices=(), points=1, sample_answer=""
+):
+    """
+    Validate one question to persist.
+
+    Args:
+        text (str): Question text
+        question_type (str): One of ``Question.QUESTION_TYPES``
+        choices (iterable): ``(text, is_correct)`` pairs; a true/false question
+            takes its key as the "True" and "False" choices
+        points (int): Points the question is worth
+        sample_answer (str): Reference answer for short answers
+
+    Returns:
+        dict: The question in the form ``add_questions`` takes
+
+    Raises:
+        ValueError: If the question cannot be stored
+    """
+    text = (text or "").strip()
+    choices = [(str(choice).strip(), bool(correct)) for choice, correct in choices]
+    if not text:
+        raise ValueError("question text is empty")
+    if question_type not in QUESTION_TYPES:
+        raise ValueError(f"unknown question type {question_type!r}")
+    if question_type != "short_answer" and not choices:
+        raise ValueError("question has no choices")
+    for choice, _ in choices:
+        if not choice or len(choice) > CHOICE_MAX_LENGTH:
+            raise ValueError(
+                f"choice text must be 1 to {CHOICE_MAX_LENGTH} characters long"
+            )
+    try:
+        points = int(points)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid points {points!r}") from None
+    return {
+        "text": text,
+        "question_type": question_type,
+        "points": points,
+        "sample_answer": (sample_answer or "").strip(),
+        "choices": choices,
+    }
+
+
+def true_false_choices(value):
+    """The "True"/"False" choices keying a true/false question to ``value``."""
+    return [("True", value), ("False", not value)]
+
+
+def _keyed_choices(choices):
+    """Imported multiple choice questions must mark a correct choice."""
+    if not any(correct for _, correct in choices):
+        raise ValueError("no choice is marked correct")
+    return choices
+
+
+def _parse_true_false(value):
+    normalized = str(value).strip().lower()
+    if normalized in ("true", "t"):
+        return True
+    if normalized in ("false", "f"):
+        return False
+    raise ValueError(f"true/false answer must be true or false, not {value!r}")
+
+
+def add_questions(exam, questions, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Append questions to an exam with batched bulk inserts.
+
+    Each batch costs one bulk insert for its questions and one for their
+    choices; backends that cap query parameters, such as SQLite, split these
+    further.
+    Where the database cannot return the new primary keys from a bulk insert,
+    one extra query per batch reads them back by ``order``. The bulk inserts
+    skip the signals that version the exam paper, so the exam is moved to a
+    new paper version at the end.
+
+    Args:
+        exam (Exam): A saved exam
+        questions (iterable): Dicts as returned by ``question_spec``, consumed
+            lazily ``batch_size`` at a time
+        batch_size (int): Questions per bulk insert
+
+    Returns:
+        int: Number of questions added
+    """
+    last = exam.questions.order_by("-order").values_list("order", flat=True).first()
+    next_order = 0 if last is None else last + 1
+    added = 0
+    questions = iter(questions)
+    with transaction.atomic():
+        while True:
+            batch = list(itertools.islice(questions, batch_size))
+            if not batch:
+                break
+            rows = Question.objects.bulk_create(
+                [
+                    Question(
+                        exam=exam,
+                        text=spec["text"],
+                        question_type=spec["question_type"],
+                        points=spec["points"],
+                        sample_answer=spec["sample_answer"],
+                        order=next_order + index,
+                    )
+                    for index, spec in enumerate(batch)
+                ]
+            )
+            if not connection.features.can_return_rows_from_bulk_insert:
+                rows = list(
+                    exam.questions.filter(
+                        order__gte=next_order, order__lt=next_order + len(batch)
+                    ).order_by("order")
+                )
+            Choice.objects.bulk_create(
+                [
+                    Choice(question=row, text=text, is_correct=correct, order=index)
+                    for row, spec in zip(rows, batch)
+                    for index, (text, correct) in enumerate(spec["choices"])
+                ]
+            )
+            next_order += len(batch)
+            added += len(batch)
+    if added:
+        invalidate_exam_paper(exam.pk)
+    return added
+
+
+def save_quiz(course, created_by, questions, **exam_fields):
+    """
+    Create an exam and its questions in one transaction.
+
+    Args:
+        course (Course): Course the exam belongs to
+        created_by (User): The exam's author
+        questions (iterable): Dicts as returned by ``question_spec``
+        **exam_fields: Further ``Exam`` fields, such as ``title``
+
+    Returns:
+        Exam: The saved exam
+    """
+    with transaction.atomic():
+        exam = Exam.objects.create(course=course, created_by=created_by, **exam_fields)
+        add_questions(exam, questions)
+    return exam
+
+
+def ai_quiz_questions(parsed_questions):
+    """
+    Question specs for the questions parsed from a generated quiz.
+
+    Multiple choice keys are the letter of the correct choice and true/false
+    keys a boolean, as produced by ``core.ai.quiz_parser.QuizStreamParser``.
+    """
+    for data in sorted(parsed_questions, key=lambda data: data["order"]):
+        if data["type"] == "multiple_choice":
+            choices = [
+                (choice["text"], choice["letter"] == data.get("correct_answer"))
+                for choice in data.get("choices", [])
+            ]
+        elif data["type"] == "true_false":
+            choices = true_false_choices(data.get("correct_answer") is True)
+        else:
+            choices = []
+        yield question_spec(
+            data["text"],
+            data["type"],
+            choices,
+            sample_answer=data.get("sample_answer", ""),
+        )
+
+
+# ======================
+# FILE FORMATS
+# ======================
+#
+# Parsers read a text stream and yield ``(quiz title, question spec)`` pairs;
+# consecutive questions with the same title make up one quiz.
+
+
+def _json_question(data):
+    question_type = data.get("type", "multiple_choice")
+    if question_type == "true_false":
+        choices = true_false_choices(_parse_true_false(data.get("answer")))
+    elif question_type == "multiple_choice":
+        choices = _keyed_choices(
+            [
+                (choice["text"], choice.get("is_correct", False))
+                for choice in data.get("choices", [])
+            ]
+        )
+    else:
+        choices = []
+    return question_spec(
+        data.get("text"),
+        question_type,
+        choices,
+        data.get("points", 1),
+        data.get("sample_answer", ""),
+    )
+
+
+def parse_json_quizzes(stream, default_title=DEFAULT_QUIZ_TITLE):
+    """
+    Questions from a JSON quiz file.
+
+    The file holds one quiz or a list of quizzes, each an object with a
+    ``title`` and ``questions``. A question has ``text``, ``type``,
+    ``points``, ``choices`` as ``{"text", "is_correct"}`` objects, an
+    ``answer`` of true or false for true/false questions and a
+    ``sample_answer`` for short answers.
+    """
+    try:
+        data = json.load(stream)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"line {e.lineno}: invalid JSON ({e.msg})") from None
+    quizzes = data if isinstance(data, list) else [data]
+    for number, quiz in enumerate(quizzes, 1):
+        title = quiz.get("title") or default_title
+        for position, question in enumerate(quiz.get("questions", []), 1):
+            try:
+                yield title, _json_question(question)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"quiz {number}, question {position}: {e}") from None
+
+
+def parse_csv_quizzes(stream, default_title=DEFAULT_QUIZ_TITLE):
+    """
+    Questions from a CSV file with one question per row.
+
+    Columns are ``quiz``, ``type``, ``question``, ``points``, ``answer`` and
+    any number of ``choice_*`` columns, read in header order. The ``answer``
+    of a multiple choice question is the letter or the text of the correct
+    choice, of a true/false question true or false and of a short answer its
+    sample answer.
+    """
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or "question" not in reader.fieldnames:
+        raise ValueError("line 1: CSV header needs a 'question' column")
+    choice_columns = [name for name in reader.fieldnames if name.startswith("choice")]
+    for row in reader:
+        try:
+            question_type = (row.get("type") or "").strip() or "multiple_choice"
+            answer = (row.get("answer") or "").strip()
+            sample_answer = ""
+            if question_type == "true_false":
+                choices = true_false_choices(_parse_true_false(answer))
+            elif question_type == "short_answer":
+                choices = []
+                sample_answer = answer
+            else:
+                texts = [row[name].strip() for name in choice_columns if row.get(name)]
+                if len(answer) == 1 and answer.isalpha():
+                    correct = ord(answer.upper()) - ord("A")
+                else:
+                    correct = texts.index(answer) if answer in texts else -1
+                choices = _keyed_choices(
+                    [(text, index == correct) for index, text in enumerate(texts)]
+                )
+            yield (row.get("quiz") or "").strip() or default_title, question_spec(
+                row.get("question"),
+                question_type,
+                choices,
+                (row.get("points") or "").strip() or 1,
+                sample_answer,
+            )
+        except ValueError as e:
+            raise ValueError(f"line {reader.line_num}: {e}") from None
+
+
+# Unescaped GIFT control characters
+GIFT_ANSWER_MARK = re.compile(r"(?<!\\)([=~])")
+GIFT_FEEDBACK = re.compile(r"(?<!\\)#")
+GIFT_WEIGHT = re.compile(r"^%-?[\d.]+%")
+GIFT_ESCAPE = re.compile(r"\\([:~=#{}])")
+
+
+def _gift_unescape(text):
+    return GIFT_ESCAPE.sub(r"\1", text).replace("\\n", "\n").strip()
+
+
+def _gift_question(block):
+    """Parse one GIFT question block into a question spec."""
+    block = re.sub(r"^::.*?::", "", block, flags=re.S).strip()
+    block = re.sub(r"^\[(html|moodle|plain|markdown)\]", "", block).strip()
+    match = re.search(r"(?<!\\)\{(.*?)(?<!\\)\}", block, flags=re.S)
+    if match is None:
+        raise ValueError("question has no {answer} block")
+    before, after = block[: match.start()].strip(), block[match.end() :].strip()
+    text = _gift_unescape(f"{before} _____ {after}" if after else before)
+    body = match.group(1).strip()
+
+    if not body:  # Essay
+        return question_spec(text, "short_answer")
+    if body.startswith("#"):
+        raise ValueError("numerical questions are not supported")
+    key = GIFT_FEEDBACK.split(body, 1)[0].strip().upper()
+    if key in ("T", "TRUE", "F", "FALSE"):
+        return question_spec(text, "true_false", true_false_choices(key[0] == "T"))
+
+    parts = GIFT_ANSWER_MARK.split(body)
+    answers = []
+    for mark, answer in zip(parts[1::2], parts[2::2]):
+        answer = GIFT_FEEDBACK.split(answer, 1)[0].strip()
+        answer = _gift_unescape(GIFT_WEIGHT.sub("", answer))
+        if "->" in answer:
+            raise ValueError("matching questions are not supported")
+        answers.append((answer, mark == "="))
+    if not answers:
+        raise ValueError("answer block has no answers")
+    if all(correct for _, correct in answers):
+        # Only accepted answers: a short answer question
+        return question_spec(
+            text,
+            "short_answer",
+            sample_answer=" / ".join(answer for answer, _ in answers),
+        )
+    return question_spec(text, "multiple_choice", _keyed_choices(answers))
+
+
+def parse_gift_quizzes(stream, default_title=DEFAULT_QUIZ_TITLE):
+    """
+    Questions from a Moodle GIFT file.
+
+    Multiple choice, true/false, short answer and essay questions are read;
+    ``$CATEGORY`` lines start a new quiz named after the category's last path
+    segment. Answer weights and feedback are ignored and every question is
+    worth one point.
+    """
+    title = default_title
+    block = []
+    start = 0
+    for number, line in enumerate(itertools.chain(stream, [""]), 1):
+        stripped = line.strip()
+        if stripped.startswith("//"):
+            continue
+        if stripped.startswith("$CATEGORY:"):
+            title = stripped.split(":", 1)[1].strip().rstrip("/").split("/")[-1]
+            title = title or default_title
+            continue
+        if stripped:
+            if not block:
+                start = number
+            block.append(line.rstrip("\n"))
+            continue
+        if block:
+            try:
+                yield title, _gift_question("\n".join(block))
+            except ValueError as e:
+                raise ValueError(f"line {start}: {e}") from None
+            block = []
+
+
+QUIZ_FORMATS = {
+    "csv": parse_csv_quizzes,
+    "gift": parse_gift_quizzes,
+    "json": parse_json_quizzes,
+}
+
+
+def import_quizzes(
+    stream, file_format, course, created_by, default_title=DEFAULT_QUIZ_TITLE
+):
+    """
+    Import every quiz of a quiz file into a course in one transaction.
+
+    Questions are parsed lazily and written with ``add_questions`` while the
+    file is read, so memory use stays bounded by one insert batch. Any error
+    rolls the whole import back.
+
+    Args:
+        stream: Text stream of the file
+        file_format (str): One of ``QUIZ_FORMATS``
+        course (Course): Course the quizzes are added to
+        created_by (User): Author of the new exams
+        default_title (str): Title of quizzes the file does not name
+
+    Returns:
+        ImportResult: The new ``exams`` and the number of ``questions``
+
+    Raises:
+        ValueError: With the offending line or question, if the file cannot
+            be imported
+    """
+    if file_format not in QUIZ_FORMATS:
+        raise ValueError(f"unknown quiz format {file_format!r}")
+    parsed = QUIZ_FORMATS[file_format](stream, default_title)
+
+    exams = []
+    questions = 0
+    with transaction.atomic():
+        for title, group in itertools.groupby(parsed, key=lambda item: item[0]):
+            exam = Exam.objects.create(
+                course=course, created_by=created_by, title=title[:200]
+            )
+            questions += add_questions(exam, (spec for _, spec in group))
+            exams.append(exam)
+    return ImportResult(exams, questions)
@@ -0,0 +1,109 @@
+import random
+import time
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least
+from django.db.models.lookups import GreaterThanOrEqual
+
+from .models import RateLimitBucket
+
+# Outcome of a token request; ``retry_after`` is the expected wait in seconds
+# for a token when none was taken
+TokenResult = namedtuple("TokenResult", ["acquired", "retry_after"])
+
+# Waiters sleep up to this share longer than needed so they do not all retry
+# at the same instant
+WAIT_JITTER = 0.2
+
+
+def _bucket_transaction():
+    """
+    Transaction for a change to a bucket row.
+
+    Outside a transaction the change commits as soon as the block exits.
+    Inside a caller's transaction, such as a view under ATOMIC_REQUESTS, it
+    can only run in a savepoint: the row then stays locked, and every other
+    caller of the bucket waits, until the caller's transaction ends.
+    """
+    return transaction.atomic(durable=not connection.in_atomic_block)
+
+
+def _take_token(name, rate, capacity, now):
+    """
+    Take a token with a single conditional UPDATE.
+
+    The refill and the check happen in the same statement, so the database
+    serializes concurrent callers from any number of processes without an
+    explicit lock. The statement commits at once in its own transaction
+    (see ``_bucket_transaction``).
+
+    Returns:
+        bool: Whether a token was taken
+    """
+    elapsed = Greatest(Value(now) - F("updated_at"), Value(0.0))
+    available = Least(F("tokens") + elapsed * Value(rate), Value(float(capacity)))
+    with _bucket_transaction():
+        return bool(
+            RateLimitBucket.objects.filter(name=name)
+            .filter(GreaterThanOrEqual(available, Value(1.0)))
+            .update(
+                tokens=available - Value(1.0),
+                updated_at=Greatest(F("updated_at"), Value(now)),
+            )
+        )
+
+
+def acquire(name, rate, capacity, max_wait=0):
+    """
+    Take one token from a token bucket shared by every process.
+
+    The bucket holds up to ``capacity`` tokens and refills at ``rate`` tokens
+    a second; it is created full on first use. Without a token the call
+    sleeps until one is expected, as long as that is within ``max_wait``
+    seconds, and tries again.
+
+    Tokens are taken in their own short transactions where possible, so
+    callers should not hold a transaction open (see ``_bucket_transaction``).
+
+    Args:
+        name (str): Bucket name
+        rate (float): Tokens added per second
+        capacity (int): Largest burst allowed
+        max_wait (float): Seconds to wait for a token before giving up
+
+    Returns:
+        TokenResult: Whether a token was taken, and if not the expected wait
+
+    Raises:
+        ValueError: If the rate or capacity is not positive
+    """
+    if rate <= 0 or capacity < 1:
+        raise ValueError("Token buckets need a positive rate and a capacity of 1+")
+
+    deadline = time.monotonic() + max_wait
+    while True:
+        now = time.time()
+        if _take_token(name, rate, capacity, now):
+            return TokenResult(True, 0.0)
+
+        bucket = (
+            RateLimitBucket.objects.filter(name=name)
+            .values_list("tokens", "updated_at")
+            .first()
+        )
+        if bucket is None:
+            with _bucket_transaction():
+                RateLimitBucket.objects.get_or_create(
+                    name=name, defaults={"tokens": float(capacity), "updated_at": now}
+                )
+            continue
+        tokens, updated_at = bucket
+        available = min(capacity, tokens + max(now - updated_at, 0.0) * rate)
+        retry_after = max((1.0 - available) / rate, 0.001)
+
+        remaining = deadline - time.monotonic()
+        if retry_after > remaining:
+            return TokenResult(False, retry_after)
+        time.sleep(min(retry_after * random.uniform(1.0, 1.0 + WAIT_JITTER), remaining))
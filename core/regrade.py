@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+
+from . import gradebook, item_analysis
+from .grading import compile_exam_paper
+from .models import ExamSubmission, SubmissionAnswer
+
+
+def _objective_questions(answer_key):
+    """
+    Questions the key can mark on its own: multiple choice, and true/false
+    questions that have a True/False choice flagged correct.
+    """
+    return [
+        question_id
+        for question_id, question in answer_key.items()
+        if question["type"] == "multiple_choice"
+        or (
+            question["type"] == "true_false"
+            and any(choice["is_correct"] for choice in question["choices"].values())
+        )
+    ]
+
+
+def _grade_expression(max_score):
+    """A submission's grade computed from its stored answer points."""
+    if not max_score:
+        return Value(0.0)
+    scores = (
+        SubmissionAnswer.objects.filter(submission=OuterRef("pk"))
+        .order_by()
+        .values("submission")
+        .annotate(score=Sum("points_awarded"))
+        .values("score")
+    )
+    # Same operation order as grading.score_answers
+    return (
+        Coalesce(Subquery(scores, output_field=FloatField()), Value(0.0))
+        / Value(float(max_score))
+        * Value(100.0)
+    )
+
+
+def regrade_exam(exam):
+    """
+    Rescore every submission of an exam against its current answer key.
+
+    Answers are marked from their stored choice with two indexed UPDATEs per
+    objective question, one for the answers now right and one for those now
+    wrong, each touching only rows whose marking changes. Grades are then
+    recomputed from the points summed in the database and written to the
+    submissions whose grade moved. Points already awarded for short answers
+    and other manually marked questions count as they are, and pending
+    submissions keep their unset grade for the short-answer worker.
+
+    Args:
+        exam (Exam): The exam to regrade
+
+    Returns:
+        dict: ``submissions`` seen, ``answers`` remarked and ``updated``
+        submissions whose grade changed
+    """
+    # Compiled fresh: the caller's exam row may predate the key change
+    answer_key = compile_exam_paper(exam)["answer_key"]
+    max_score = sum(max(question["points"], 0) for question in answer_key.values())
+
+    with transaction.atomic():
+        submissions = ExamSubmission.objects.filter(exam=exam)
+        # Row locks keep a concurrent grading worker from interleaving
+        count = len(submissions.select_for_update().values_list("id", flat=True))
+
+        remarked = 0
+        for question_id in _objective_questions(answer_key):
+            question = answer_key[question_id]
+            points = float(max(question["points"], 0))
+            correct = [
+                choice_id
+                for choice_id, choice in question["choices"].items()
+                if choice["is_correct"]
+            ]
+            answers = SubmissionAnswer.objects.filter(
+                submission__exam=exam, question_id=question_id
+            )
+            remarked += (
+                answers.filter(choice__in=correct)
+                .exclude(is_correct=True, points_awarded=points)
+                .update(is_correct=True, points_awarded=points)
+            )
+            remarked += (
+                answers.exclude(choice__in=correct)
+                .exclude(is_correct=False, points_awarded=0)
+                .update(is_correct=False, points_awarded=0)
+            )
+
+        grade = _grade_expression(max_score)
+        changed = list(
+            submissions.exclude(grading_status="pending")
+            # Free-form submissions without answer rows keep their manual grade
+            .filter(Exists(SubmissionAnswer.objects.filter(submission=OuterRef("pk"))))
+            .annotate(drift=Abs(F("grade") - grade))
+            .filter(Q(grade__isnull=True) | Q(drift__gt=1e-9))
+            .values_list("id", flat=True)
+        )
+        ExamSubmission.objects.filter(pk__in=changed).update(grade=grade)
+
+    # Bulk UPDATEs skip the signals that patch the gradebook and item analysis
+    if remarked or changed:
+        gradebook.invalidate_gradebook(exam.course_id)
+        item_analysis.invalidate_item_analysis(exam.pk)
+    return {"submissions": count, "answers": remarked, "updated": len(changed)}
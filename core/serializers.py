@@ -14,7 +14,15 @@ class CourseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Course
-        fields = ["id", "title", "description", "instructor", "created_at"]
+        fields = [
+            "id",
+            "title",
+            "description",
+            "instructor",
+            "max_students",
+            "enrollment_count",
+            "created_at",
+        ]
 
 
 class EnrollmentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,204 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ai
+from .grading import get_exam_paper, stored_scores
+from .models import ExamSubmission, SubmissionAnswer
+
+logger = logging.getLogger(__name__)
+
+# Short answers sent to the model in a single grading call
+SHORT_ANSWERS_PER_CALL = 10
+
+# Submissions leased and graded per worker pass
+SUBMISSIONS_PER_PASS = 50
+
+# A leased submission not graded after this many seconds is assumed lost with
+# its worker and is leased again
+GRADING_LEASE = 10 * 60
+
+
+def submission_status(answer_key, result):
+    """
+    Grading status for a freshly graded submission.
+
+    Answered short-answer questions queue the submission for background
+    grading; any other unmarked answer sends it to the instructor for review.
+    """
+    for question_id, answer in result.answers.items():
+        if answer["is_correct"] is None:
+            if answer_key[int(question_id)]["type"] == "short_answer":
+                return "pending"
+    return "review" if result.needs_review else "graded"
+
+
+def queue_submission(submission):
+    """
+    Hand a pending submission to the short-answer grading worker.
+
+    Pending submissions are picked up by ``manage.py grade_short_answers``.
+    With ``SHORT_ANSWER_GRADING_MODE = "eager"`` they are instead graded in
+    this process once the current transaction commits, which needs no worker
+    and is meant for development and tests.
+    """
+    if getattr(settings, "SHORT_ANSWER_GRADING_MODE", "worker") == "eager":
+        transaction.on_commit(
+            lambda: grade_pending_submissions(submission_ids=[submission.pk])
+        )
+
+
+def _lease_submissions(submission_ids, limit):
+    """
+    Lease pending submissions to this worker in one short transaction.
+
+    Submissions already leased are skipped until their lease expires, as are
+    rows another worker is leasing right now, where the database supports
+    skipping locked rows.
+
+    Returns:
+        tuple: The leased submissions, oldest first, and the lease time
+    """
+    now = timezone.now()
+    free = Q(grading_claimed_at__isnull=True) | Q(
+        grading_claimed_at__lt=now - timedelta(seconds=GRADING_LEASE)
+    )
+    with transaction.atomic():
+        submissions = (
+            ExamSubmission.objects.filter(free, grading_status="pending")
+            .select_related("exam")
+            .order_by("id")
+        )
+        if submission_ids is not None:
+            submissions = submissions.filter(pk__in=submission_ids)
+        if connection.features.has_select_for_update_skip_locked:
+            submissions = submissions.select_for_update(skip_locked=True, of=("self",))
+        submissions = list(submissions[:limit])
+        ExamSubmission.objects.filter(
+            pk__in=[submission.pk for submission in submissions]
+        ).update(grading_claimed_at=now)
+    return submissions, now
+
+
+def grade_pending_submissions(
+    submission_ids=None,
+    limit=SUBMISSIONS_PER_PASS,
+    batch_size=SHORT_ANSWERS_PER_CALL,
+):
+    """
+    Grade the short answers of pending submissions and write final grades.
+
+    Pending submissions are leased to this worker in a short transaction and
+    their unmarked short answers are read in one query and pooled across
+    submissions into model calls of ``batch_size`` answers. The calls run
+    with no transaction open, so no row or database lock is held while the
+    model answers. Grades are then written in a second short transaction,
+    for the submissions this worker still holds the lease on: a submission
+    whose answers all came back gets its final grade from the points summed
+    in the database; one caught in a failed call is released and stays
+    pending for the next pass.
+
+    Args:
+        submission_ids (list): Restrict the pass to these submissions
+        limit (int): Maximum submissions handled in this pass
+        batch_size (int): Short answers sent per model call
+
+    Returns:
+        int: Number of submissions that left the pending state
+    """
+    submissions, claimed_at = _lease_submissions(submission_ids, limit)
+    if not submissions:
+        return 0
+
+    answers = list(
+        SubmissionAnswer.objects.filter(
+            submission__in=submissions,
+            question__question_type="short_answer",
+            is_correct__isnull=True,
+        )
+        .select_related("question")
+        .order_by("submission", "question__order", "question")
+    )
+
+    failed = set()
+    graded = []
+    for start in range(0, len(answers), batch_size):
+        batch = answers[start : start + batch_size]
+        result = ai.grade_short_answers(
+            [
+                {
+                    "question": answer.question.text,
+                    "sample_answer": answer.question.sample_answer,
+                    "answer": answer.text,
+                    "points": max(answer.question.points, 0),
+                }
+                for answer in batch
+            ]
+        )
+        if "error" in result:
+            logger.warning(f"Short answer batch not graded: {result['error']}")
+            failed.update(answer.submission_id for answer in batch)
+            continue
+        for answer, scored in zip(batch, result["scores"]):
+            answer.points_awarded = round(
+                scored["score"] * max(answer.question.points, 0), 2
+            )
+            answer.is_correct = scored["score"] >= 0.5
+            answer.feedback = scored["feedback"]
+            graded.append(answer)
+
+    with transaction.atomic():
+        # Submissions whose lease expired during the calls belong to another
+        # worker now; their results are dropped
+        held = set(
+            ExamSubmission.objects.select_for_update()
+            .filter(
+                pk__in=[submission.pk for submission in submissions],
+                grading_status="pending",
+                grading_claimed_at=claimed_at,
+            )
+            .values_list("pk", flat=True)
+        )
+
+        # Answers of failed submissions stay unmarked so they are retried whole
+        SubmissionAnswer.objects.bulk_update(
+            [
+                answer
+                for answer in graded
+                if answer.submission_id in held and answer.submission_id not in failed
+            ],
+            ["points_awarded", "is_correct", "feedback"],
+        )
+        ExamSubmission.objects.filter(pk__in=held & failed).update(
+            grading_claimed_at=None
+        )
+
+        finished = [
+            submission
+            for submission in submissions
+            if submission.pk in held and submission.pk not in failed
+        ]
+        scores = stored_scores(finished)
+        for submission in finished:
+            score, unmarked = scores.get(submission.pk, (0, 0))
+            max_score = sum(
+                max(question["points"], 0)
+                for question in get_exam_paper(submission.exam)["answer_key"].values()
+            )
+            submission.grade = score / max_score * 100 if max_score else 0
+            submission.grading_status = "review" if unmarked else "graded"
+            submission.graded_at = None if unmarked else timezone.now()
+            submission.grading_claimed_at = None
+            submission.save(
+                update_fields=[
+                    "grade",
+                    "grading_status",
+                    "graded_at",
+                    "grading_claimed_at",
+                ]
+            )
+    return len(finished)
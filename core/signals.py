@@ -0,0 +1,201 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import counters, dashboards, gradebook, grading, item_analysis
+from .models import (
+    Assignment,
+    AssignmentSubmission,
+    Choice,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    Question,
+    User,
+)
+
+# ======================
+# GRADEBOOK SNAPSHOTS
+# ======================
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+def update_gradebook_assignment_cell(sender, instance, **kwargs):
+    gradebook.patch_cell(
+        instance.assignment.course_id,
+        "assignment",
+        instance.assignment_id,
+        instance.student_id,
+    )
+
+
+@receiver(post_save, sender=ExamSubmission)
+@receiver(post_delete, sender=ExamSubmission)
+def update_gradebook_exam_cell(sender, instance, **kwargs):
+    gradebook.patch_cell(
+        instance.exam.course_id, "exam", instance.exam_id, instance.student_id
+    )
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def update_gradebook_student_row(sender, instance, **kwargs):
+    gradebook.patch_student(instance.course_id, instance.student_id)
+
+
+@receiver(post_save, sender=Assignment)
+def update_gradebook_assignment_column(sender, instance, **kwargs):
+    gradebook.patch_column(
+        instance.course_id, "assignment", instance.id, instance.title
+    )
+
+
+@receiver(post_save, sender=Exam)
+def update_gradebook_exam_column(sender, instance, **kwargs):
+    gradebook.patch_column(instance.course_id, "exam", instance.id, instance.title)
+
+
+# Columns are dropped before the cascade deletes their submissions, so the
+# per-submission handlers above find nothing left to patch.
+@receiver(pre_delete, sender=Assignment)
+def remove_gradebook_assignment_column(sender, instance, **kwargs):
+    gradebook.remove_column(instance.course_id, "assignment", instance.id)
+
+
+@receiver(pre_delete, sender=Exam)
+def remove_gradebook_exam_column(sender, instance, **kwargs):
+    gradebook.remove_column(instance.course_id, "exam", instance.id)
+
+
+# ======================
+# DASHBOARD STATS
+# ======================
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_instructor_stats(sender, instance, **kwargs):
+    dashboards.invalidate_instructor_stats(instance.instructor_id)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_instructor_stats(sender, instance, **kwargs):
+    dashboards.invalidate_instructor_stats(
+        dashboards.course_instructor_id(instance.course_id)
+    )
+
+
+@receiver(post_save, sender=ExamSubmission)
+@receiver(post_delete, sender=ExamSubmission)
+def invalidate_submission_instructor_stats(sender, instance, **kwargs):
+    dashboards.invalidate_instructor_stats(
+        dashboards.exam_instructor_id(instance.exam_id)
+    )
+
+
+# ======================
+# STUDENT COMPLETION
+# ======================
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+@receiver(post_save, sender=ExamSubmission)
+@receiver(post_delete, sender=ExamSubmission)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_submitter_completion(sender, instance, **kwargs):
+    dashboards.invalidate_student_completion([instance.student_id])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_course_completion(sender, instance, created=True, **kwargs):
+    # Renaming an item does not change anyone's completion
+    if created:
+        dashboards.invalidate_course_completion(instance.course_id)
+
+
+# ======================
+# PLATFORM COUNTERS
+# ======================
+
+
+def _counter_name(sender):
+    for name, model in counters.COUNTED_MODELS.items():
+        if issubclass(sender, model):
+            return name
+    return None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Enrollment)
+def increment_platform_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust_counter(_counter_name(sender), 1)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Enrollment)
+def decrement_platform_counter(sender, instance, **kwargs):
+    counters.adjust_counter(_counter_name(sender), -1)
+
+
+# ======================
+# COURSE ENROLLMENT COUNTS
+# ======================
+
+
+@receiver(post_save, sender=Enrollment)
+def increment_course_enrollment_count(sender, instance, created, raw=False, **kwargs):
+    # core.enrollment claims the seat itself before inserting the row
+    if created and not raw and not getattr(instance, "_seat_claimed", False):
+        counters.adjust_enrollment_count(instance, 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def decrement_course_enrollment_count(sender, instance, **kwargs):
+    counters.adjust_enrollment_count(instance, -1)
+
+
+# ======================
+# EXAM PAPERS
+# ======================
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_question_paper_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        grading.invalidate_exam_paper(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def bump_choice_paper_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        grading.invalidate_question_paper(instance.question_id)
+
+
+# ======================
+# ITEM ANALYSIS
+# ======================
+
+
+# New submissions are appended to the cached arrays on the next read; only a
+# changed or removed submission forces a rebuild.
+@receiver(post_save, sender=ExamSubmission)
+def invalidate_item_analysis_on_change(sender, instance, created, **kwargs):
+    if not created:
+        item_analysis.invalidate_item_analysis(instance.exam_id)
+
+
+@receiver(post_delete, sender=ExamSubmission)
+def invalidate_item_analysis_on_delete(sender, instance, **kwargs):
+    item_analysis.invalidate_item_analysis(instance.exam_id)
@@ -0,0 +1,44 @@
+"""
+Processes for the multi-process rate limiter test.
+
+They are started with the "spawn" method, which imports this module in a
+fresh interpreter, so nothing here may touch Django before ``use_database``.
+"""
+
+import os
+import time
+
+
+def use_database(path):
+    """Point a spawned process at a shared SQLite file and set Django up."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lms_backend.settings")
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = path
+    django.setup()
+
+
+def create_bucket_table(path):
+    use_database(path)
+    from django.db import connection
+
+    from core.models import RateLimitBucket
+
+    with connection.schema_editor() as editor:
+        editor.create_model(RateLimitBucket)
+
+
+def take_tokens(path, barrier, duration, results):
+    """Request tokens as fast as possible for ``duration`` seconds."""
+    use_database(path)
+    from core.rate_limits import acquire
+
+    # Start together once every interpreter has loaded Django
+    barrier.wait()
+    start = time.time()
+    taken = []
+    while time.time() < start + duration:
+        if acquire("shared", rate=10, capacity=5).acquired:
+            taken.append(time.time())
+    results.put(taken)
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.ai import gemini
+from core.ai.client import FakeTransport, GeminiClient, set_client
+from core.ai.response_cache import cache_stats, evict
+from core.models import AIResponseCache
+
+
+class GeminiResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(set_client, None)
+
+    def answer(self, *replies, default="An explanation."):
+        """Serve Gemini calls offline with ``replies``, then ``default``."""
+        transport = FakeTransport(replies, default=default)
+        set_client(GeminiClient(transport, max_retries=0))
+        return transport
+
+    def test_identical_calls_reuse_response(self):
+        transport = self.answer()
+        first = gemini.explain_concept("Osmosis", "college")
+        # Whitespace differences and defaulted arguments share the key
+        second = gemini.explain_concept("  Osmosis ")
+        gemini.explain_concept("Osmosis", grade_level="high school")
+        self.assertEqual(first, "An explanation.")
+        self.assertEqual(second, first)
+        self.assertEqual(len(transport.calls), 2)
+        self.assertEqual(
+            cache_stats(), {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "entries": 2}
+        )
+
+    def test_structured_response_round_trip(self):
+        self.answer(
+            default="QUESTION: Is water wet?\nCORRECT: True\nEXPLANATION: Yes\n---"
+        )
+        fresh = gemini.generate_quiz_questions("Water", 1, "true_false")
+        cached = gemini.generate_quiz_questions("Water", 1, "true_false")
+        self.assertEqual(cached, fresh)
+        self.assertIs(cached["parsed_questions"][0]["correct_answer"], True)
+
+    def test_bypass_refreshes_stored_response(self):
+        self.answer("old", default="new")
+        gemini.generate_course_syllabus("Biology", "16 weeks", "Cells")
+        fresh = gemini.generate_course_syllabus(
+            "Biology", "16 weeks", "Cells", use_cache=False
+        )
+        cached = gemini.generate_course_syllabus("Biology", "16 weeks", "Cells")
+        self.assertEqual((fresh, cached), ("new", "new"))
+        self.assertEqual(AIResponseCache.objects.count(), 1)
+
+    def test_errors_are_not_stored(self):
+        self.answer(RuntimeError("boom"), RuntimeError("boom"))
+        self.assertEqual(
+            gemini.generate_lesson_plan("Cells", "60 minutes", "Beginner"),
+            {"error": "boom"},
+        )
+        gemini.explain_concept("Cells")
+        self.assertFalse(AIResponseCache.objects.exists())
+
+    def test_expired_entries_are_refetched(self):
+        transport = self.answer()
+        gemini.explain_concept("Osmosis")
+        AIResponseCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        gemini.explain_concept("Osmosis")
+        self.assertEqual(len(transport.calls), 2)
+
+    @override_settings(GEMINI_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entry_evicted(self):
+        transport = self.answer()
+        gemini.explain_concept("A")
+        gemini.explain_concept("B")
+        AIResponseCache.objects.update(
+            last_used_at=timezone.now() - timedelta(minutes=5)
+        )
+        gemini.explain_concept("A")  # hit, now most recently used
+        gemini.explain_concept("C")  # evicts B
+        self.assertEqual(len(transport.calls), 3)
+        gemini.explain_concept("A")
+        gemini.explain_concept("B")
+        self.assertEqual(len(transport.calls), 4)
+        self.assertEqual(AIResponseCache.objects.count(), 2)
+
+    def test_command(self):
+        self.answer()
+        gemini.explain_concept("Osmosis")
+        self.assertEqual(evict(max_entries=1), 0)
+        out = StringIO()
+        call_command("ai_cache", "--clear", stdout=out)
+        self.assertIn("Deleted 1 responses", out.getvalue())
+        self.assertIn("0 responses stored, 0 hits, 1 misses", out.getvalue())
@@ -0,0 +1,182 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from google.api_core import exceptions
+
+from core.ai import gemini
+from core.ai.client import (
+    GEMINI_MODEL,
+    FakeTransport,
+    GeminiClient,
+    SDKTransport,
+    get_client,
+    set_client,
+)
+
+RETRY_DELAY = "retry_delay { seconds: 7 }"
+
+
+def quota_error():
+    return exceptions.ResourceExhausted(f"Resource exhausted. {RETRY_DELAY}")
+
+
+def overloaded_error():
+    return exceptions.ServiceUnavailable(f"The model is overloaded. {RETRY_DELAY}")
+
+
+def broken_stream():
+    yield "Half"
+    raise ConnectionError("connection reset")
+
+
+@mock.patch("core.ai.client.time.sleep")
+class GeminiClientTest(SimpleTestCase):
+    def test_transient_failures_are_retried_with_backoff(self, sleep):
+        transport = FakeTransport(
+            [ConnectionError("reset"), exceptions.InternalServerError("Oops"), "ok"]
+        )
+        client = GeminiClient(transport, backoff=1.0, max_backoff=3.0)
+        with mock.patch("core.ai.client.random.uniform", side_effect=lambda a, b: b):
+            self.assertEqual(client.generate("prompt"), "ok")
+        self.assertEqual(len(transport.calls), 3)
+        # Exponential, capped at max_backoff
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [2.0, 3.0])
+
+    def test_server_retry_delay_is_honored(self, sleep):
+        transport = FakeTransport([overloaded_error(), "ok"])
+        self.assertEqual(GeminiClient(transport, backoff=0).generate("prompt"), "ok")
+        sleep.assert_called_once_with(7)
+
+    def test_quota_errors_are_not_retried(self, sleep):
+        for error in (
+            quota_error(),
+            exceptions.TooManyRequests("Slow down"),
+            RuntimeError("Quota exceeded for requests per minute"),
+        ):
+            with self.subTest(error):
+                transport = FakeTransport([error, "ok"])
+                with self.assertRaises(type(error)):
+                    GeminiClient(transport).generate("prompt")
+                self.assertEqual(len(transport.calls), 1)
+        sleep.assert_not_called()
+
+    def test_errors_are_retried_by_status_not_text(self, sleep):
+        # Numbers in a message are not a status
+        for error in (
+            exceptions.BadRequest("max_tokens 1500 is above the limit"),
+            RuntimeError("Answers are limited to 500 characters"),
+        ):
+            with self.subTest(error):
+                transport = FakeTransport([error, "ok"])
+                with self.assertRaises(type(error)):
+                    GeminiClient(transport).generate("prompt")
+                self.assertEqual(len(transport.calls), 1)
+        transport = FakeTransport([exceptions.DeadlineExceeded("Slow"), "ok"])
+        self.assertEqual(GeminiClient(transport, backoff=0).generate("prompt"), "ok")
+
+    def test_gives_up_when_the_wait_exceeds_the_deadline(self, sleep):
+        transport = FakeTransport([overloaded_error(), "ok"])
+        with self.assertRaises(exceptions.ServiceUnavailable):
+            GeminiClient(transport, deadline=5).generate("prompt")
+        self.assertEqual(len(transport.calls), 1)
+        sleep.assert_not_called()
+
+    def test_permanent_errors_and_exhausted_retries_raise(self, sleep):
+        transport = FakeTransport([ValueError("400 API key not valid"), "ok"])
+        with self.assertRaises(ValueError):
+            GeminiClient(transport).generate("prompt")
+        self.assertEqual(len(transport.calls), 1)
+
+        transport = FakeTransport([TimeoutError("timed out")] * 3)
+        with self.assertRaises(TimeoutError):
+            GeminiClient(transport, max_retries=2, backoff=0).generate("prompt")
+        self.assertEqual(len(transport.calls), 3)
+
+    def test_attempts_get_the_timeout_within_the_deadline(self, sleep):
+        transport = FakeTransport()
+        GeminiClient(transport, timeout=10, deadline=60).generate("prompt")
+        GeminiClient(transport, timeout=10, deadline=4).generate("prompt")
+        self.assertEqual(transport.calls[0], (GEMINI_MODEL, "prompt", False, 10))
+        self.assertLessEqual(transport.calls[1][3], 4)
+
+    def test_streams_retry_only_before_the_first_chunk(self, sleep):
+        chunks = []
+        transport = FakeTransport([ConnectionError("reset"), ["Hel", "lo"]])
+        client = GeminiClient(transport, backoff=0)
+        self.assertEqual(client.generate("prompt", on_text=chunks.append), "Hello")
+        self.assertEqual(chunks, ["Hel", "lo"])
+
+        transport = FakeTransport([broken_stream(), "Again"])
+        client = GeminiClient(transport, backoff=0)
+        with self.assertRaises(ConnectionError):
+            client.generate("prompt", on_text=chunks.append)
+        self.assertEqual(len(transport.calls), 1)
+
+
+class ClientManagerTest(SimpleTestCase):
+    def setUp(self):
+        set_client(None)
+        self.addCleanup(set_client, None)
+
+    @override_settings(GEMINI_TRANSPORT="fake", GEMINI_TIMEOUT=5, GEMINI_MAX_RETRIES=1)
+    def test_client_is_built_once_from_settings(self):
+        client = get_client()
+        self.assertIs(get_client(), client)
+        self.assertIsInstance(client.transport, FakeTransport)
+        self.assertEqual((client.timeout, client.max_retries), (5, 1))
+
+    @override_settings(GEMINI_TRANSPORT="sdk", GEMINI_API_KEY=None)
+    def test_sdk_transport_needs_a_key(self):
+        with self.assertRaisesMessage(ValueError, "GEMINI_API_KEY"):
+            get_client()
+
+    @mock.patch("google.generativeai.GenerativeModel")
+    @mock.patch("google.generativeai.configure")
+    def test_sdk_transport_keeps_warm_models(self, configure, model_class):
+        model_class.return_value.generate_content.return_value = mock.Mock(text="Hi")
+        transport = SDKTransport("key")
+        self.assertEqual(transport.generate(GEMINI_MODEL, "a", False, 12), "Hi")
+        self.assertEqual(transport.generate(GEMINI_MODEL, "b", False, 12), "Hi")
+        configure.assert_called_once_with(api_key="key")
+        model_class.assert_called_once_with(GEMINI_MODEL)
+        model_class.return_value.generate_content.assert_called_with(
+            "b", stream=False, request_options={"timeout": 12}
+        )
+
+
+class GeneratorRetryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(set_client, None)
+
+    def test_generators_recover_from_transient_failures(self):
+        transport = FakeTransport([ConnectionError("reset")], default="Explained")
+        set_client(GeminiClient(transport, backoff=0))
+        self.assertEqual(gemini.explain_concept("Osmosis"), "Explained")
+        self.assertEqual(len(transport.calls), 2)
+
+    def test_quota_errors_fall_back_without_retrying(self):
+        transport = FakeTransport([quota_error(), "Unused"])
+        set_client(GeminiClient(transport, max_retries=3, backoff=0))
+        quiz = gemini.generate_quiz_questions("History", 2, "true_false")
+        self.assertTrue(quiz["is_demo"])
+        self.assertTrue(quiz["quota_exceeded"])
+        self.assertEqual(quiz["retry_after"], 7)
+        self.assertEqual(len(transport.calls), 1)
+
+    def test_every_generator_reports_quota_errors(self):
+        for generator, args in [
+            (gemini.generate_lesson_plan, ("Osmosis", "1 hour", "beginner")),
+            (gemini.generate_assignment_rubric, ("Essay", "Clarity")),
+            (gemini.explain_concept, ("Osmosis",)),
+            (gemini.generate_course_syllabus, ("Biology", "10 weeks", "Cells")),
+        ]:
+            with self.subTest(generator.__name__):
+                transport = FakeTransport([quota_error(), "Unused"])
+                set_client(GeminiClient(transport, max_retries=3, backoff=0))
+                result = generator(*args)
+                self.assertTrue(result["quota_exceeded"])
+                self.assertEqual(result["retry_after"], 7)
+                self.assertEqual(len(transport.calls), 1)
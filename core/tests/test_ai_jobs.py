@@ -0,0 +1,342 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from google.api_core import exceptions
+
+from core.ai.client import FakeTransport, GeminiClient, set_client
+from core.ai_jobs import (
+    MAX_JOB_ATTEMPTS,
+    claim_jobs,
+    keep_alive,
+    run_job,
+    run_pending_jobs,
+    submit_job,
+)
+from core.models import AIJob, User
+
+LESSON_PLAN = {
+    "topic": "Cells",
+    "duration": "60 minutes",
+    "difficulty": "Beginner",
+    "content": "Plan",
+}
+
+
+class AIJobTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.client.force_login(self.instructor)
+
+    def submit_lesson_plan(self):
+        response = self.client.post(
+            reverse("ai_lesson_planner"),
+            {"topic": "Cells", "duration": "60 minutes", "difficulty": "Beginner"},
+        )
+        job = AIJob.objects.get()
+        self.assertRedirects(
+            response,
+            reverse("ai_job_detail", args=[job.pk]),
+            fetch_redirect_response=False,
+        )
+        return job
+
+    def status(self, job):
+        return self.client.get(reverse("ai_job_status", args=[job.pk])).json()
+
+    @mock.patch("core.ai.gemini.generate_lesson_plan", return_value=LESSON_PLAN)
+    def test_view_queues_job_and_worker_runs_it(self, generate):
+        job = self.submit_lesson_plan()
+        generate.assert_not_called()
+        self.assertEqual(
+            job.arguments,
+            {
+                "topic": "Cells",
+                "duration": "60 minutes",
+                "difficulty_level": "Beginner",
+            },
+        )
+        self.assertEqual(
+            self.status(job), {"id": str(job.pk), "status": "queued", "done": False}
+        )
+        self.assertContains(
+            self.client.get(reverse("ai_job_detail", args=[job.pk])), "Generating"
+        )
+
+        self.assertEqual(run_pending_jobs(), 1)
+        generate.assert_called_once_with(
+            "Cells", "60 minutes", "Beginner", on_text=mock.ANY
+        )
+        self.assertEqual(self.status(job)["status"], "done")
+        response = self.client.get(reverse("ai_job_detail", args=[job.pk]))
+        self.assertTemplateUsed(response, "core/ai_lesson_result.html")
+        self.assertEqual(response.context["lesson_plan"], LESSON_PLAN)
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_jobs_are_private(self):
+        job = submit_job(self.instructor, "explanation", concept="Osmosis")
+        other = User.objects.create_user(username="other", role="instructor")
+        self.client.force_login(other)
+        self.assertEqual(
+            self.client.get(reverse("ai_job_status", args=[job.pk])).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(reverse("ai_job_detail", args=[job.pk])).status_code, 404
+        )
+
+    @mock.patch(
+        "core.ai.gemini.generate_quiz_questions",
+        return_value={"error": "Rate limit exceeded.", "rate_limited": True},
+    )
+    def test_quiz_falls_back_to_demo_content(self, generate):
+        self.client.post(
+            reverse("ai_quiz_generator"),
+            {"topic": "History", "num_questions": "2", "question_type": "true_false"},
+        )
+        run_pending_jobs()
+        job = AIJob.objects.get()
+        self.assertEqual(job.status, "done")
+        self.assertTrue(job.result["is_demo"])
+        self.assertIn("Rate limit reached", job.warning)
+
+        response = self.client.get(reverse("ai_job_detail", args=[job.pk]))
+        self.assertContains(response, "Save to Course")
+        self.assertEqual(self.client.session["generated_quiz"], job.result)
+
+    @mock.patch(
+        "core.ai.gemini.generate_lesson_plan", return_value={"error": "Bad request"}
+    )
+    def test_failed_job(self, generate):
+        job = self.submit_lesson_plan()
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ("failed", "Bad request"))
+        self.assertTrue(self.status(job)["done"])
+        response = self.client.get(reverse("ai_job_detail", args=[job.pk]))
+        self.assertContains(response, "Generation failed")
+        self.assertContains(response, reverse("ai_lesson_planner"))
+
+    @mock.patch("core.ai.gemini.explain_concept", return_value="Explanation")
+    def test_jobs_of_dead_workers_are_reclaimed(self, generate):
+        started = timezone.now() - timedelta(hours=1)
+        lost = submit_job(self.instructor, "explanation", concept="Osmosis")
+        exhausted = submit_job(self.instructor, "explanation", concept="Diffusion")
+        AIJob.objects.filter(pk=lost.pk).update(
+            status="running", started_at=started, attempts=1
+        )
+        AIJob.objects.filter(pk=exhausted.pk).update(
+            status="running", started_at=started, attempts=MAX_JOB_ATTEMPTS
+        )
+        # A job another worker just started is left alone
+        busy = submit_job(self.instructor, "explanation", concept="Entropy")
+        AIJob.objects.filter(pk=busy.pk).update(
+            status="running", started_at=timezone.now(), attempts=1
+        )
+
+        self.assertEqual(run_pending_jobs(), 1)
+        lost.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(
+            (lost.status, lost.result, lost.attempts), ("done", "Explanation", 2)
+        )
+        self.assertEqual(exhausted.status, "failed")
+        self.assertEqual(AIJob.objects.get(pk=busy.pk).status, "running")
+
+    def test_jobs_are_claimed_as_they_start(self):
+        jobs = [
+            submit_job(self.instructor, "explanation", concept=concept)
+            for concept in ("Osmosis", "Diffusion")
+        ]
+        statuses = []
+
+        def explain(concept, grade_level):
+            statuses.append(
+                list(
+                    AIJob.objects.order_by("created_at").values_list(
+                        "status", flat=True
+                    )
+                )
+            )
+            return concept
+
+        with mock.patch("core.ai.gemini.explain_concept", side_effect=explain):
+            self.assertEqual(run_pending_jobs(), 2)
+        # The second job stays queued, with no claim to go stale, while the
+        # first one runs
+        self.assertEqual(statuses, [["running", "queued"], ["done", "running"]])
+        self.assertEqual(
+            [job.result for job in AIJob.objects.order_by("created_at")],
+            ["Osmosis", "Diffusion"],
+        )
+        self.assertEqual(run_pending_jobs(job_ids=[jobs[0].pk]), 0)
+
+    def test_running_jobs_keep_their_claim_fresh(self):
+        job = submit_job(self.instructor, "explanation", concept="Osmosis")
+        (claimed,) = claim_jobs()
+        old = timezone.now() - timedelta(hours=1)
+        AIJob.objects.filter(pk=job.pk).update(started_at=old)
+        keep_alive(claimed, progress=[{"topic": "Osmosis", "status": "running"}])
+
+        self.assertEqual(claim_jobs(), [])
+        job.refresh_from_db()
+        self.assertGreater(job.started_at, old)
+        self.assertEqual(job.progress[0]["status"], "running")
+
+    @override_settings(AI_JOB_MODE="eager")
+    @mock.patch("core.ai.gemini.generate_course_syllabus", return_value="Syllabus")
+    def test_eager_mode(self, generate):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("ai_syllabus_generator"),
+                {"course_title": "Bio", "duration": "16 weeks", "topics": "Cells"},
+            )
+        job = AIJob.objects.get()
+        self.assertEqual((job.status, job.result), ("done", "Syllabus"))
+
+    def test_submit_rejects_unknown_arguments(self):
+        with self.assertRaises(ValueError):
+            submit_job(self.instructor, "essay", topic="Cells")
+        with self.assertRaises(ValueError):
+            submit_job(self.instructor, "explanation", subject="Cells")
+
+    @mock.patch("core.ai.gemini.generate_assignment_rubric", return_value="Rubric")
+    def test_command(self, generate):
+        submit_job(
+            self.instructor,
+            "rubric",
+            assignment_description="Essay",
+            grading_criteria="Clarity",
+        )
+        out = StringIO()
+        call_command("run_ai_jobs", stdout=out)
+        self.assertIn("Ran 1 AI jobs", out.getvalue())
+
+
+class StreamingJobTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(set_client, None)
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.client.force_login(self.instructor)
+
+    def stream(self, chunks, check_first=None):
+        """Serve the next Gemini call offline by streaming ``chunks``."""
+
+        def chunk_stream():
+            for index, chunk in enumerate(chunks):
+                yield chunk
+                if index == 0 and check_first:
+                    check_first()
+
+        transport = FakeTransport([chunk_stream()])
+        set_client(GeminiClient(transport, max_retries=0))
+        return transport
+
+    def fail_with(self, error):
+        """Fail the next Gemini call offline with ``error``."""
+        set_client(GeminiClient(FakeTransport([error]), max_retries=0))
+
+    def text_since(self, job, offset):
+        response = self.client.get(
+            reverse("ai_job_status", args=[job.pk]), {"offset": offset}
+        )
+        return response.json()
+
+    def test_chunks_reach_the_job_while_generating(self):
+        job = submit_job(
+            self.instructor,
+            "lesson_plan",
+            topic="Cells",
+            duration="60 minutes",
+            difficulty_level="Beginner",
+        )
+        seen = []
+
+        def check_first():
+            seen.append(AIJob.objects.get(pk=job.pk).streamed_text)
+
+        self.stream(["# Lesson", " plan\n", "body"], check_first)
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(seen, ["# Lesson"])
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.streamed_text, "# Lesson plan\nbody")
+        self.assertEqual(job.result["content"], "# Lesson plan\nbody")
+
+        # The final text is cached for the next identical request
+        again = submit_job(self.instructor, "lesson_plan", **job.arguments)
+        transport = self.stream([])
+        run_pending_jobs()
+        self.assertEqual(transport.calls, [])
+        again.refresh_from_db()
+        self.assertEqual(again.result, job.result)
+
+    def test_status_polls_return_new_text(self):
+        job = submit_job(self.instructor, "syllabus", course_title="Biology")
+        AIJob.objects.filter(pk=job.pk).update(status="running", streamed_text="Wee")
+        status = self.text_since(job, 0)
+        self.assertEqual((status["text"], status["offset"]), ("Wee", 3))
+        self.assertFalse(status["done"])
+
+        AIJob.objects.filter(pk=job.pk).update(streamed_text="Week 1\nWeek 2")
+        # A poll only gets what the page does not show yet
+        status = self.text_since(job, 3)
+        self.assertEqual((status["text"], status["offset"]), ("k 1\nWeek 2", 13))
+        self.assertEqual(self.text_since(job, 13)["text"], "")
+        self.assertEqual(self.text_since(job, "junk")["offset"], 13)
+        response = self.client.get(reverse("ai_job_status", args=[job.pk]))
+        self.assertNotIn("text", response.json())
+
+        other = User.objects.create_user(username="other", role="instructor")
+        self.client.force_login(other)
+        response = self.client.get(reverse("ai_job_status", args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_quota_errors_fall_back_for_every_kind(self):
+        for kind, arguments in [
+            ("lesson_plan", {"topic": "Cells", "duration": "1 hour"}),
+            ("rubric", {"assignment_description": "Essay"}),
+            ("explanation", {"concept": "Osmosis"}),
+            ("syllabus", {"course_title": "Biology", "topics_list": "Cells"}),
+        ]:
+            with self.subTest(kind):
+                job = submit_job(self.instructor, kind, **arguments)
+                self.fail_with(exceptions.ResourceExhausted("Resource exhausted"))
+                run_pending_jobs()
+                job.refresh_from_db()
+                self.assertEqual(job.status, "done")
+                self.assertIn("API quota exceeded", job.warning)
+                self.assertIn("template", str(job.result))
+                self.assertNotIn("Resource exhausted", str(job.result))
+
+    def test_error_text_fails_the_job(self):
+        job = submit_job(self.instructor, "rubric", assignment_description="Essay")
+        self.fail_with(exceptions.BadRequest("Prompt too long"))
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("Prompt too long", job.error)
+        self.assertIsNone(job.result)
+
+    def test_reclaimed_job_restarts_its_text(self):
+        job = submit_job(self.instructor, "syllabus", course_title="Biology")
+        AIJob.objects.filter(pk=job.pk).update(
+            status="running",
+            streamed_text="stale",
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        (claimed,) = claim_jobs()
+        self.assertEqual(claimed.streamed_text, "")
+        self.stream(["fresh"])
+        run_job(claimed)
+        self.assertEqual(AIJob.objects.get(pk=job.pk).streamed_text, "fresh")
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, tag
+
+from core import ai
+
+# Modules the AI facade keeps out of a worker until content is generated
+AI_MODULES = ("core.ai.gemini", "core.ai.client", "google.generativeai")
+
+# Boots Django, loads the URL conf and with it every view, and prints the
+# seconds taken, the peak RSS in kilobytes and the AI modules loaded.
+# ``{preload}`` runs first, to measure a boot that imports the AI stack.
+# The peak is read from /proc where it exists: Linux carries ru_maxrss over
+# from the forking test process, which would hide the child's own peak.
+BOOT_SCRIPT = """
+import resource, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+{preload}
+import core.urls
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open("/proc/self/status") as status:
+        rss = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    pass
+print(elapsed, rss, *[name for name in {modules!r} if name in sys.modules])
+"""
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "lms_backend.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def boot(preload=""):
+    """``(seconds, peak RSS in KB, AI modules loaded)`` of a fresh boot."""
+    script = BOOT_SCRIPT.format(preload=preload, modules=AI_MODULES)
+    elapsed, rss, *loaded = run_python("-c", script).stdout.split()
+    return float(elapsed), int(rss), loaded
+
+
+class AIFacadeTest(SimpleTestCase):
+    def test_names_resolve_to_the_gemini_module(self):
+        from core.ai import gemini
+
+        self.assertIs(ai.generate_exam_content, gemini.generate_exam_content)
+        self.assertEqual(ai.GEMINI_RATE_BUCKET, gemini.GEMINI_RATE_BUCKET)
+        with mock.patch("core.ai.gemini.explain_concept", return_value="Patched"):
+            self.assertEqual(ai.explain_concept("Gravity"), "Patched")
+        self.assertFalse(hasattr(ai, "parse_quiz_response"))
+        self.assertIn("generate_lesson_plan", dir(ai))
+
+    def test_management_commands_do_not_load_the_ai_stack(self):
+        result = run_python("-X", "importtime", "manage.py", "check")
+        imported = {
+            line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+        }
+        self.assertIn("core.views", imported)
+        self.assertIn("core.ai", imported)
+        self.assertEqual(imported.intersection(AI_MODULES), set())
+
+
+@tag("benchmark")
+class BootBenchmarkTest(SimpleTestCase):
+    RUNS = 3
+
+    def test_boot_time_and_memory(self):
+        # ``python -X importtime manage.py check`` breaks a boot down by module
+        lazy = [boot() for _ in range(self.RUNS)]
+        eager = [
+            boot("import core.ai.gemini, google.generativeai") for _ in range(self.RUNS)
+        ]
+        (lazy_time, lazy_rss), (eager_time, eager_rss) = [
+            (min(run[0] for run in runs), min(run[1] for run in runs))
+            for runs in (lazy, eager)
+        ]
+
+        print(
+            f"\nWorker boot, best of {self.RUNS}: {lazy_time * 1000:.0f}ms and "
+            f"{lazy_rss / 1024:.1f} MB RSS with the AI stack loaded lazily, "
+            f"{eager_time * 1000:.0f}ms and {eager_rss / 1024:.1f} MB loading it "
+            "at import"
+        )
+        self.assertEqual({tuple(run[2]) for run in lazy}, {()})
+        self.assertEqual(set(eager[0][2]), set(AI_MODULES))
+        self.assertLess(lazy_time, eager_time)
+        self.assertLess(lazy_rss, eager_rss)
@@ -0,0 +1,94 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+BEFORE = [("core", "0011_short_answer_grading")]
+AFTER = [("core", "0012_submission_answers")]
+
+
+class AnswerRowsMigrationTest(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.addCleanup(
+            self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes()
+        )
+        apps = self.migrate(BEFORE)
+        User = apps.get_model("core", "User")
+        Course = apps.get_model("core", "Course")
+        Exam = apps.get_model("core", "Exam")
+        Question = apps.get_model("core", "Question")
+        Choice = apps.get_model("core", "Choice")
+        self.ExamSubmission = apps.get_model("core", "ExamSubmission")
+
+        instructor = User.objects.create(username="instructor", role="instructor")
+        self.student = User.objects.create(username="student", role="student")
+        course = Course.objects.create(
+            title="Course", description="", instructor=instructor
+        )
+        self.exam = Exam.objects.create(
+            course=course, title="Quiz", created_by=instructor
+        )
+        self.mc = Question.objects.create(exam=self.exam, text="Pick B", points=2)
+        self.wrong = Choice.objects.create(question=self.mc, text="A")
+        self.right = Choice.objects.create(question=self.mc, text="B", is_correct=True)
+        self.tf = Question.objects.create(
+            exam=self.exam, text="True?", question_type="true_false", points=3
+        )
+        Choice.objects.create(question=self.tf, text="True", is_correct=True)
+
+    def submit(self, answers):
+        return self.ExamSubmission.objects.create(
+            exam=self.exam, student=self.student, answers=answers
+        )
+
+    def test_legacy_marked_answers_get_points(self):
+        # Answers as stored before points_awarded existed
+        right = self.submit(
+            {
+                str(self.mc.pk): {
+                    "answer": str(self.right.pk),
+                    "choice_text": "B",
+                    "is_correct": True,
+                },
+                str(self.tf.pk): {"answer": "true"},
+            }
+        )
+        wrong = self.submit(
+            {
+                str(self.mc.pk): {
+                    "answer": str(self.wrong.pk),
+                    "choice_text": "A",
+                    "is_correct": False,
+                }
+            }
+        )
+        marked = self.submit(
+            {
+                str(self.mc.pk): {
+                    "answer": str(self.right.pk),
+                    "is_correct": True,
+                    "points_awarded": 1.5,
+                }
+            }
+        )
+
+        apps = self.migrate(AFTER)
+        SubmissionAnswer = apps.get_model("core", "SubmissionAnswer")
+        rows = {
+            (row.submission_id, row.question_id): row
+            for row in SubmissionAnswer.objects.all()
+        }
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[right.pk, self.mc.pk].points_awarded, 2)
+        self.assertEqual(rows[right.pk, self.mc.pk].choice_id, self.right.pk)
+        self.assertEqual(rows[wrong.pk, self.mc.pk].points_awarded, 0)
+        self.assertIs(rows[wrong.pk, self.mc.pk].is_correct, False)
+        self.assertEqual(rows[marked.pk, self.mc.pk].points_awarded, 1.5)
+        # Answers that were never marked stay unmarked
+        self.assertIsNone(rows[right.pk, self.tf.pk].is_correct)
+        self.assertIsNone(rows[right.pk, self.tf.pk].points_awarded)
@@ -0,0 +1,142 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.counters import (
+    estimated_count,
+    platform_totals,
+    reconcile_counters,
+    reconcile_enrollment_counts,
+)
+from core.models import Course, CourseCategory, Enrollment, PlatformCounter, User
+
+
+class PlatformCounterTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="testpass123", role="admin"
+        )
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="Course", instructor=self.instructor
+        )
+        self.students = [
+            User.objects.create_user(username=f"student{i}", role="student")
+            for i in range(3)
+        ]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+
+    def test_counters_seeded_on_first_read(self):
+        self.assertFalse(PlatformCounter.objects.exists())
+        totals = {"total_users": 5, "total_courses": 1, "total_enrollments": 3}
+        self.assertEqual(platform_totals(), totals)
+        with self.assertNumQueries(1):
+            self.assertEqual(platform_totals(), totals)
+
+    def test_signals_keep_counters_current(self):
+        platform_totals()
+        student = User.objects.create_user(username="late", role="student")
+        Enrollment.objects.create(student=student, course=self.course)
+        self.students[0].delete()
+        self.assertEqual(
+            platform_totals(),
+            {"total_users": 5, "total_courses": 1, "total_enrollments": 3},
+        )
+        self.course.delete()
+        self.assertEqual(platform_totals()["total_enrollments"], 0)
+        self.assertEqual(platform_totals()["total_courses"], 0)
+
+    def test_reconcile_repairs_drift(self):
+        platform_totals()
+        Enrollment.objects.bulk_create(
+            [Enrollment(student=self.admin, course=self.course)]
+        )
+        self.assertEqual(platform_totals()["total_enrollments"], 3)
+
+        out = StringIO()
+        call_command("reconcile_counters", "enrollments", stdout=out)
+        self.assertIn("enrollments: 3 -> 4", out.getvalue())
+        self.assertEqual(platform_totals()["total_enrollments"], 4)
+        self.assertEqual(reconcile_counters()["enrollments"], (4, 4))
+
+    @override_settings(PLATFORM_COUNTS_MODE="estimate")
+    def test_estimate_mode_falls_back_without_planner_stats(self):
+        self.assertIsNone(estimated_count(Enrollment))
+        self.assertEqual(platform_totals()["total_enrollments"], 3)
+
+    def test_admin_analytics_uses_counters(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("analytics_dashboard"))
+        self.assertEqual(response.context["total_users"], 5)
+        self.assertEqual(response.context["total_enrollments"], 3)
+
+
+class CourseEnrollmentCountTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.category = CourseCategory.objects.create(name="Science")
+        self.course = Course.objects.create(
+            title="Course",
+            description="Course",
+            instructor=self.instructor,
+            category=self.category,
+            max_students=2,
+        )
+        self.students = [
+            User.objects.create_user(username=f"student{i}", role="student")
+            for i in range(3)
+        ]
+
+    def test_enroll_and_unenroll_update_stored_count(self):
+        first = Enrollment.objects.create(student=self.students[0], course=self.course)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        self.assertEqual(self.course.enrollment_count, 2)
+        self.assertTrue(self.course.is_full)
+
+        first.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+        self.assertFalse(self.course.is_full)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.course.enrolled_count, 1)
+
+    def test_reconcile_fixes_bulk_writes(self):
+        Enrollment.objects.bulk_create(
+            [Enrollment(student=s, course=self.course) for s in self.students]
+        )
+        other = Course.objects.create(
+            title="Other", description="", instructor=self.instructor
+        )
+        out = StringIO()
+        call_command("reconcile_enrollment_counts", stdout=out)
+        self.assertIn(f"Course {self.course.pk}: 0 -> 3", out.getvalue())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 3)
+        self.assertEqual(reconcile_enrollment_counts([self.course.pk, other.pk]), {})
+
+    def test_catalog_does_not_count_per_course(self):
+        for i in range(5):
+            Course.objects.create(
+                title=f"Extra {i}",
+                description="",
+                instructor=self.instructor,
+                category=self.category,
+            )
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        self.client.force_login(self.students[0])
+        url = reverse("category_courses", args=[self.category.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "1/2")
+        self.assertFalse(
+            [q for q in queries.captured_queries if "core_enrollment" in q["sql"]]
+        )
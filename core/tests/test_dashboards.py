@@ -0,0 +1,161 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.dashboards import (
+    instructor_dashboard_stats,
+    instructor_stats_key,
+    student_completion,
+    student_completion_key,
+)
+from core.models import (
+    Assignment,
+    AssignmentSubmission,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    User,
+)
+
+
+class InstructorDashboardStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.student = User.objects.create_user(username="student", role="student")
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {i}", description="Course", instructor=self.instructor
+            )
+            for i in range(8)
+        ]
+        Enrollment.objects.create(student=self.student, course=self.courses[0])
+        Enrollment.objects.create(student=self.student, course=self.courses[1])
+        self.exam = Exam.objects.create(
+            course=self.courses[0], title="Quiz", created_by=self.instructor
+        )
+        ExamSubmission.objects.create(exam=self.exam, student=self.student, answers={})
+        ExamSubmission.objects.create(
+            exam=self.exam,
+            student=self.student,
+            answers={},
+            graded_at=timezone.now(),
+        )
+        cache.clear()
+
+    def test_counts_in_two_queries(self):
+        with self.assertNumQueries(2):
+            stats = instructor_dashboard_stats(self.instructor)
+        self.assertEqual(stats["my_courses_count"], 8)
+        self.assertEqual(stats["total_students"], 2)
+        self.assertEqual(stats["pending_reviews"], 1)
+        self.assertEqual(len(stats["my_courses"]), 6)
+        self.assertEqual(stats["my_courses"][0].enrollment_count, 1)
+
+    def test_cached_until_enrollment_changes(self):
+        instructor_dashboard_stats(self.instructor)
+        with self.assertNumQueries(0):
+            instructor_dashboard_stats(self.instructor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.courses[2])
+        self.assertEqual(
+            instructor_dashboard_stats(self.instructor)["total_students"], 3
+        )
+
+    def test_cache_dropped_when_the_change_commits(self):
+        stats = instructor_dashboard_stats(self.instructor)
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, course=self.courses[2])
+            # A read in another worker before the commit caches the old stats
+            cache.set(instructor_stats_key(self.instructor.pk), stats)
+        self.assertEqual(
+            instructor_dashboard_stats(self.instructor)["total_students"], 3
+        )
+
+    def test_submission_invalidates_pending_reviews(self):
+        instructor_dashboard_stats(self.instructor)
+        with self.captureOnCommitCallbacks(execute=True):
+            ExamSubmission.objects.create(
+                exam=self.exam, student=self.student, answers={}
+            )
+        self.assertEqual(
+            instructor_dashboard_stats(self.instructor)["pending_reviews"], 2
+        )
+
+    def test_dashboard_renders_student_counts(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("instructor_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "1 students enrolled", count=2)
+        self.assertContains(response, "View all 8 courses")
+
+
+class StudentCompletionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.student = User.objects.create_user(
+            username="student", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="Course", instructor=self.instructor
+        )
+        self.empty_course = Course.objects.create(
+            title="Empty", description="Course", instructor=self.instructor
+        )
+        Enrollment.objects.create(student=self.student, course=self.course)
+        Enrollment.objects.create(student=self.student, course=self.empty_course)
+        due = timezone.now()
+        self.assignments = [
+            Assignment.objects.create(
+                course=self.course, title=f"A{i}", description="", due_date=due
+            )
+            for i in range(4)
+        ]
+        self.exam = Exam.objects.create(
+            course=self.course, title="Quiz", created_by=self.instructor
+        )
+        AssignmentSubmission.objects.create(
+            assignment=self.assignments[0], student=self.student, content=""
+        )
+        ExamSubmission.objects.create(exam=self.exam, student=self.student, answers={})
+        ExamSubmission.objects.create(exam=self.exam, student=self.student, answers={})
+        cache.clear()
+
+    def test_completion_in_two_queries(self):
+        with self.assertNumQueries(2):
+            completion = student_completion(self.student)
+        self.assertEqual(
+            completion, {"course_completion": 40, "assignment_completion": 25}
+        )
+
+    def test_submission_invalidates_cache(self):
+        student_completion(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            AssignmentSubmission.objects.create(
+                assignment=self.assignments[1], student=self.student, content=""
+            )
+        self.assertEqual(student_completion(self.student)["assignment_completion"], 50)
+
+    def test_new_assignment_invalidates_enrolled_students(self):
+        completion = student_completion(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            Assignment.objects.create(
+                course=self.course, title="A4", description="", due_date=timezone.now()
+            )
+            # A read in another worker before the commit caches the old values
+            cache.set(student_completion_key(self.student.pk), completion)
+        self.assertEqual(student_completion(self.student)["assignment_completion"], 20)
+
+    def test_dashboard_shows_real_completion(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.context["course_completion"], 40)
+        self.assertEqual(response.context["assignment_completion"], 25)
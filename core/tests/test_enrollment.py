@@ -0,0 +1,134 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.messages import get_messages
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase, tag
+from django.urls import reverse
+
+from core.enrollment import ALREADY_ENROLLED, ENROLLED, FULL, enroll_student
+from core.models import Course, Enrollment, User
+
+logger = logging.getLogger(__name__)
+
+
+class EnrollStudentTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course",
+            description="Course",
+            instructor=self.instructor,
+            max_students=2,
+        )
+        self.students = [
+            User.objects.create_user(
+                username=f"student{i}", password="testpass123", role="student"
+            )
+            for i in range(3)
+        ]
+
+    def test_enrolls_until_full(self):
+        results = [enroll_student(student, self.course) for student in self.students]
+        self.assertEqual([r.status for r in results], [ENROLLED, ENROLLED, FULL])
+        self.assertEqual(results[0].enrollment.student, self.students[0])
+        self.assertIsNone(results[2].enrollment)
+        self.assertEqual(self.course.enrollment_count, 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 2)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 2)
+
+    def test_already_enrolled_releases_seat(self):
+        enroll_student(self.students[0], self.course)
+        result = enroll_student(self.students[0], self.course)
+        self.assertEqual(result.status, ALREADY_ENROLLED)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+        enroll_student(self.students[1], self.course)
+        self.assertEqual(
+            enroll_student(self.students[1], self.course).status, ALREADY_ENROLLED
+        )
+
+    def test_unique_constraint(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        with self.assertRaises(IntegrityError):
+            Enrollment.objects.create(student=self.students[0], course=self.course)
+
+    def test_view_reports_full_course(self):
+        for student in self.students[:2]:
+            enroll_student(student, self.course)
+        self.client.force_login(self.students[2])
+        response = self.client.post(reverse("enroll_course", args=[self.course.pk]))
+        self.assertRedirects(response, reverse("course_detail", args=[self.course.pk]))
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            ["Sorry, Course is full."],
+        )
+        self.assertFalse(Enrollment.objects.filter(student=self.students[2]).exists())
+
+
+@tag("benchmark")
+class EnrollmentStressTest(TransactionTestCase):
+    """
+    Registration rush: hundreds of parallel attempts against one course.
+
+    The threads need a database they share, which SQLite test databases only
+    are when kept in a file:
+
+        DATABASE_TEST_NAME=/tmp/lms_test.sqlite3 python manage.py test \\
+            core.tests.test_enrollment --tag benchmark
+
+    PostgreSQL and MySQL test databases are always shared.
+    """
+
+    ATTEMPTS = 300
+    SEATS = 100
+    WORKERS = 16
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a test database shared between threads")
+        instructor = User.objects.create_user(username="instructor", role="instructor")
+        self.course = Course.objects.create(
+            title="Popular",
+            description="Course",
+            instructor=instructor,
+            max_students=self.SEATS,
+        )
+        self.students = User.objects.bulk_create(
+            [User(username=f"student{i}", role="student") for i in range(self.ATTEMPTS)]
+        )
+
+    def attempt(self, student):
+        try:
+            # Every student tries twice, as impatient users double-click
+            first = enroll_student(student, Course.objects.get(pk=self.course.pk))
+            enroll_student(student, Course.objects.get(pk=self.course.pk))
+            return first.status
+        finally:
+            connections.close_all()
+
+    def test_parallel_enrollments_respect_capacity(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            statuses = list(pool.map(self.attempt, self.students))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(statuses.count(ENROLLED), self.SEATS)
+        self.assertEqual(statuses.count(FULL), self.ATTEMPTS - self.SEATS)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, self.SEATS)
+        self.assertEqual(
+            Enrollment.objects.filter(course=self.course).count(), self.SEATS
+        )
+        # 600 attempts should clear well within a request timeout
+        self.assertLess(elapsed, 30)
+        logger.info(
+            f"{2 * self.ATTEMPTS} enrollment attempts on {connection.vendor} "
+            f"with {self.WORKERS} workers: {elapsed:.2f}s "
+            f"({2 * self.ATTEMPTS / elapsed:.0f}/s)"
+        )
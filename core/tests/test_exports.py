@@ -0,0 +1,148 @@
+import csv
+import io
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.exports import gradebook_table, iter_csv, safe_cell
+from core.gradebook import build_gradebook
+from core.models import (
+    Assignment,
+    AssignmentSubmission,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    User,
+)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class GradebookExportTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Course", instructor=self.instructor
+        )
+        self.assignment = Assignment.objects.create(
+            course=self.course,
+            title="Essay",
+            description="",
+            due_date=timezone.now() + timedelta(days=7),
+        )
+        self.exam = Exam.objects.create(
+            course=self.course, title="Midterm", created_by=self.instructor
+        )
+        # Enroll in reverse id order so the export's student ordering differs
+        # from the enrollment ordering used by the gradebook page.
+        self.students = [
+            User.objects.create_user(
+                username=f"student{i}", email=f"s{i}@example.com", role="student"
+            )
+            for i in range(5)
+        ]
+        for index, student in enumerate(reversed(self.students)):
+            Enrollment.objects.create(student=student, course=self.course)
+            if index % 2 == 0:
+                AssignmentSubmission.objects.create(
+                    assignment=self.assignment, student=student, content="", grade=60
+                )
+            ExamSubmission.objects.create(
+                exam=self.exam, student=student, answers={}, grade=index * 10
+            )
+            ExamSubmission.objects.create(
+                exam=self.exam, student=student, answers={}, grade=99
+            )
+
+    def read_csv(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_export_matches_gradebook(self):
+        header, rows = gradebook_table(self.course, chunk_size=2)
+        exported = {row[0]: row[4:6] for row in rows}
+        gradebook = build_gradebook(self.course)
+        expected = {
+            student.username: grades
+            for student, grades in zip(gradebook.students, gradebook.matrix)
+        }
+        self.assertEqual(
+            header[4:], ["Essay (assignment)", "Midterm (exam)", "Overall"]
+        )
+        self.assertEqual(exported, expected)
+
+    def test_csv_streams_in_chunks(self):
+        chunks = list(iter_csv(["a"], ([i] for i in range(1200))))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[1].count("\n"), 500)
+
+    def test_gradebook_csv_view(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("gradebook_export", args=[self.course.id]))
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = self.read_csv(response)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][:4], ["student0", "", "", "s0@example.com"])
+        self.assertEqual(rows[1][4:], ["60.0", "40.0", "50.0"])
+
+    def test_roster_csv_view(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("roster_export", args=[self.course.id]))
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][0], "Username")
+        self.assertEqual(
+            sorted(row[0] for row in rows[1:]), [s.username for s in self.students]
+        )
+
+    def test_other_instructor_cannot_export(self):
+        other = User.objects.create_user(username="other", role="instructor")
+        self.client.force_login(other)
+        response = self.client.get(reverse("gradebook_export", args=[self.course.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_formulas_are_escaped(self):
+        self.students[0].first_name = '=HYPERLINK("http://evil")'
+        self.students[0].last_name = "-1+2"
+        self.students[0].save()
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("roster_export", args=[self.course.id]))
+        row = next(row for row in self.read_csv(response) if row[0] == "student0")
+        self.assertEqual(row[1:3], ['\'=HYPERLINK("http://evil")', "'-1+2"])
+        self.assertEqual(safe_cell(-1.5), -1.5)
+        self.assertEqual(safe_cell("@SUM(A1)"), "'@SUM(A1)")
+
+    @mock.patch("core.views.write_xlsx", side_effect=ImportError("openpyxl"))
+    def test_xlsx_falls_back_to_csv_without_openpyxl(self, write_xlsx):
+        admin = User.objects.create_user(username="admin", role="admin")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("gradebook_export", args=[self.course.id]), {"format": "xlsx"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(len(self.read_csv(response)), 6)
+
+    @unittest.skipUnless(openpyxl, "openpyxl is not installed")
+    def test_gradebook_xlsx_view(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(
+            reverse("gradebook_export", args=[self.course.id]), {"format": "xlsx"}
+        )
+        workbook = openpyxl.load_workbook(
+            io.BytesIO(b"".join(response.streaming_content))
+        )
+        rows = list(workbook.active.values)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][0], "student0")
@@ -0,0 +1,125 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import SimpleTestCase, tag
+
+from core.ai import gemini
+from core.ai.fallback_bank import FallbackBank, default_bank
+from core.ai.quiz_parser import parse_quiz_text
+
+
+def bank_record(subject, topic, text, question_type="true_false", keywords=()):
+    return {
+        "subject": subject,
+        "topic": topic,
+        "keywords": list(keywords),
+        "question": {
+            "type": question_type,
+            "text": text,
+            "correct_answer": True,
+            "explanation": "",
+        },
+    }
+
+
+class FallbackBankTest(SimpleTestCase):
+    def write_bank(self, records):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "bank.jsonl"
+        path.write_text(
+            "\n".join(json.dumps(record) for record in records) + "\n",
+            encoding="utf-8",
+        )
+        return FallbackBank(path)
+
+    def test_questions_match_the_topic(self):
+        for topic, question_type, expected in [
+            ("Cell biology", "multiple_choice", "powerhouse of the cell"),
+            ("The French Revolution", "multiple_choice", "Bastille"),
+            ("Planets", "true_false", "planet"),
+            # Misspelt topics still match through shared trigrams
+            ("photosynthsis", "short_answer", "photosynthesis"),
+            ("mitocondria", "multiple_choice", "powerhouse of the cell"),
+        ]:
+            with self.subTest(topic):
+                questions = default_bank.search(topic, question_type, 3)
+                self.assertIn(expected, questions[0]["text"])
+                self.assertEqual({q["type"] for q in questions}, {question_type})
+
+    def test_unmatched_topics_are_filled_from_the_type(self):
+        bank = self.write_bank(
+            [bank_record("biology", "cells", f"Cell fact {n}.") for n in range(5)]
+            + [bank_record("history", "rome", "Rome fell in 476.")]
+            + [bank_record("biology", "cells", "Cells?", "short_answer")]
+        )
+        questions = bank.search("Roman history", "true_false", 4)
+        self.assertEqual(len(questions), 4)
+        self.assertEqual(questions[0]["text"], "Rome fell in 476.")
+        self.assertEqual(len({q["text"] for q in questions}), 4)
+        self.assertEqual(bank.search("Roman history", "true_false", 4), questions)
+
+        self.assertEqual(len(bank.search("Knitting", "true_false", 10)), 6)
+        self.assertEqual(len(bank.search("Knitting", "short_answer", 10)), 1)
+        self.assertEqual(bank.search("Knitting", "essay", 10), [])
+
+    def test_index_is_built_lazily_and_keeps_offsets(self):
+        bank = self.write_bank(
+            [bank_record("astronomy", "planets", "Mars is red.")] * 2
+            + [bank_record("history", "rome", "Rome fell in 476.")]
+        )
+        self.assertIsNone(bank._index)
+        bank.search("Rome", "true_false", 1)
+        index = bank._index
+
+        # Questions are read back from the file, not kept in the index
+        self.assertNotIn("Rome fell in 476.", repr(index))
+        self.assertEqual(len(index.offsets), 3)
+        self.assertEqual(bank.read([2, 0])[0]["text"], "Rome fell in 476.")
+        bank.search("Mars", "true_false", 1)
+        self.assertIs(bank._index, index)
+
+    def test_fallback_quiz_data(self):
+        quiz = gemini.get_fallback_quiz_data("Photosynthesis", 3, "multiple_choice")
+        self.assertTrue(quiz["is_demo"])
+        self.assertEqual(quiz["num_questions"], 3)
+        self.assertEqual([q["order"] for q in quiz["parsed_questions"]], [1, 2, 3])
+        self.assertEqual(
+            parse_quiz_text(quiz["questions"], "multiple_choice"),
+            quiz["parsed_questions"],
+        )
+
+
+@tag("benchmark")
+class FallbackBankBenchmarkTest(SimpleTestCase):
+    SEARCHES = 2000
+    TOPICS = [
+        "Cell biology",
+        "The French Revolution",
+        "photosynthsis",
+        "Quadratic equations",
+        "Supply and demand",
+        "Shakespeare's tragedies",
+        "Plate tectonics",
+        "Cooking for beginners",
+    ]
+
+    def test_search(self):
+        bank = FallbackBank()
+        start = time.perf_counter()
+        index = bank.index()
+        build_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for number in range(self.SEARCHES):
+            bank.search(self.TOPICS[number % len(self.TOPICS)], "multiple_choice", 5)
+        per_search = (time.perf_counter() - start) / self.SEARCHES
+
+        print(
+            f"\nFallback bank, {len(index.offsets)} questions: index of "
+            f"{len(index.postings)} terms built in {build_elapsed * 1000:.1f}ms, "
+            f"{per_search * 1000:.3f}ms per search"
+        )
+        self.assertLess(per_search, 0.001)
@@ -0,0 +1,219 @@
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.gradebook import build_gradebook, get_gradebook
+from core.models import (
+    Assignment,
+    AssignmentSubmission,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    GradebookSnapshot,
+    User,
+)
+
+
+def create_course(num_students, num_assignments=3, num_exams=3):
+    """Create a fully graded course with the given dimensions."""
+    instructor = User.objects.create_user(
+        username=f"instructor_{num_students}", password="testpass123", role="instructor"
+    )
+    course = Course.objects.create(
+        title="Gradebook Course", description="Course", instructor=instructor
+    )
+    students = User.objects.bulk_create(
+        [
+            User(username=f"student_{num_students}_{i}", role="student")
+            for i in range(num_students)
+        ]
+    )
+    Enrollment.objects.bulk_create(
+        [Enrollment(student=student, course=course) for student in students]
+    )
+    due = timezone.now() + timedelta(days=7)
+    assignments = Assignment.objects.bulk_create(
+        [
+            Assignment(course=course, title=f"A{i}", description="", due_date=due)
+            for i in range(num_assignments)
+        ]
+    )
+    exams = Exam.objects.bulk_create(
+        [
+            Exam(course=course, title=f"E{i}", created_by=instructor)
+            for i in range(num_exams)
+        ]
+    )
+    AssignmentSubmission.objects.bulk_create(
+        [
+            AssignmentSubmission(
+                assignment=assignment, student=student, content="", grade=80
+            )
+            for assignment in assignments
+            for student in students
+        ]
+    )
+    ExamSubmission.objects.bulk_create(
+        [
+            ExamSubmission(exam=exam, student=student, answers={}, grade=90)
+            for exam in exams
+            for student in students
+        ]
+    )
+    return course
+
+
+class GradebookTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.alice = User.objects.create_user(username="alice", role="student")
+        self.bob = User.objects.create_user(username="bob", role="student")
+        self.course = Course.objects.create(
+            title="Test Course", description="Course", instructor=self.instructor
+        )
+        Enrollment.objects.create(student=self.alice, course=self.course)
+        Enrollment.objects.create(student=self.bob, course=self.course)
+        self.assignment = Assignment.objects.create(
+            course=self.course,
+            title="Essay",
+            description="",
+            due_date=timezone.now() + timedelta(days=7),
+        )
+        self.exam = Exam.objects.create(
+            course=self.course, title="Midterm", created_by=self.instructor
+        )
+        AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=self.alice, content="", grade=70
+        )
+        ExamSubmission.objects.create(
+            exam=self.exam, student=self.alice, answers={}, grade=90
+        )
+        ExamSubmission.objects.create(
+            exam=self.exam, student=self.bob, answers={}, grade=0
+        )
+
+    def test_matrix_layout(self):
+        gradebook = build_gradebook(self.course)
+        self.assertEqual(gradebook.students, [self.alice, self.bob])
+        self.assertEqual(
+            [(column["kind"], column["id"]) for column in gradebook.columns],
+            [("assignment", self.assignment.id), ("exam", self.exam.id)],
+        )
+        self.assertEqual(gradebook.matrix, [[70, 90], [None, 0]])
+
+    def test_rows_split_grades_and_average(self):
+        rows = list(build_gradebook(self.course).rows())
+        self.assertEqual(rows[0]["assignment_grades"], [70])
+        self.assertEqual(rows[0]["exam_grades"], [90])
+        self.assertEqual(rows[0]["overall_grade"], 80)
+        self.assertEqual(rows[1]["overall_grade"], 0)
+
+    def test_ignores_other_courses(self):
+        other = Course.objects.create(
+            title="Other", description="Other", instructor=self.instructor
+        )
+        other_exam = Exam.objects.create(
+            course=other, title="Other exam", created_by=self.instructor
+        )
+        ExamSubmission.objects.create(
+            exam=other_exam, student=self.alice, answers={}, grade=10
+        )
+        self.assertEqual(build_gradebook(self.course).matrix, [[70, 90], [None, 0]])
+
+    def test_gradebook_view(self):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("gradebook", args=[self.course.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["gradebook_data"]), 2)
+
+
+class GradebookSnapshotTest(GradebookTest):
+    def setUp(self):
+        super().setUp()
+        get_gradebook(self.course)
+
+    def snapshot(self):
+        return GradebookSnapshot.objects.get(course=self.course)
+
+    def test_read_served_from_snapshot(self):
+        with self.assertNumQueries(2):
+            gradebook = get_gradebook(self.course)
+        self.assertEqual(gradebook.matrix, [[70, 90], [None, 0]])
+
+    def test_submission_patches_cell(self):
+        version = self.snapshot().version
+        AssignmentSubmission.objects.create(
+            assignment=self.assignment, student=self.bob, content="", grade=55
+        )
+        snapshot = self.snapshot()
+        self.assertEqual(snapshot.version, version + 1)
+        self.assertEqual(snapshot.data["matrix"], [[70, 90], [55, 0]])
+
+        ExamSubmission.objects.filter(student=self.alice).get().delete()
+        self.assertEqual(self.snapshot().data["matrix"], [[70, None], [55, 0]])
+
+    def test_enrollment_patches_row(self):
+        carol = User.objects.create_user(username="carol", role="student")
+        ExamSubmission.objects.create(
+            exam=self.exam, student=carol, answers={}, grade=40
+        )
+        Enrollment.objects.create(student=carol, course=self.course)
+        self.assertEqual(
+            get_gradebook(self.course).matrix, [[70, 90], [None, 0], [None, 40]]
+        )
+
+        Enrollment.objects.get(student=self.alice).delete()
+        gradebook = get_gradebook(self.course)
+        self.assertEqual(gradebook.students, [self.bob, carol])
+        self.assertEqual(gradebook.matrix, [[None, 0], [None, 40]])
+
+    def test_items_patch_columns(self):
+        quiz = Exam.objects.create(
+            course=self.course, title="Quiz", created_by=self.instructor
+        )
+        self.assertEqual(
+            [column["title"] for column in self.snapshot().data["columns"]],
+            ["Essay", "Midterm", "Quiz"],
+        )
+        self.assignment.title = "Final essay"
+        self.assignment.save()
+        self.exam.delete()
+        data = self.snapshot().data
+        self.assertEqual(
+            [column["title"] for column in data["columns"]], ["Final essay", "Quiz"]
+        )
+        self.assertEqual(data["matrix"], [[70, None], [None, None]])
+        self.assertEqual(data["matrix"], build_gradebook(self.course).matrix)
+        self.assertEqual(data["columns"][1]["id"], quiz.id)
+
+
+@tag("benchmark")
+class GradebookBenchmarkTest(TestCase):
+    """Query count and build time must stay flat as enrollment grows."""
+
+    def measure(self, num_students):
+        course = create_course(num_students)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            build_gradebook(course)
+            elapsed = time.perf_counter() - start
+        return len(queries), elapsed
+
+    def test_query_count_is_constant(self):
+        small_queries, small_time = self.measure(10)
+        large_queries, large_time = self.measure(300)
+        print(
+            f"\ngradebook: 10 students {small_queries} queries {small_time:.4f}s, "
+            f"300 students {large_queries} queries {large_time:.4f}s"
+        )
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 5)
+        self.assertLess(large_time, 2.0)
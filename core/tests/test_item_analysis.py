@@ -0,0 +1,172 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, tag
+from django.urls import reverse
+
+import numpy as np
+
+from core.grading import answer_rows, grade_answers, load_answer_key, save_answers
+from core.item_analysis import exam_item_analysis
+from core.models import Course, Enrollment, ExamSubmission, SubmissionAnswer, User
+from core.tests.test_quizzes import correct_responses, create_exam
+
+
+class ItemAnalysisTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+        # MC (2 points, "B" correct), true/false (1 point, "True"), short answer
+        self.exam = create_exam(self.course, self.instructor, 3)
+        self.mc, self.tf, self.short = self.exam.questions.all()
+        self.choice = {c.text: c.id for c in self.mc.choices.all()}
+        # Total scores 4, 2, 1 and 0 out of 4
+        self.responses = [
+            ("B", "true", 1),
+            ("B", "false", 0),
+            ("A", "true", 0),
+            ("C", "false", None),
+        ]
+        self.submissions = [
+            self.submit(f"student{i}", *response)
+            for i, response in enumerate(self.responses)
+        ]
+
+    def submit(self, username, mc, tf, short_points, **fields):
+        student = User.objects.create_user(username=username, role="student")
+        Enrollment.objects.create(student=student, course=self.course)
+        responses = {self.mc.id: str(self.choice[mc]), self.tf.id: tf}
+        if short_points is not None:
+            responses[self.short.id] = "Because"
+        result = grade_answers(load_answer_key(self.exam), responses)
+        if short_points is not None:
+            result.answers[str(self.short.id)].update(
+                points_awarded=short_points, is_correct=bool(short_points)
+            )
+        submission = ExamSubmission.objects.create(
+            exam=self.exam, student=student, **fields
+        )
+        save_answers(submission, result.answers)
+        return submission
+
+    def test_item_statistics(self):
+        report = exam_item_analysis(self.exam)
+        self.assertEqual(report["submissions"], 4)
+        mc, tf, short = report["questions"]
+        self.assertEqual((mc["difficulty"], tf["difficulty"]), (0.5, 0.5))
+        # The omitted short answer counts as zero
+        self.assertEqual(short["difficulty"], 0.25)
+        self.assertEqual((short["responses"], short["omitted"]), (3, 1))
+        # Upper and lower groups are one submission each: totals 4 and 0
+        self.assertEqual(
+            [q["discrimination"] for q in report["questions"]], [1.0, 1.0, 1.0]
+        )
+
+        totals = np.array([4, 2, 1, 0])
+        mc_share = np.array([1, 1, 0, 0])
+        expected = np.corrcoef(mc_share, totals - 2 * mc_share)[0, 1]
+        self.assertAlmostEqual(mc["point_biserial"], expected, places=3)
+
+        picked = {
+            d["text"]: (d["count"], d["upper"], d["lower"]) for d in mc["distractors"]
+        }
+        self.assertEqual(
+            picked, {"A": (1, 0, 0), "B": (2, 1, 0), "C": (1, 0, 1), "D": (0, 0, 0)}
+        )
+        self.assertEqual([d["count"] for d in tf["distractors"]], [2, 2])
+
+        distribution = report["distribution"]
+        self.assertEqual(distribution["mean"], 43.75)
+        self.assertEqual(distribution["percentiles"][50], 37.5)
+        self.assertEqual(sum(distribution["histogram"]), 4)
+
+    def test_new_submissions_appended_incrementally(self):
+        exam_item_analysis(self.exam)
+        self.submit("late", "B", "true", 1)
+        with self.assertNumQueries(2):
+            report = exam_item_analysis(self.exam)
+        self.assertEqual(report["submissions"], 5)
+
+        cache.clear()
+        self.assertEqual(exam_item_analysis(self.exam), report)
+
+    def test_changed_submission_rebuilds_report(self):
+        exam_item_analysis(self.exam)
+        submission = self.submissions[3]
+        submission.answer_rows.filter(question=self.tf).update(
+            points_awarded=1, is_correct=True
+        )
+        submission.save()
+        self.assertEqual(
+            exam_item_analysis(self.exam)["questions"][1]["difficulty"], 0.75
+        )
+
+    def test_submissions_below_the_last_seen_rebuild_report(self):
+        # As when ids commit out of order, or grading finishes after later
+        # submissions were read, with no signal sent
+        pending = self.submit("pending", "B", "true", 1, grading_status="pending")
+        self.submit("late", "B", "true", 1)
+        self.assertEqual(exam_item_analysis(self.exam)["submissions"], 5)
+        ExamSubmission.objects.filter(pk=pending.pk).update(grading_status="graded")
+        self.assertEqual(exam_item_analysis(self.exam)["submissions"], 6)
+
+    def test_pending_submissions_left_out(self):
+        self.submit("pending", "B", "true", None, grading_status="pending")
+        self.assertEqual(exam_item_analysis(self.exam)["submissions"], 4)
+
+    def test_report_page(self):
+        url = reverse("exam_item_analysis", args=[self.exam.pk])
+        self.client.force_login(self.instructor)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"]["submissions"], 4)
+        self.assertContains(response, "Point-biserial")
+
+        other = User.objects.create_user(username="other", role="instructor")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@tag("benchmark")
+class ItemAnalysisBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_report_for_five_thousand_submissions(self):
+        instructor = User.objects.create_user(username="instructor", role="instructor")
+        course = Course.objects.create(
+            title="Course", description="", instructor=instructor
+        )
+        exam = create_exam(course, instructor, 30)
+        answers = grade_answers(load_answer_key(exam), correct_responses(exam)).answers
+        students = User.objects.bulk_create(
+            [User(username=f"student{i}", role="student") for i in range(5000)]
+        )
+        submissions = ExamSubmission.objects.bulk_create(
+            [ExamSubmission(exam=exam, student=student) for student in students],
+            batch_size=1000,
+        )
+        SubmissionAnswer.objects.bulk_create(
+            [
+                row
+                for submission in submissions
+                for row in answer_rows(submission, answers)
+            ],
+            batch_size=5000,
+        )
+
+        start = time.perf_counter()
+        report = exam_item_analysis(exam)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        exam_item_analysis(exam)
+        warm = time.perf_counter() - start
+        print(f"\nItem analysis: 5000 submissions cold {cold:.2f}s, warm {warm:.3f}s")
+        self.assertEqual(report["submissions"], 5000)
+        self.assertLess(warm, cold)
+        self.assertLess(cold, 10)
@@ -0,0 +1,204 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.ai.client import FakeTransport, GeminiClient, set_client
+from core.ai.gemini import parse_quiz_batch_response
+from core.ai_jobs import run_pending_jobs, submit_job
+from core.models import AIJob, Course, Enrollment, Exam, User
+from core.quiz_batches import pack_topics
+from core.rate_limits import TokenResult
+
+QUESTION = """QUESTION: Which answer is right?
+A) This one
+B) That one
+C) Neither
+D) Both
+CORRECT: A
+EXPLANATION: Because.
+---
+"""
+
+
+def batch_reply(topics=8, questions=2):
+    """A response covering topics 1 to ``topics``, whatever a call asked for."""
+    return "\n".join(
+        f"TOPIC {number}: Topic {number}\n" + QUESTION * questions
+        for number in range(1, topics + 1)
+    )
+
+
+class BatchParsingTest(SimpleTestCase):
+    def test_topics_are_packed_by_expected_output(self):
+        topics = [f"Topic {number}" for number in range(20)]
+        self.assertEqual(
+            [len(call) for call in pack_topics(topics, 5, "multiple_choice")],
+            [8, 8, 4],
+        )
+        self.assertEqual(
+            [len(call) for call in pack_topics(topics[:5], 20, "multiple_choice")],
+            [2, 2, 1],
+        )
+        self.assertEqual(len(pack_topics(topics[:3], 100, "multiple_choice")), 3)
+
+    def test_sections_are_matched_by_topic_number(self):
+        text = (
+            "Here are your quizzes.\n**TOPIC 2: Plants**\n"
+            + QUESTION
+            + "TOPIC 1: Cells\n"
+            + QUESTION * 2
+            + "TOPIC 9: Not asked for\n"
+            + QUESTION
+        )
+        sections = parse_quiz_batch_response(text, 3, "multiple_choice")
+        self.assertEqual([len(parsed) for _, parsed in sections], [2, 1, 0])
+        self.assertEqual(sections[2], ("", []))
+        self.assertEqual(sections[1][1][0]["correct_answer"], "A")
+
+
+class QuizBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(set_client, None)
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Biology", description="", instructor=self.instructor
+        )
+        self.client.force_login(self.instructor)
+
+    def answer(self, *replies, **options):
+        transport = FakeTransport(replies, default=batch_reply())
+        set_client(GeminiClient(transport, max_retries=0, **options))
+        return transport
+
+    def submit(self, topics, num_questions=2):
+        return submit_job(
+            self.instructor,
+            "quiz_batch",
+            course_id=self.course.pk,
+            topics=topics,
+            num_questions=num_questions,
+            question_type="multiple_choice",
+        )
+
+    def status(self, job):
+        return self.client.get(reverse("ai_job_status", args=[job.pk])).json()
+
+    @override_settings(AI_JOB_MODE="eager")
+    def test_view_generates_draft_exams(self):
+        transport = self.answer()
+        topics = [f"Topic {number}" for number in range(1, 11)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("ai_quiz_batch"),
+                {
+                    "course_id": self.course.pk,
+                    "topics": "\n".join(topics + ["Topic 1", "  "]),
+                    "num_questions": "2",
+                    "question_type": "multiple_choice",
+                },
+            )
+        job = AIJob.objects.get()
+        self.assertRedirects(
+            response,
+            reverse("ai_job_detail", args=[job.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual((job.status, job.warning), ("done", ""))
+        self.assertEqual(job.result, {"created": 10, "failed": 0})
+        # Ten topics of two questions fit in two calls
+        self.assertEqual(len(transport.calls), 2)
+
+        exams = Exam.objects.filter(course=self.course).order_by("pk")
+        self.assertEqual(
+            sorted(exam.title for exam in exams), sorted(f"Quiz: {t}" for t in topics)
+        )
+        for exam in exams:
+            self.assertFalse(exam.is_published)
+            self.assertEqual(exam.questions.count(), 2)
+            self.assertEqual(exam.questions.first().choices.count(), 4)
+        self.assertEqual(
+            {entry["exam_id"] for entry in job.progress}, {exam.pk for exam in exams}
+        )
+
+        response = self.client.get(reverse("ai_job_detail", args=[job.pk]))
+        self.assertTemplateUsed(response, "core/ai_quiz_batch_result.html")
+        self.assertContains(response, "Topic 10")
+
+    @mock.patch("core.quiz_batches.BATCH_WORKERS", 1)
+    @mock.patch("core.quiz_batches.MAX_TOPICS_PER_CALL", 1)
+    def test_failed_topics_are_retried_alone(self):
+        transport = self.answer(RuntimeError("400 Bad request"), "No topics here")
+        job = self.submit(["Cells", "Plants", "Genetics"])
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.warning, "2 of 3 topics could not be generated.")
+        self.assertEqual(
+            [entry["status"] for entry in job.progress], ["failed", "failed", "done"]
+        )
+        self.assertIn("400", job.progress[0]["error"])
+        self.assertEqual(
+            self.status(job)["progress"], {"total": 3, "finished": 3, "failed": 2}
+        )
+
+        AIJob.objects.filter(pk=job.pk).update(status="queued")
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual([entry["status"] for entry in job.progress], ["done"] * 3)
+        self.assertEqual(len(transport.calls), 5)
+        self.assertEqual(Exam.objects.filter(course=self.course).count(), 3)
+
+    @mock.patch("core.quiz_batches.acquire", return_value=TokenResult(False, 30.0))
+    def test_batch_fails_when_no_topic_is_generated(self, acquire):
+        transport = self.answer()
+        job = self.submit(["Cells", "Plants"])
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(transport.calls, [])
+        self.assertEqual(
+            {entry["error"] for entry in job.progress}, {"Rate limit exceeded."}
+        )
+        response = self.client.get(reverse("ai_job_detail", args=[job.pk]))
+        self.assertContains(response, "Rate limit exceeded.")
+
+    def test_view_rejects_invalid_batches(self):
+        other = User.objects.create_user(username="other", role="instructor")
+        foreign = Course.objects.create(title="Other", description="", instructor=other)
+        form = {
+            "course_id": foreign.pk,
+            "topics": "Cells",
+            "num_questions": "5",
+            "question_type": "multiple_choice",
+        }
+        self.client.post(reverse("ai_quiz_batch"), form)
+        form.update(course_id=self.course.pk, topics="")
+        self.client.post(reverse("ai_quiz_batch"), form)
+        form.update(topics="Cells", question_type="essay")
+        response = self.client.post(reverse("ai_quiz_batch"), form)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AIJob.objects.exists())
+
+    def test_students_do_not_see_drafts(self):
+        self.answer()
+        run_pending_jobs(job_ids=[self.submit(["Cells"]).pk])
+        draft = Exam.objects.get()
+        student = User.objects.create_user(username="student", role="student")
+        Enrollment.objects.create(student=student, course=self.course)
+
+        self.client.force_login(student)
+        response = self.client.get(reverse("student_quiz_list"))
+        self.assertNotContains(response, draft.title)
+        response = self.client.get(reverse("student_quiz_detail", args=[draft.pk]))
+        self.assertEqual(response.status_code, 404)
+
+        Exam.objects.filter(pk=draft.pk).update(is_published=True)
+        response = self.client.get(reverse("student_quiz_list"))
+        self.assertContains(response, draft.title)
@@ -0,0 +1,227 @@
+import io
+import json
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.grading import get_exam_paper
+from core.models import Choice, Course, Exam, Question, User
+from core.quiz_import import add_questions, import_quizzes, question_spec
+
+GIFT_QUIZ = """\
+// Sample bank
+$CATEGORY: $course$/Biology/Cells
+
+::Q1:: Which organelle makes ATP? {
+  =Mitochondrion#Right
+  ~Nucleus
+  ~%50%Ribosome
+}
+
+The cell wall is found in plant cells.{T}
+
+Name the process plants use to make food.{=photosynthesis =photo-synthesis}
+
+Describe osmosis.{}
+
+$CATEGORY: $course$/Biology/Genetics
+
+What is 2 \\= 2? {=yes ~no}
+"""
+
+
+class QuizImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", password="testpass123", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+
+    def import_text(self, text, file_format):
+        return import_quizzes(
+            io.StringIO(text), file_format, self.course, self.instructor
+        )
+
+    def test_gift_import(self):
+        result = self.import_text(GIFT_QUIZ, "gift")
+        self.assertEqual([exam.title for exam in result.exams], ["Cells", "Genetics"])
+        self.assertEqual(result.questions, 5)
+
+        mc, tf, short, essay = result.exams[0].questions.order_by("order")
+        self.assertEqual(mc.text, "Which organelle makes ATP?")
+        self.assertEqual(
+            list(mc.choices.values_list("text", "is_correct")),
+            [("Mitochondrion", True), ("Nucleus", False), ("Ribosome", False)],
+        )
+        self.assertEqual(tf.question_type, "true_false")
+        self.assertEqual(tf.choices.get(is_correct=True).text, "True")
+        self.assertEqual(short.question_type, "short_answer")
+        self.assertEqual(short.sample_answer, "photosynthesis / photo-synthesis")
+        self.assertEqual(
+            (essay.question_type, essay.sample_answer), ("short_answer", "")
+        )
+        self.assertEqual(result.exams[1].questions.get().text, "What is 2 = 2?")
+
+    def test_csv_import(self):
+        text = (
+            "quiz,type,question,points,answer,choice_a,choice_b,choice_c\n"
+            "Week 1,multiple_choice,Pick B,2,B,A,B,C\n"
+            "Week 1,,Pick by text,1,C,A,B,C\n"
+            "Week 1,true_false,Sky is blue,1,true,,,\n"
+            "Week 2,short_answer,Explain,3,Because,,,\n"
+        )
+        result = self.import_text(text, "csv")
+        self.assertEqual([exam.title for exam in result.exams], ["Week 1", "Week 2"])
+        first, by_text, tf = result.exams[0].questions.order_by("order")
+        self.assertEqual(first.points, 2)
+        self.assertEqual(first.choices.get(is_correct=True).text, "B")
+        self.assertEqual(by_text.choices.get(is_correct=True).text, "C")
+        self.assertEqual(tf.choices.count(), 2)
+        self.assertEqual(result.exams[1].questions.get().sample_answer, "Because")
+
+    def test_json_import(self):
+        data = [
+            {
+                "title": "JSON quiz",
+                "questions": [
+                    {
+                        "text": "Pick A",
+                        "choices": [
+                            {"text": "A", "is_correct": True},
+                            {"text": "B"},
+                        ],
+                    },
+                    {"text": "True?", "type": "true_false", "answer": False},
+                ],
+            }
+        ]
+        result = self.import_text(json.dumps(data), "json")
+        exam = result.exams[0]
+        self.assertEqual(exam.title, "JSON quiz")
+        paper = get_exam_paper(exam)
+        self.assertEqual(
+            [q["question_type"] for q in paper["questions"]],
+            ["multiple_choice", "true_false"],
+        )
+
+    def test_invalid_file_rolls_back(self):
+        text = (
+            "quiz,question,answer,choice_a,choice_b\n"
+            "Quiz,Fine,A,x,y\n"
+            "Quiz,No key,Z,x,y\n"
+        )
+        with self.assertRaisesMessage(
+            ValueError, "line 3: no choice is marked correct"
+        ):
+            self.import_text(text, "csv")
+        self.assertFalse(Exam.objects.exists())
+
+        with self.assertRaisesMessage(ValueError, "line 1: question has no {answer}"):
+            self.import_text("Just text\n", "gift")
+
+    def test_add_questions_batches_inserts_and_bumps_paper(self):
+        exam = Exam.objects.create(
+            course=self.course, title="Bank", created_by=self.instructor
+        )
+        self.assertEqual(get_exam_paper(exam)["questions"], [])
+        specs = [
+            question_spec(f"Q{i}", choices=[("Yes", True), ("No", False)])
+            for i in range(120)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(add_questions(exam, specs, batch_size=50), 120)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        # One question and one choice INSERT per batch of 50
+        self.assertEqual(len(inserts), 6)
+
+        exam.refresh_from_db()
+        paper = get_exam_paper(exam)
+        self.assertEqual(len(paper["questions"]), 120)
+        self.assertEqual(paper["questions"][-1]["order"], 119)
+
+    def test_ai_quiz_saved_atomically(self):
+        parsed = [
+            {
+                "order": 1,
+                "type": "multiple_choice",
+                "text": "Pick B",
+                "choices": [{"letter": "A", "text": "A"}, {"letter": "B", "text": "B"}],
+                "correct_answer": "B",
+            },
+            {"order": 2, "type": "true_false", "text": "True?", "correct_answer": True},
+            {"order": 3, "type": "short_answer", "text": "Why?", "sample_answer": "So"},
+        ]
+        self.client.force_login(self.instructor)
+        session = self.client.session
+        session["generated_quiz"] = {"questions": "raw", "parsed_questions": parsed}
+        session.save()
+
+        url = reverse("create_quiz_from_ai")
+        data = {"topic": "Cells", "course_id": self.course.pk}
+        self.client.post(url, data)
+        exam = Exam.objects.get(title="Quiz: Cells")
+        self.assertEqual(exam.questions.count(), 3)
+        self.assertEqual(Choice.objects.filter(question__exam=exam).count(), 4)
+        self.assertEqual(
+            exam.questions.get(question_type="short_answer").sample_answer, "So"
+        )
+
+        # A question that cannot be stored leaves no half-built exam behind
+        parsed.append(
+            {"order": 4, "type": "multiple_choice", "text": "", "choices": []}
+        )
+        session["generated_quiz"] = {"questions": "raw", "parsed_questions": parsed}
+        session.save()
+        self.client.post(url, {"topic": "Broken", "course_id": self.course.pk})
+        self.assertFalse(Exam.objects.filter(title="Quiz: Broken").exists())
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".gift", delete=False) as f:
+            f.write(GIFT_QUIZ)
+        self.addCleanup(os.unlink, f.name)
+        out = io.StringIO()
+        call_command("import_quizzes", str(self.course.pk), f.name, stdout=out)
+        self.assertIn("Imported 5 questions into 2 quizzes", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("import_quizzes", str(self.course.pk), f.name, format="json")
+
+
+@tag("benchmark")
+class QuizImportBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_import_five_thousand_questions(self):
+        instructor = User.objects.create_user(username="instructor", role="instructor")
+        course = Course.objects.create(
+            title="Course", description="", instructor=instructor
+        )
+        lines = ["quiz,question,answer,choice_a,choice_b,choice_c,choice_d"]
+        lines += [f"Bank {i // 1000},Question {i},B,w,x,y,z" for i in range(5000)]
+        stream = io.StringIO("\n".join(lines))
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            result = import_quizzes(stream, "csv", course, instructor)
+        elapsed = time.perf_counter() - start
+        print(
+            f"\nQuiz import: 5000 questions in {elapsed:.2f}s, "
+            f"{len(queries)} queries"
+        )
+        self.assertEqual(result.questions, 5000)
+        self.assertEqual(Question.objects.count(), 5000)
+        self.assertEqual(Choice.objects.count(), 20000)
+        # Queries grow with the number of batches, not questions
+        self.assertLess(len(queries), 300)
+        self.assertLess(elapsed, 10)
@@ -0,0 +1,353 @@
+import importlib
+import time
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.grading import get_exam_paper, grade_answers, load_answer_key
+from core.models import (
+    Choice,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    Question,
+    User,
+)
+from core.views import QUIZZES_PER_PAGE
+
+
+class StudentQuizListTest(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.student = User.objects.create_user(
+            username="student", password="testpass123", role="student"
+        )
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {i}", description="", instructor=self.instructor
+            )
+            for i in (2, 1, 3)
+        ]
+        for course in self.courses[:2]:
+            Enrollment.objects.create(student=self.student, course=course)
+        for course in self.courses:
+            Exam.objects.bulk_create(
+                [
+                    Exam(
+                        course=course,
+                        title=f"{course.title} quiz {n}",
+                        created_by=self.instructor,
+                    )
+                    for n in range(8)
+                ]
+            )
+        self.done = Exam.objects.get(title="Course 2 quiz 3")
+        ExamSubmission.objects.create(exam=self.done, student=self.student, answers={})
+        self.client.force_login(self.student)
+
+    def get_page(self, page=None):
+        params = {"page": page} if page else {}
+        return self.client.get(reverse("student_quiz_list"), params)
+
+    def test_paginated_by_course_then_date(self):
+        response = self.get_page()
+        quizzes = list(response.context["quizzes"])
+        self.assertEqual(len(quizzes), QUIZZES_PER_PAGE)
+        self.assertEqual(response.context["page_obj"].paginator.count, 16)
+        self.assertEqual(quizzes[0].title, "Course 1 quiz 0")
+        self.assertEqual(quizzes[8].title, "Course 2 quiz 0")
+        self.assertContains(response, "16 quizzes available")
+
+        second = list(self.get_page(2).context["quizzes"])
+        self.assertEqual([q.title for q in second][-1], "Course 2 quiz 7")
+
+    def test_completion_annotation(self):
+        quizzes = list(self.get_page().context["quizzes"])
+        completed = [q.title for q in quizzes if q.is_completed_by_user]
+        self.assertEqual(completed, [self.done.title])
+
+    def test_query_count_does_not_grow_with_quizzes(self):
+        self.get_page()
+        with CaptureQueriesContext(connection) as before:
+            self.get_page()
+        for course in self.courses[:2]:
+            Exam.objects.bulk_create(
+                [
+                    Exam(course=course, title="Extra", created_by=self.instructor)
+                    for _ in range(15)
+                ]
+            )
+        with self.assertNumQueries(len(before)):
+            self.get_page()
+        exam_queries = [q for q in before.captured_queries if "core_exam" in q["sql"]]
+        # One COUNT for the paginator and one SELECT for the page
+        self.assertEqual(len(exam_queries), 2)
+
+
+def create_exam(course, instructor, num_questions):
+    """An exam cycling through MC (2 points), true/false and short answer."""
+    exam = Exam.objects.create(course=course, title="Quiz", created_by=instructor)
+    types = ["multiple_choice", "true_false", "short_answer"]
+    questions = Question.objects.bulk_create(
+        [
+            Question(
+                exam=exam,
+                text=f"Q{i}",
+                question_type=types[i % 3],
+                points=2 if i % 3 == 0 else 1,
+                order=i,
+            )
+            for i in range(num_questions)
+        ]
+    )
+    choices = []
+    for question in questions:
+        if question.question_type == "multiple_choice":
+            choices += [
+                Choice(question=question, text=text, is_correct=text == "B", order=n)
+                for n, text in enumerate("ABCD")
+            ]
+        elif question.question_type == "true_false":
+            choices += [
+                Choice(question=question, text="True", is_correct=True, order=0),
+                Choice(question=question, text="False", is_correct=False, order=1),
+            ]
+    Choice.objects.bulk_create(choices)
+    return exam
+
+
+def correct_responses(exam):
+    responses = {}
+    for question in exam.questions.prefetch_related("choices"):
+        if question.question_type == "multiple_choice":
+            responses[question.id] = str(
+                next(c.id for c in question.choices.all() if c.is_correct)
+            )
+        elif question.question_type == "true_false":
+            responses[question.id] = "true"
+    return responses
+
+
+class QuizGradingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.student = User.objects.create_user(
+            username="student", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def test_points_weighted_grading(self):
+        # MC (2 points) right, true/false (1 point) wrong, short answer pending
+        exam = create_exam(self.course, self.instructor, 3)
+        mc, tf, short = exam.questions.all()
+        right = mc.choices.get(is_correct=True)
+        result = grade_answers(
+            load_answer_key(exam),
+            {mc.id: str(right.id), tf.id: "false", short.id: "Because"},
+        )
+        self.assertEqual((result.score, result.max_score), (2, 4))
+        self.assertEqual(result.grade, 50)
+        self.assertTrue(result.needs_review)
+        self.assertEqual(result.answers[str(mc.id)]["choice_text"], "B")
+        self.assertIs(result.answers[str(tf.id)]["is_correct"], False)
+        self.assertIsNone(result.answers[str(short.id)]["points_awarded"])
+
+    def test_invalid_and_missing_answers_score_zero(self):
+        exam = create_exam(self.course, self.instructor, 2)
+        mc, tf = exam.questions.all()
+        result = grade_answers(load_answer_key(exam), {mc.id: "not-a-choice"})
+        self.assertEqual(result.score, 0)
+        self.assertEqual(result.max_score, 3)
+        self.assertNotIn(str(tf.id), result.answers)
+        self.assertFalse(result.needs_review)
+
+    def test_submit_view_stores_grade(self):
+        exam = create_exam(self.course, self.instructor, 2)
+        self.client.force_login(self.student)
+        self.client.post(
+            reverse("student_quiz_detail", args=[exam.pk]),
+            {
+                f"question_{qid}": value
+                for qid, value in correct_responses(exam).items()
+            },
+        )
+        submission = ExamSubmission.objects.get(exam=exam, student=self.student)
+        self.assertEqual(submission.grade, 100)
+        self.assertIsNotNone(submission.graded_at)
+        # Answers are stored as rows pointing at the chosen choices
+        self.assertEqual(submission.answers, {})
+        rows = submission.answer_rows.select_related("choice").order_by("question")
+        self.assertEqual(
+            [(row.choice.text, row.is_correct, row.text) for row in rows],
+            [("B", True, ""), ("True", True, "")],
+        )
+
+
+class ExamPaperTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.student = User.objects.create_user(
+            username="student", password="testpass123", role="student"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.exam = create_exam(self.course, self.instructor, 50)
+        self.client.force_login(self.student)
+
+    def open_quiz(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("student_quiz_detail", args=[self.exam.pk])
+            )
+        self.assertEqual(response.status_code, 200)
+        paper_queries = [
+            q
+            for q in queries.captured_queries
+            if "core_question" in q["sql"] or "core_choice" in q["sql"]
+        ]
+        return response, len(paper_queries)
+
+    def test_paper_compiled_once_per_version(self):
+        response, paper_queries = self.open_quiz()
+        self.assertEqual(paper_queries, 2)
+        self.assertEqual(len(response.context["paper"]["questions"]), 50)
+        self.assertContains(response, 'value="true"', count=17)
+
+        _, paper_queries = self.open_quiz()
+        self.assertEqual(paper_queries, 0)
+
+    def test_choice_change_invalidates_paper(self):
+        self.open_quiz()
+        choice = Choice.objects.filter(question__exam=self.exam, text="A").first()
+        choice.text = "Renamed"
+        choice.save()
+        response, paper_queries = self.open_quiz()
+        self.assertEqual(paper_queries, 2)
+        self.assertContains(response, "Renamed")
+
+    def test_grading_uses_current_answer_key(self):
+        question = self.exam.questions.get(order=0)
+        wrong = question.choices.get(text="A")
+        get_exam_paper(self.exam)
+
+        question.choices.update(is_correct=False)
+        wrong.is_correct = True
+        wrong.save()
+        self.exam.refresh_from_db()
+        answer = grade_answers(load_answer_key(self.exam), {question.id: wrong.id})
+        self.assertTrue(answer.answers[str(question.id)]["is_correct"])
+
+    def test_deleting_question_invalidates_paper(self):
+        get_exam_paper(self.exam)
+        self.exam.questions.get(order=0).delete()
+        self.exam.refresh_from_db()
+        self.assertEqual(len(get_exam_paper(self.exam)["questions"]), 49)
+
+
+@tag("benchmark")
+class QuizGradingBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+
+    def test_grading_cost_independent_of_question_count(self):
+        timings = {}
+        for num_questions in (10, 100):
+            exam = create_exam(self.course, self.instructor, num_questions)
+            responses = correct_responses(exam)
+            with self.assertNumQueries(2):
+                answer_key = load_answer_key(exam)
+            start = time.perf_counter()
+            with self.assertNumQueries(0):
+                result = grade_answers(answer_key, responses)
+            timings[num_questions] = time.perf_counter() - start
+            self.assertEqual(result.score, result.max_score - num_questions // 3)
+
+        print(
+            "\nGrading: 10 questions {:.3f}ms, 100 questions {:.3f}ms".format(
+                timings[10] * 1000, timings[100] * 1000
+            )
+        )
+        self.assertLess(timings[100], 0.05)
+
+
+class AnswerStorageMigrationTest(TestCase):
+    """The batched conversion of JSON answers into SubmissionAnswer rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.migration = importlib.import_module(
+            "core.migrations.0012_submission_answers"
+        )
+        instructor = User.objects.create_user(username="instructor", role="instructor")
+        self.student = User.objects.create_user(username="student", role="student")
+        course = Course.objects.create(
+            title="Course", description="", instructor=instructor
+        )
+        self.exam = create_exam(course, instructor, 3)
+        self.mc, self.tf, self.short = self.exam.questions.all()
+
+    def test_json_answers_moved_to_rows_and_back(self):
+        right = self.mc.choices.get(is_correct=True)
+        legacy = {
+            str(self.mc.id): {
+                "answer": str(right.id),
+                "choice_text": "B",
+                "is_correct": True,
+                "points_awarded": 2,
+            },
+            str(self.tf.id): {
+                "answer": "false",
+                "is_correct": False,
+                "points_awarded": 0,
+            },
+            str(self.short.id): {
+                "answer": "Because",
+                "is_correct": None,
+                "points_awarded": None,
+            },
+        }
+        submission = ExamSubmission.objects.create(
+            exam=self.exam, student=self.student, answers=legacy
+        )
+        free_form = ExamSubmission.objects.create(
+            exam=self.exam, student=self.student, answers="My essay"
+        )
+
+        self.migration.move_answers_to_rows(django_apps, None)
+        submission.refresh_from_db()
+        free_form.refresh_from_db()
+        self.assertEqual(submission.answers, {})
+        self.assertEqual(free_form.answers, "My essay")
+        rows = {row.question_id: row for row in submission.answer_rows.all()}
+        self.assertEqual(rows[self.mc.id].choice_id, right.id)
+        self.assertEqual(rows[self.tf.id].choice.text, "False")
+        self.assertEqual(rows[self.short.id].text, "Because")
+        self.assertIsNone(rows[self.short.id].points_awarded)
+
+        self.migration.move_rows_to_answers(django_apps, None)
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, legacy)
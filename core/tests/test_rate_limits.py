@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.ai import gemini
+from core.ai.client import FakeTransport, GeminiClient, set_client
+from core.ai.gemini import GEMINI_RATE_BUCKET, rate_limit_gemini
+from core.models import RateLimitBucket
+from core.rate_limits import acquire
+from core.tests.rate_limit_workers import create_bucket_table, take_tokens
+
+
+class TokenBucketTest(TestCase):
+    def age_bucket(self, seconds):
+        RateLimitBucket.objects.update(updated_at=F("updated_at") - seconds)
+
+    def test_burst_then_refill(self):
+        results = [acquire("api", rate=1, capacity=3) for _ in range(4)]
+        self.assertEqual([r.acquired for r in results], [True, True, True, False])
+        self.assertAlmostEqual(results[-1].retry_after, 1, delta=0.1)
+
+        self.age_bucket(2.5)
+        results = [acquire("api", rate=1, capacity=3) for _ in range(3)]
+        self.assertEqual([r.acquired for r in results], [True, True, False])
+
+        # Refills never exceed the capacity
+        self.age_bucket(3600)
+        results = [acquire("api", rate=1, capacity=3) for _ in range(4)]
+        self.assertEqual([r.acquired for r in results], [True, True, True, False])
+
+    def test_bounded_wait(self):
+        self.assertTrue(acquire("api", rate=20, capacity=1).acquired)
+        start = time.monotonic()
+        self.assertTrue(acquire("api", rate=20, capacity=1, max_wait=1).acquired)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        # A wait longer than allowed gives up without sleeping
+        self.assertTrue(acquire("slow", rate=0.01, capacity=1).acquired)
+        start = time.monotonic()
+        result = acquire("slow", rate=0.01, capacity=1, max_wait=1)
+        self.assertFalse(result.acquired)
+        self.assertAlmostEqual(result.retry_after, 100, delta=1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_invalid_bucket(self):
+        with self.assertRaises(ValueError):
+            acquire("api", rate=0, capacity=1)
+
+    def test_gemini_calls_share_one_bucket(self):
+        calls = []
+
+        @rate_limit_gemini(max_requests_per_minute=2)
+        def first():
+            calls.append("first")
+            return "ok"
+
+        @rate_limit_gemini(max_requests_per_minute=2)
+        def second():
+            calls.append("second")
+            return "ok"
+
+        self.assertEqual((first(), second()), ("ok", "ok"))
+        limited = first()
+        self.assertTrue(limited["rate_limited"])
+        self.assertEqual(limited["retry_after"], 30)
+        self.assertEqual(calls, ["first", "second"])
+        self.assertTrue(
+            RateLimitBucket.objects.filter(name=GEMINI_RATE_BUCKET).exists()
+        )
+
+    @override_settings(GEMINI_RATE_LIMIT_WAIT=2)
+    def test_gemini_calls_wait_when_configured(self):
+        @rate_limit_gemini(max_requests_per_minute=600)
+        def call():
+            return "ok"
+
+        RateLimitBucket.objects.create(
+            name=GEMINI_RATE_BUCKET, tokens=0, updated_at=time.time()
+        )
+        self.assertEqual(call(), "ok")
+
+
+class TransactionTokenBucketTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        set_client(GeminiClient(FakeTransport(default="Explained")))
+        self.addCleanup(set_client, None)
+
+    def test_generators_can_be_called_inside_a_transaction(self):
+        # As in a view under ATOMIC_REQUESTS
+        RateLimitBucket.objects.create(
+            name=GEMINI_RATE_BUCKET, tokens=1, updated_at=time.time()
+        )
+        with transaction.atomic():
+            self.assertEqual(gemini.explain_concept("Osmosis"), "Explained")
+            limited = gemini.explain_concept("Gravity")
+        self.assertTrue(limited["rate_limited"])
+        self.assertLess(RateLimitBucket.objects.get().tokens, 1)
+
+
+class MultiProcessTokenBucketTest(SimpleTestCase):
+    def test_global_rate_across_processes(self):
+        processes = 4
+        duration = 2.0
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buckets.sqlite3")
+            context = multiprocessing.get_context("spawn")
+            setup = context.Process(target=create_bucket_table, args=(path,))
+            setup.start()
+            setup.join()
+            self.assertEqual(setup.exitcode, 0)
+
+            results = context.Queue()
+            barrier = context.Barrier(processes)
+            workers = [
+                context.Process(
+                    target=take_tokens, args=(path, barrier, duration, results)
+                )
+                for _ in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+            taken = sorted(stamp for _ in workers for stamp in results.get(timeout=60))
+            for worker in workers:
+                worker.join()
+                self.assertEqual(worker.exitcode, 0)
+
+        # 5 burst tokens plus 10 a second, however many processes ask
+        self.assertLessEqual(len(taken), 5 + 10 * duration + 1)
+        self.assertGreaterEqual(len(taken), 5 + 10 * duration * 0.8)
+        # No one-second window, the burst included, exceeds capacity + rate
+        for index, stamp in enumerate(taken):
+            window = [t for t in taken[index:] if t < stamp + 1]
+            self.assertLessEqual(len(window), 5 + 10 + 1)
@@ -0,0 +1,195 @@
+import time
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, tag
+
+from core.admin import ExamAdmin
+from core.gradebook import rebuild_gradebook
+from core.grading import answer_rows, grade_answers, load_answer_key, save_answers
+from core.models import (
+    Course,
+    Exam,
+    ExamSubmission,
+    GradebookSnapshot,
+    SubmissionAnswer,
+    User,
+)
+from core.regrade import regrade_exam
+from core.tests.test_quizzes import correct_responses, create_exam
+
+
+def submit(exam, student, responses, **fields):
+    result = grade_answers(load_answer_key(exam), responses)
+    submission = ExamSubmission.objects.create(
+        exam=exam, student=student, grade=result.grade, **fields
+    )
+    save_answers(submission, result.answers)
+    return submission
+
+
+def stored_answer(submission, question):
+    return SubmissionAnswer.objects.get(submission=submission, question=question)
+
+
+class RegradeExamTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.students = [
+            User.objects.create_user(username=f"student{i}", role="student")
+            for i in range(3)
+        ]
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+        # MC (2 points), true/false (1 point), short answer (1 point)
+        self.exam = create_exam(self.course, self.instructor, 3)
+        self.mc, self.tf, self.short = self.exam.questions.all()
+
+    def flip_answer_key(self):
+        """Make choice "A" the right MC answer and "False" the right T/F one."""
+        for question, text in ((self.mc, "A"), (self.tf, "False")):
+            question.choices.update(is_correct=False)
+            question.choices.filter(text=text).update(is_correct=True)
+
+    def test_rescores_after_key_change(self):
+        right = submit(self.exam, self.students[0], correct_responses(self.exam))
+        a_choice = self.mc.choices.get(text="A")
+        flipped = submit(
+            self.exam,
+            self.students[1],
+            {self.mc.id: str(a_choice.id), self.tf.id: "false"},
+        )
+        self.flip_answer_key()
+
+        result = regrade_exam(self.exam)
+        self.assertEqual(result, {"submissions": 2, "answers": 4, "updated": 2})
+        right.refresh_from_db()
+        flipped.refresh_from_db()
+        self.assertEqual(right.grade, 0)
+        self.assertIs(stored_answer(right, self.mc).is_correct, False)
+        self.assertEqual(flipped.grade, 75)
+        self.assertEqual(stored_answer(flipped, self.tf).points_awarded, 1)
+
+        # Nothing left to change on a second run
+        self.assertEqual(
+            regrade_exam(self.exam), {"submissions": 2, "answers": 0, "updated": 0}
+        )
+
+    def test_short_answer_points_carried_over(self):
+        submission = submit(
+            self.exam,
+            self.students[0],
+            {self.mc.id: "0", self.short.id: "Because"},
+        )
+        SubmissionAnswer.objects.filter(question=self.short).update(
+            points_awarded=1, is_correct=True
+        )
+        self.mc.choices.update(is_correct=True)
+
+        regrade_exam(self.exam)
+        submission.refresh_from_db()
+        # Invalid choice id stays wrong; the marked short answer keeps its point
+        self.assertEqual(submission.grade, 25)
+        self.assertEqual(stored_answer(submission, self.short).points_awarded, 1)
+
+    def test_pending_submission_keeps_grade_unset(self):
+        submission = submit(
+            self.exam,
+            self.students[0],
+            correct_responses(self.exam),
+            grading_status="pending",
+        )
+        ExamSubmission.objects.filter(pk=submission.pk).update(grade=None)
+        self.flip_answer_key()
+
+        regrade_exam(self.exam)
+        submission.refresh_from_db()
+        self.assertIsNone(submission.grade)
+        self.assertIs(stored_answer(submission, self.mc).is_correct, False)
+
+    def test_free_form_submission_keeps_manual_grade(self):
+        submission = ExamSubmission.objects.create(
+            exam=self.exam, student=self.students[0], answers={"1": "essay"}, grade=80
+        )
+        regrade_exam(self.exam)
+        submission.refresh_from_db()
+        self.assertEqual(submission.grade, 80)
+
+    def test_gradebook_snapshot_dropped(self):
+        submit(self.exam, self.students[0], correct_responses(self.exam))
+        rebuild_gradebook(self.course)
+        self.flip_answer_key()
+        regrade_exam(self.exam)
+        self.assertFalse(GradebookSnapshot.objects.filter(course=self.course).exists())
+
+    def test_command_and_admin_action(self):
+        submission = submit(self.exam, self.students[0], correct_responses(self.exam))
+        self.flip_answer_key()
+        out = StringIO()
+        call_command("regrade_exam", str(self.exam.pk), stdout=out)
+        self.assertIn("1 of 1 submissions updated", out.getvalue())
+        submission.refresh_from_db()
+        self.assertEqual(submission.grade, 0)
+
+        self.mc.choices.update(is_correct=True)
+        request = RequestFactory().post("/")
+        request.user = self.instructor
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        ExamAdmin(Exam, AdminSite()).regrade_submissions(
+            request, Exam.objects.filter(pk=self.exam.pk)
+        )
+        submission.refresh_from_db()
+        self.assertEqual(submission.grade, 50)
+
+
+@tag("benchmark")
+class RegradeBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_regrade_ten_thousand_submissions(self):
+        instructor = User.objects.create_user(username="instructor", role="instructor")
+        course = Course.objects.create(
+            title="Course", description="", instructor=instructor
+        )
+        exam = create_exam(course, instructor, 15)
+        answers = grade_answers(load_answer_key(exam), correct_responses(exam)).answers
+        students = User.objects.bulk_create(
+            [User(username=f"student{i}", role="student") for i in range(10000)]
+        )
+        submissions = ExamSubmission.objects.bulk_create(
+            [
+                ExamSubmission(exam=exam, student=student, grade=100)
+                for student in students
+            ],
+            batch_size=1000,
+        )
+        SubmissionAnswer.objects.bulk_create(
+            [
+                row
+                for submission in submissions
+                for row in answer_rows(submission, answers)
+            ],
+            batch_size=5000,
+        )
+        for question in exam.questions.filter(question_type="multiple_choice"):
+            question.choices.update(is_correct=False)
+
+        start = time.perf_counter()
+        result = regrade_exam(exam)
+        elapsed = time.perf_counter() - start
+        print(f"\nRegrade: 10000 submissions x 15 questions in {elapsed:.2f}s")
+        self.assertEqual(result["updated"], 10000)
+        self.assertEqual(result["answers"], 50000)
+        self.assertEqual(
+            ExamSubmission.objects.filter(exam=exam, grade__gt=0).count(), 10000
+        )
+        self.assertLess(elapsed, 10)
@@ -0,0 +1,199 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.ai.gemini import parse_short_answer_scores
+from core.models import (
+    Choice,
+    Course,
+    Enrollment,
+    Exam,
+    ExamSubmission,
+    Question,
+    User,
+)
+from core.short_answers import GRADING_LEASE, grade_pending_submissions
+
+
+def fake_scores(items):
+    """Full marks for answers mentioning the reference answer, else none."""
+    return {
+        "scores": [
+            {
+                "score": 1.0 if item["sample_answer"] in item["answer"] else 0.0,
+                "feedback": "ok",
+            }
+            for item in items
+        ]
+    }
+
+
+class ShortAnswerGradingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username="instructor", role="instructor"
+        )
+        self.course = Course.objects.create(
+            title="Course", description="", instructor=self.instructor
+        )
+        self.exam = Exam.objects.create(
+            course=self.course, title="Quiz", created_by=self.instructor
+        )
+        self.mc = Question.objects.create(
+            exam=self.exam, text="Pick B", points=2, order=0
+        )
+        Choice.objects.create(question=self.mc, text="A", order=0)
+        self.right = Choice.objects.create(
+            question=self.mc, text="B", is_correct=True, order=1
+        )
+        self.short = [
+            Question.objects.create(
+                exam=self.exam,
+                text=f"Explain {word}",
+                question_type="short_answer",
+                points=points,
+                sample_answer=word,
+                order=order,
+            )
+            for order, (word, points) in enumerate(
+                [("photosynthesis", 1), ("osmosis", 3)], 1
+            )
+        ]
+        self.students = [
+            User.objects.create_user(
+                username=f"student{i}", password="testpass123", role="student"
+            )
+            for i in range(3)
+        ]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+
+    def submit(self, student, short_answers):
+        self.client.force_login(student)
+        data = {f"question_{self.mc.id}": str(self.right.id)}
+        for question, text in zip(self.short, short_answers):
+            data[f"question_{question.id}"] = text
+        self.client.post(reverse("student_quiz_detail", args=[self.exam.pk]), data)
+        return ExamSubmission.objects.get(exam=self.exam, student=student)
+
+    @mock.patch("core.ai.gemini.grade_short_answers", side_effect=fake_scores)
+    def test_submission_stored_pending_then_graded_by_worker(self, grade):
+        submission = self.submit(self.students[0], ["photosynthesis", "no idea"])
+        self.assertEqual(submission.grading_status, "pending")
+        self.assertIsNone(submission.grade)
+        grade.assert_not_called()
+
+        call_command("grade_short_answers", stdout=mock.Mock())
+        submission.refresh_from_db()
+        self.assertEqual(submission.grading_status, "graded")
+        self.assertIsNotNone(submission.graded_at)
+        # 2 (MC) + 1 (first short answer) out of 6 points
+        self.assertEqual(submission.grade, 50)
+        answer = submission.answer_rows.get(question=self.short[1])
+        self.assertEqual(answer.points_awarded, 0)
+        self.assertEqual(answer.feedback, "ok")
+        self.assertEqual(answer.text, "no idea")
+
+    @override_settings(SHORT_ANSWER_GRADING_MODE="eager")
+    @mock.patch("core.ai.gemini.grade_short_answers", side_effect=fake_scores)
+    def test_eager_mode_grades_on_commit(self, grade):
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = self.submit(self.students[0], ["photosynthesis", "osmosis"])
+        submission.refresh_from_db()
+        self.assertEqual(submission.grading_status, "graded")
+        self.assertEqual(submission.grade, 100)
+        grade.assert_called_once()
+
+    @mock.patch("core.ai.gemini.grade_short_answers", side_effect=fake_scores)
+    def test_answers_batched_across_submissions(self, grade):
+        for student in self.students:
+            self.submit(student, ["a", "b"])
+        self.assertEqual(grade_pending_submissions(batch_size=4), 3)
+        self.assertEqual([len(c.args[0]) for c in grade.call_args_list], [4, 2])
+        self.assertFalse(
+            ExamSubmission.objects.filter(grading_status="pending").exists()
+        )
+
+    @mock.patch(
+        "core.ai.gemini.grade_short_answers",
+        return_value={"error": "quota", "quota_exceeded": True},
+    )
+    def test_failed_batch_stays_pending(self, grade):
+        submission = self.submit(self.students[0], ["photosynthesis", "osmosis"])
+        self.assertEqual(grade_pending_submissions(), 0)
+        submission.refresh_from_db()
+        self.assertEqual(submission.grading_status, "pending")
+        self.assertIsNone(submission.grade)
+        self.assertIsNone(submission.grading_claimed_at)
+
+    def test_model_calls_run_outside_a_transaction(self):
+        def grade(items):
+            # A durable block fails inside any transaction the pass holds open
+            with transaction.atomic(durable=True):
+                pass
+            return fake_scores(items)
+
+        self.submit(self.students[0], ["photosynthesis", "osmosis"])
+        with mock.patch("core.ai.gemini.grade_short_answers", side_effect=grade):
+            self.assertEqual(grade_pending_submissions(), 1)
+
+    @mock.patch("core.ai.gemini.grade_short_answers", side_effect=fake_scores)
+    def test_leased_submissions_wait_for_the_lease_to_expire(self, grade):
+        submission = self.submit(self.students[0], ["photosynthesis", "osmosis"])
+        leased = ExamSubmission.objects.filter(pk=submission.pk)
+        leased.update(grading_claimed_at=timezone.now())
+        self.assertEqual(grade_pending_submissions(), 0)
+        grade.assert_not_called()
+
+        leased.update(
+            grading_claimed_at=timezone.now() - timedelta(seconds=GRADING_LEASE + 1)
+        )
+        self.assertEqual(grade_pending_submissions(), 1)
+        submission.refresh_from_db()
+        self.assertEqual(submission.grading_status, "graded")
+        self.assertIsNone(submission.grading_claimed_at)
+
+    def test_results_are_dropped_when_the_lease_was_lost(self):
+        submission = self.submit(self.students[0], ["photosynthesis", "osmosis"])
+
+        def grade(items):
+            # Another worker took over the expired lease meanwhile
+            ExamSubmission.objects.filter(pk=submission.pk).update(
+                grading_claimed_at=timezone.now() + timedelta(seconds=1)
+            )
+            return fake_scores(items)
+
+        with mock.patch("core.ai.gemini.grade_short_answers", side_effect=grade):
+            self.assertEqual(grade_pending_submissions(), 0)
+        submission.refresh_from_db()
+        self.assertEqual(submission.grading_status, "pending")
+        self.assertFalse(
+            submission.answer_rows.filter(
+                question__question_type="short_answer", is_correct__isnull=False
+            ).exists()
+        )
+
+    def test_objective_only_submission_is_graded_immediately(self):
+        submission = self.submit(self.students[0], [])
+        self.assertEqual(submission.grading_status, "graded")
+        self.assertEqual(submission.grade, 2 / 6 * 100)
+
+
+class ParseShortAnswerScoresTest(TestCase):
+    def test_parses_and_clamps_scores(self):
+        text = 'Sure:\n```json\n[{"score": 0.5, "feedback": "ok"}, {"score": 3}]\n```'
+        self.assertEqual(
+            parse_short_answer_scores(text, 2),
+            [{"score": 0.5, "feedback": "ok"}, {"score": 1.0, "feedback": ""}],
+        )
+
+    def test_rejects_wrong_count(self):
+        with self.assertRaises(ValueError):
+            parse_short_answer_scores('[{"score": 1}]', 2)
@@ -56,6 +56,21 @@ urlpatterns = [
     path("calendar/", views.calendar_view, name="calendar"),
     path("notifications/", views.notifications_view, name="notifications"),
     path("gradebook/<int:course_id>/", views.gradebook_view, name="gradebook"),
+    path(
+        "gradebook/<int:course_id>/export/",
+        views.gradebook_export_view,
+        name="gradebook_export",
+    ),
+    path(
+        "exam/<int:exam_id>/analysis/",
+        views.exam_item_analysis_view,
+        name="exam_item_analysis",
+    ),
+    path(
+        "course/<int:course_id>/roster/export/",
+        views.roster_export_view,
+        name="roster_export",
+    ),
     path(
         "assignment/<int:assignment_id>/submit/",
         views.assignment_submission_view,
@@ -106,6 +121,7 @@ urlpatterns = [
     path("ai/lesson-planner/", views.ai_lesson_planner, name="ai_lesson_planner"),
     path("ai/quiz-generator/", views.ai_quiz_generator, name="ai_quiz_generator"),
     path("ai/quiz/create/", views.create_quiz_from_ai, name="create_quiz_from_ai"),
+    path("ai/quiz-batch/", views.ai_quiz_batch, name="ai_quiz_batch"),
     path("ai/rubric-generator/", views.ai_rubric_generator, name="ai_rubric_generator"),
     path(
         "ai/concept-explainer/", views.ai_concept_explainer, name="ai_concept_explainer"
@@ -115,6 +131,8 @@ urlpatterns = [
         views.ai_syllabus_generator,
         name="ai_syllabus_generator",
     ),
+    path("ai/jobs/<uuid:job_id>/", views.ai_job_detail, name="ai_job_detail"),
+    path("ai/jobs/<uuid:job_id>/status/", views.ai_job_status, name="ai_job_status"),
     # Student functionality
     path("student/profile/", views.student_profile_view, name="student_profile"),
     path("student/quizzes/", views.student_quiz_list, name="student_quiz_list"),
@@ -1,5 +1,7 @@
 # Fichier : core/views.py
 
+import tempfile
+
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
@@ -7,22 +9,24 @@ from django.contrib.auth.decorators import login_required
 # Importez ce formulaire pour la vue de connexion
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import models
+from django.core.paginator import Paginator
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views.generic import CreateView, TemplateView
 
 # API ViewSets
 from rest_framework import permissions, viewsets
 
-from .ai.gemini import (
-    explain_concept,
-    generate_assignment_rubric,
-    generate_course_syllabus,
-    generate_exam_content,
-    generate_lesson_plan,
-    generate_quiz_questions,
-)
+from . import ai
+from .ai_jobs import STREAMING_KINDS, submit_job
+from .counters import platform_totals
+from .dashboards import instructor_dashboard_stats, student_completion
+from .enrollment import ENROLLED, FULL, enroll_student
+from .exports import gradebook_table, iter_csv, roster_table, write_xlsx
 from .forms import (
     AssignmentForm,
     CourseForm,
@@ -30,12 +34,15 @@ from .forms import (
     CustomUserCreationForm,
     UserProfileForm,
 )
+from .gradebook import get_gradebook
+from .grading import get_exam_paper, grade_answers, load_answer_key, save_answers
+from .item_analysis import exam_item_analysis
 from .models import (
+    AIJob,
     Announcement,
     Assignment,
     AssignmentSubmission,
     CalendarEvent,
-    Choice,
     Course,
     CourseCategory,
     CourseMaterial,
@@ -51,12 +58,14 @@ from .models import (
     User,
     UserProfile,
 )
+from .quiz_import import ai_quiz_questions, save_quiz
 from .serializers import (
     AssignmentSerializer,
     CourseSerializer,
     EnrollmentSerializer,
     GradeSerializer,
 )
+from .short_answers import queue_submission, submission_status
 
 
 class IsInstructor(permissions.BasePermission):
@@ -95,50 +104,6 @@ class GradeViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-from django.contrib import messages
-from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required
-
-# Importez ce formulaire pour la vue de connexion
-from django.contrib.auth.forms import AuthenticationForm
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import models
-from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
-from django.views.generic import CreateView, TemplateView
-
-from .ai.gemini import (
-    explain_concept,
-    generate_assignment_rubric,
-    generate_course_syllabus,
-    generate_exam_content,
-    generate_lesson_plan,
-    generate_quiz_questions,
-)
-from .forms import AssignmentForm, CourseForm, CustomUserCreationForm, UserProfileForm
-from .models import (
-    Announcement,
-    Assignment,
-    AssignmentSubmission,
-    CalendarEvent,
-    Choice,
-    Course,
-    CourseCategory,
-    CourseMaterial,
-    Discussion,
-    DiscussionPost,
-    Enrollment,
-    Exam,
-    ExamSubmission,
-    Grade,
-    Notification,
-    Question,
-    StudentProgress,
-    User,
-    UserProfile,
-)
-
-
 def home_view(request):
     return render(request, "core/home.html")
 
@@ -208,13 +173,7 @@ class AdminDashboardView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Add admin-specific context data
-        context.update(
-            {
-                "total_users": User.objects.count(),
-                "total_courses": Course.objects.count(),
-                "total_enrollments": Enrollment.objects.count(),
-            }
-        )
+        context.update(platform_totals())
         return context
 
 
@@ -225,25 +184,12 @@ class InstructorDashboardView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         # Add instructor-specific context data
         user = self.request.user
-        my_courses = Course.objects.filter(instructor=user)
-
-        context.update(
-            {
-                "my_courses_count": my_courses.count(),
-                "my_courses": my_courses[:6],  # Show first 6 courses
-                "total_students": Enrollment.objects.filter(
-                    course__instructor=user
-                ).count(),
-                "pending_reviews": ExamSubmission.objects.filter(
-                    exam__course__instructor=user, graded_at__isnull=True
-                ).count(),
-                "recent_submissions": ExamSubmission.objects.filter(
-                    exam__course__instructor=user
-                ).order_by("-submitted_at")[
-                    :5
-                ],  # Recent 5 submissions
-            }
-        )
+        context.update(instructor_dashboard_stats(user))
+        context["recent_submissions"] = (
+            ExamSubmission.objects.filter(exam__course__instructor=user)
+            .select_related("student", "exam")
+            .order_by("-submitted_at")[:5]
+        )  # Recent 5 submissions
         return context
 
 
@@ -268,10 +214,9 @@ class StudentDashboardView(LoginRequiredMixin, TemplateView):
                 "enrolled_courses_count": enrollments.count(),
                 "completed_assignments": completed_assignments,
                 "average_grade": f"{avg_grade:.1f}%" if avg_grade else "N/A",
-                "course_completion": 75,  # Placeholder - calculate based on actual progress
-                "assignment_completion": 60,  # Placeholder - calculate based on actual progress
             }
         )
+        context.update(student_completion(user))
         return context
 
 
@@ -297,22 +242,40 @@ def student_profile_view(request):
     return render(request, "core/student_profile.html", {"form": form})
 
 
+# Quiz cards per page on the student quiz list
+QUIZZES_PER_PAGE = 12
+
+
 @login_required
 def student_quiz_list(request):
-    enrolled_courses = request.user.enrollments.all()
-    quizzes = []
-    for enrollment in enrolled_courses:
-        for exam in enrollment.course.exams.all():
-            exam.is_completed_by_user = exam.submissions.filter(
-                student=request.user
-            ).exists()
-            quizzes.append(exam)
-    return render(request, "core/student_quiz_list.html", {"quizzes": quizzes})
+    """List quizzes from the student's enrolled courses, by course and date"""
+    quizzes = (
+        Exam.objects.filter(
+            course__enrollments__student=request.user, is_published=True
+        )
+        .select_related("course", "created_by")
+        .annotate(
+            is_completed_by_user=Exists(
+                ExamSubmission.objects.filter(exam=OuterRef("pk"), student=request.user)
+            )
+        )
+        .order_by("course__title", "course_id", "created_at", "id")
+    )
+    page_obj = Paginator(quizzes, QUIZZES_PER_PAGE).get_page(request.GET.get("page"))
+    return render(
+        request,
+        "core/student_quiz_list.html",
+        {"quizzes": page_obj.object_list, "page_obj": page_obj},
+    )
 
 
 @login_required
 def student_quiz_detail(request, exam_pk):
-    exam = get_object_or_404(Exam, pk=exam_pk)
+    exam = get_object_or_404(
+        Exam.objects.select_related("course", "created_by"), pk=exam_pk
+    )
+    if not exam.is_published and exam.created_by != request.user:
+        raise Http404("No such quiz")
 
     # Check if student has already submitted
     existing_submission = ExamSubmission.objects.filter(
@@ -323,46 +286,45 @@ def student_quiz_detail(request, exam_pk):
         return redirect("student_quiz_list")
 
     if request.method == "POST":
-        # Collect answers from form
-        answers = {}
-        for question in exam.questions.all():
-            question_key = f"question_{question.id}"
-            if question_key in request.POST:
-                answer_value = request.POST.get(question_key)
-                if question.question_type == "multiple_choice":
-                    # For multiple choice, store the choice ID
-                    try:
-                        choice = question.choices.get(id=answer_value)
-                        answers[str(question.id)] = {
-                            "answer": answer_value,
-                            "choice_text": choice.text,
-                            "is_correct": choice.is_correct,
-                        }
-                    except:
-                        answers[str(question.id)] = {"answer": answer_value}
-                else:
-                    # For true/false and short answer
-                    answers[str(question.id)] = {"answer": answer_value}
-
-        # Calculate basic score for multiple choice questions
-        total_questions = exam.questions.count()
-        correct_answers = 0
-
-        for question_id, answer_data in answers.items():
-            if answer_data.get("is_correct"):
-                correct_answers += 1
-
-        grade = (correct_answers / total_questions * 100) if total_questions > 0 else 0
-
-        ExamSubmission.objects.create(
-            exam=exam, student=request.user, answers=answers, grade=grade
-        )
-        messages.success(
-            request, f"Quiz submitted successfully! Your score: {grade:.1f}%"
-        )
+        answer_key = load_answer_key(exam)
+        responses = {
+            question_id: request.POST[f"question_{question_id}"]
+            for question_id in answer_key
+            if f"question_{question_id}" in request.POST
+        }
+        result = grade_answers(answer_key, responses)
+        status = submission_status(answer_key, result)
+
+        with transaction.atomic():
+            submission = ExamSubmission.objects.create(
+                exam=exam,
+                student=request.user,
+                # Pending submissions get their grade from the grading worker
+                grade=None if status == "pending" else result.grade,
+                grading_status=status,
+                graded_at=timezone.now() if status == "graded" else None,
+            )
+            save_answers(submission, result.answers)
+            if status == "pending":
+                queue_submission(submission)
+        if status == "pending":
+            messages.success(
+                request,
+                "Quiz submitted successfully! Your short answers are being "
+                "graded and your score will appear shortly.",
+            )
+        else:
+            messages.success(
+                request,
+                f"Quiz submitted successfully! Your score: {result.grade:.1f}%",
+            )
         return redirect("student_quiz_list")
 
-    return render(request, "core/student_quiz_detail.html", {"exam": exam})
+    return render(
+        request,
+        "core/student_quiz_detail.html",
+        {"exam": exam, "paper": get_exam_paper(exam)},
+    )
 
 
 @login_required
@@ -416,12 +378,12 @@ class CourseCreateView(LoginRequiredMixin, CreateView):
 @login_required
 def enroll_in_course(request, pk):
     course = get_object_or_404(Course, pk=pk)
-    enrollment, created = Enrollment.objects.get_or_create(
-        student=request.user, course=course
-    )
+    result = enroll_student(request.user, course)
 
-    if created:
+    if result.status == ENROLLED:
         messages.success(request, f"Successfully enrolled in {course.title}!")
+    elif result.status == FULL:
+        messages.error(request, f"Sorry, {course.title} is full.")
     else:
         messages.info(request, f"You are already enrolled in {course.title}.")
 
@@ -472,7 +434,7 @@ def generate_exam_view(request, course_pk):
     if request.method == "POST":
         title = request.POST.get("title")
         instructions = request.POST.get("instructions")
-        content = generate_exam_content(title, instructions)
+        content = ai.generate_exam_content(title, instructions)
         Exam.objects.create(
             title=title,
             instructions=instructions,
@@ -490,7 +452,7 @@ def generate_content_view(request, course_pk):
     course = get_object_or_404(Course, pk=course_pk)
     if request.method == "POST":
         prompt = request.POST.get("prompt")
-        content = generate_exam_content(prompt)
+        content = ai.generate_exam_content(prompt)
         messages.success(request, "Content generated successfully.")
         return render(request, "core/generated_content.html", {"content": content})
     return render(request, "core/generate_content.html", {"course": course})
@@ -519,6 +481,8 @@ def review_submission(request, submission_pk):
     if request.method == "POST":
         submission.feedback = request.POST.get("feedback")
         submission.grade = request.POST.get("grade")
+        submission.grading_status = "graded"
+        submission.graded_at = timezone.now()
         submission.save()
         messages.success(request, "Submission reviewed.")
         return redirect("instructor_exam_submissions")
@@ -530,6 +494,20 @@ def review_submission(request, submission_pk):
 # ======================
 
 
+# AI job kind -> generator view, for the "try again" link of a failed job
+AI_JOB_FORMS = {
+    "lesson_plan": "ai_lesson_planner",
+    "quiz": "ai_quiz_generator",
+    "rubric": "ai_rubric_generator",
+    "explanation": "ai_concept_explainer",
+    "syllabus": "ai_syllabus_generator",
+    "quiz_batch": "ai_quiz_batch",
+}
+
+# Most topics one quiz batch may generate
+MAX_BATCH_TOPICS = 60
+
+
 @login_required
 def ai_lesson_planner(request):
     """Generate lesson plans using Gemini AI"""
@@ -537,28 +515,14 @@ def ai_lesson_planner(request):
         return redirect("unauthorized")
 
     if request.method == "POST":
-        topic = request.POST.get("topic")
-        duration = request.POST.get("duration")
-        difficulty = request.POST.get("difficulty")
-
-        lesson_plan = generate_lesson_plan(topic, duration, difficulty)
-
-        # Check if we got an error response and use fallback if needed
-        if "error" in lesson_plan:
-            if lesson_plan.get("quota_exceeded") or lesson_plan.get("rate_limited"):
-                from core.ai.gemini import get_fallback_lesson_plan
-
-                lesson_plan = get_fallback_lesson_plan(topic, duration, difficulty)
-                if lesson_plan.get("is_demo"):
-                    messages.warning(
-                        request, "API quota exceeded. Showing demo content."
-                    )
-
-        return render(
-            request,
-            "core/ai_lesson_result.html",
-            {"lesson_plan": lesson_plan, "type": "lesson_plan"},
+        job = submit_job(
+            request.user,
+            "lesson_plan",
+            topic=request.POST.get("topic"),
+            duration=request.POST.get("duration"),
+            difficulty_level=request.POST.get("difficulty"),
         )
+        return redirect("ai_job_detail", job_id=job.pk)
 
     return render(request, "core/ai_lesson_planner.html")
 
@@ -570,87 +534,84 @@ def ai_quiz_generator(request):
         return redirect("unauthorized")
 
     if request.method == "POST":
-        topic = request.POST.get("topic")
-        num_questions = int(request.POST.get("num_questions", 5))
-        question_type = request.POST.get("question_type")
-
         try:
-            quiz = generate_quiz_questions(topic, num_questions, question_type)
-
-            # Debug: Check what we got from AI
-            print(f"Quiz generated: {quiz}")
-
-            if "error" in quiz:
-                # Handle different types of errors
-                if quiz.get("quota_exceeded") or quiz.get("rate_limited"):
-                    # Use fallback mock data instead of showing error
-                    from core.ai.gemini import get_fallback_quiz_data
-
-                    quiz = get_fallback_quiz_data(topic, num_questions, question_type)
-
-                    # Show warning message about using demo content
-                    if quiz.get("quota_exceeded"):
-                        retry_after = quiz.get("retry_after", 60)
-                        messages.warning(
-                            request,
-                            f"API quota exceeded. Showing demo content. Wait {retry_after} seconds for AI generation or upgrade your Gemini API plan.",
-                        )
-                    else:
-                        messages.warning(
-                            request,
-                            "Rate limit reached. Showing demo content. Please wait before trying AI generation again.",
-                        )
-                else:
-                    messages.error(request, f"Error generating quiz: {quiz['error']}")
-
-                    # Add context about quota limits
-                    context = {
-                        "quota_error": quiz.get("quota_exceeded", False),
-                        "rate_limited": quiz.get("rate_limited", False),
-                        "retry_after": quiz.get("retry_after"),
-                        "error_details": quiz.get("details"),
-                    }
-                    return render(request, "core/ai_quiz_generator.html", context)
-
-            # Store quiz data in session for potential saving
-            request.session["generated_quiz"] = quiz
-
-            return render(
-                request,
-                "core/ai_lesson_result.html",
-                {"quiz": quiz, "type": "quiz", "show_save_button": True},
-            )
-
-        except Exception as e:
-            messages.error(request, f"Unexpected error: {str(e)}")
+            num_questions = int(request.POST.get("num_questions", 5))
+        except ValueError:
+            messages.error(request, "Number of questions must be a whole number.")
             return render(request, "core/ai_quiz_generator.html")
 
+        job = submit_job(
+            request.user,
+            "quiz",
+            topic=request.POST.get("topic"),
+            num_questions=num_questions,
+            question_type=request.POST.get("question_type"),
+        )
+        return redirect("ai_job_detail", job_id=job.pk)
+
     return render(request, "core/ai_quiz_generator.html")
 
 
 @login_required
-def ai_rubric_generator(request):
-    """Generate assignment rubrics using Gemini AI"""
+def ai_quiz_batch(request):
+    """Generate draft quizzes for a list of topics in one background job"""
     if request.user.role != "instructor":
         return redirect("unauthorized")
 
+    courses = Course.objects.filter(instructor=request.user)
     if request.method == "POST":
-        assignment_desc = request.POST.get("assignment_description")
-        criteria = request.POST.get("grading_criteria")
+        course = courses.filter(pk=request.POST.get("course_id") or None).first()
+        topics = list(
+            dict.fromkeys(
+                line.strip()
+                for line in request.POST.get("topics", "").splitlines()
+                if line.strip()
+            )
+        )
+        try:
+            num_questions = int(request.POST.get("num_questions", 5))
+        except ValueError:
+            num_questions = 0
+        question_type = request.POST.get("question_type")
+
+        if course is None:
+            messages.error(request, "Course not found or you don't have permission.")
+        elif not 1 <= len(topics) <= MAX_BATCH_TOPICS:
+            messages.error(
+                request, f"Enter between 1 and {MAX_BATCH_TOPICS} topics, one per line."
+            )
+        elif not 1 <= num_questions <= 20:
+            messages.error(request, "Number of questions must be between 1 and 20.")
+        elif question_type not in dict(Question.QUESTION_TYPES):
+            messages.error(request, "Unknown question type.")
+        else:
+            job = submit_job(
+                request.user,
+                "quiz_batch",
+                course_id=course.pk,
+                topics=topics,
+                num_questions=num_questions,
+                question_type=question_type,
+            )
+            return redirect("ai_job_detail", job_id=job.pk)
 
-        rubric = generate_assignment_rubric(assignment_desc, criteria)
+    return render(request, "core/ai_quiz_batch.html", {"courses": courses})
 
-        # Check for errors and use fallback if needed
-        if isinstance(rubric, dict) and rubric.get("error"):
-            if rubric.get("quota_exceeded") or rubric.get("rate_limited"):
-                from core.ai.gemini import get_fallback_rubric
 
-                rubric = get_fallback_rubric(assignment_desc, criteria)
-                messages.warning(request, "API quota exceeded. Showing demo content.")
+@login_required
+def ai_rubric_generator(request):
+    """Generate assignment rubrics using Gemini AI"""
+    if request.user.role != "instructor":
+        return redirect("unauthorized")
 
-        return render(
-            request, "core/ai_lesson_result.html", {"rubric": rubric, "type": "rubric"}
+    if request.method == "POST":
+        job = submit_job(
+            request.user,
+            "rubric",
+            assignment_description=request.POST.get("assignment_description"),
+            grading_criteria=request.POST.get("grading_criteria"),
         )
+        return redirect("ai_job_detail", job_id=job.pk)
 
     return render(request, "core/ai_rubric_generator.html")
 
@@ -662,24 +623,13 @@ def ai_concept_explainer(request):
         return redirect("unauthorized")
 
     if request.method == "POST":
-        concept = request.POST.get("concept")
-        grade_level = request.POST.get("grade_level")
-
-        explanation = explain_concept(concept, grade_level)
-
-        # Check for errors and use fallback if needed
-        if isinstance(explanation, dict) and explanation.get("error"):
-            if explanation.get("quota_exceeded") or explanation.get("rate_limited"):
-                from core.ai.gemini import get_fallback_explanation
-
-                explanation = get_fallback_explanation(concept, grade_level)
-                messages.warning(request, "API quota exceeded. Showing demo content.")
-
-        return render(
-            request,
-            "core/ai_lesson_result.html",
-            {"explanation": explanation, "concept": concept, "type": "explanation"},
+        job = submit_job(
+            request.user,
+            "explanation",
+            concept=request.POST.get("concept"),
+            grade_level=request.POST.get("grade_level"),
         )
+        return redirect("ai_job_detail", job_id=job.pk)
 
     return render(request, "core/ai_concept_explainer.html")
 
@@ -691,27 +641,96 @@ def ai_syllabus_generator(request):
         return redirect("unauthorized")
 
     if request.method == "POST":
-        course_title = request.POST.get("course_title")
-        duration = request.POST.get("duration")
-        topics = request.POST.get("topics")
+        job = submit_job(
+            request.user,
+            "syllabus",
+            course_title=request.POST.get("course_title"),
+            duration=request.POST.get("duration"),
+            topics_list=request.POST.get("topics"),
+        )
+        return redirect("ai_job_detail", job_id=job.pk)
 
-        syllabus = generate_course_syllabus(course_title, duration, topics)
+    return render(request, "core/ai_syllabus_generator.html")
 
-        # Check for errors and use fallback if needed
-        if isinstance(syllabus, dict) and syllabus.get("error"):
-            if syllabus.get("quota_exceeded") or syllabus.get("rate_limited"):
-                from core.ai.gemini import get_fallback_syllabus
 
-                syllabus = get_fallback_syllabus(course_title, duration, topics)
-                messages.warning(request, "API quota exceeded. Showing demo content.")
+@login_required
+def ai_job_detail(request, job_id):
+    """Progress page of an AI job, showing the generated content once done"""
+    if request.user.role != "instructor":
+        return redirect("unauthorized")
 
-        return render(
-            request,
-            "core/ai_lesson_result.html",
-            {"syllabus": syllabus, "course_title": course_title, "type": "syllabus"},
-        )
+    job = get_object_or_404(AIJob, pk=job_id, requested_by=request.user)
 
-    return render(request, "core/ai_syllabus_generator.html")
+    if job.status == "done":
+        if job.warning:
+            messages.warning(request, job.warning)
+        if job.kind == "quiz_batch":
+            course = get_object_or_404(Course, pk=job.arguments["course_id"])
+            return render(
+                request,
+                "core/ai_quiz_batch_result.html",
+                {"job": job, "course": course},
+            )
+        context = {"type": job.kind}
+        if job.kind == "quiz":
+            # Stored in the session for create_quiz_from_ai
+            request.session["generated_quiz"] = job.result
+            context.update(quiz=job.result, show_save_button=True)
+        elif job.kind == "explanation":
+            context.update(explanation=job.result, concept=job.arguments["concept"])
+        elif job.kind == "syllabus":
+            context.update(
+                syllabus=job.result, course_title=job.arguments["course_title"]
+            )
+        else:
+            context[job.kind] = job.result
+        return render(request, "core/ai_lesson_result.html", context)
+
+    return render(
+        request,
+        "core/ai_job.html",
+        {
+            "job": job,
+            "form_url": reverse(AI_JOB_FORMS[job.kind]),
+            "streams": job.kind in STREAMING_KINDS,
+        },
+    )
+
+
+@login_required
+def ai_job_status(request, job_id):
+    """
+    Status of an AI job as JSON, polled by the progress page.
+
+    With ``?offset=N`` the response also carries the streamed text after the
+    first N characters the page already shows, and the new offset.
+    """
+    job = (
+        AIJob.objects.filter(pk=job_id, requested_by=request.user)
+        .values("status", "progress", "streamed_text")
+        .first()
+    )
+    if job is None:
+        raise Http404("No such job")
+    status = job["status"]
+    data = {"id": str(job_id), "status": status, "done": status in ("done", "failed")}
+    if "offset" in request.GET:
+        try:
+            offset = max(int(request.GET["offset"]), 0)
+        except ValueError:
+            offset = 0
+        text = job["streamed_text"]
+        data.update(text=text[offset:], offset=len(text))
+    if job["progress"]:
+        # Per-topic counts of batch jobs
+        data["progress"] = {
+            "total": len(job["progress"]),
+            "finished": sum(
+                entry["status"] in ("done", "failed") for entry in job["progress"]
+            ),
+            "failed": sum(entry["status"] == "failed" for entry in job["progress"]),
+        }
+    return JsonResponse(data)
 
 
 @login_required
@@ -733,39 +752,17 @@ def create_quiz_from_ai(request):
         try:
             course = Course.objects.get(id=course_id, instructor=request.user)
 
-            # Create the exam
-            exam = Exam.objects.create(
+            # Exam, questions and choices are written in one transaction
+            exam = save_quiz(
+                course,
+                request.user,
+                ai_quiz_questions(quiz_data.get("parsed_questions", [])),
                 title=f"Quiz: {topic}",
-                course=course,
-                created_by=request.user,
                 instructions="AI-generated quiz. Please answer all questions.",
                 generated_content=quiz_data.get("questions", ""),
                 time_limit=60,
             )
 
-            # Create questions from parsed data
-            if "parsed_questions" in quiz_data:
-                for q_data in quiz_data["parsed_questions"]:
-                    question = Question.objects.create(
-                        exam=exam,
-                        text=q_data["text"],
-                        question_type=q_data["type"],
-                        order=q_data["order"],
-                    )
-
-                    # Create choices for multiple choice questions
-                    if q_data["type"] == "multiple_choice" and "choices" in q_data:
-                        for i, choice_data in enumerate(q_data["choices"]):
-                            Choice.objects.create(
-                                question=question,
-                                text=choice_data["text"],
-                                is_correct=(
-                                    choice_data["letter"]
-                                    == q_data.get("correct_answer")
-                                ),
-                                order=i,
-                            )
-
             messages.success(request, f"Quiz '{exam.title}' created successfully!")
             return redirect("course_detail", pk=course.id)
 
@@ -826,7 +823,9 @@ def course_categories_view(request):
 def category_courses_view(request, category_id):
     """Display courses in a specific category"""
     category = get_object_or_404(CourseCategory, id=category_id)
-    courses = Course.objects.filter(category=category, is_published=True)
+    courses = Course.objects.filter(
+        category=category, is_published=True
+    ).select_related("instructor")
     return render(
         request,
         "core/category_courses.html",
@@ -1005,52 +1004,93 @@ def gradebook_view(request, course_id):
         return redirect("unauthorized")
 
     course = get_object_or_404(Course, id=course_id, instructor=request.user)
-    enrollments = Enrollment.objects.filter(course=course)
-    assignments = Assignment.objects.filter(course=course)
-    exams = Exam.objects.filter(course=course)
-
-    # Create gradebook data structure
-    gradebook_data = []
-    for enrollment in enrollments:
-        student_data = {
-            "student": enrollment.student,
-            "assignment_grades": {},
-            "exam_grades": {},
-            "overall_grade": 0,
-        }
-
-        # Get assignment submissions
-        for assignment in assignments:
-            submission = AssignmentSubmission.objects.filter(
-                assignment=assignment, student=enrollment.student
-            ).first()
-            student_data["assignment_grades"][assignment.id] = (
-                submission.grade if submission else None
-            )
-
-        # Get exam submissions
-        for exam in exams:
-            submission = ExamSubmission.objects.filter(
-                exam=exam, student=enrollment.student
-            ).first()
-            student_data["exam_grades"][exam.id] = (
-                submission.grade if submission else None
-            )
-
-        gradebook_data.append(student_data)
+    gradebook = get_gradebook(course)
 
     return render(
         request,
         "core/gradebook.html",
         {
             "course": course,
-            "assignments": assignments,
-            "exams": exams,
-            "gradebook_data": gradebook_data,
+            "assignments": gradebook.assignments,
+            "exams": gradebook.exams,
+            "gradebook_data": list(gradebook.rows()),
         },
     )
 
 
+@login_required
+def exam_item_analysis_view(request, exam_id):
+    """Display item-analysis statistics of an exam for its instructor"""
+    if request.user.role != "instructor":
+        return redirect("unauthorized")
+
+    exam = get_object_or_404(
+        Exam.objects.select_related("course"),
+        id=exam_id,
+        course__instructor=request.user,
+    )
+    return render(
+        request,
+        "core/exam_item_analysis.html",
+        {"exam": exam, "report": exam_item_analysis(exam)},
+    )
+
+
+def _export_course(request, course_id):
+    """Course an instructor (their own) or admin may export, or 404."""
+    courses = Course.objects.all()
+    if request.user.role != "admin":
+        courses = courses.filter(instructor=request.user)
+    return get_object_or_404(courses, id=course_id)
+
+
+def _export_response(request, course, table, name):
+    """
+    Stream a table as CSV, or as XLSX when ``?format=xlsx`` is requested and
+    openpyxl is installed.
+    """
+    header, rows = table
+    filename = f"course-{course.id}-{name}"
+
+    if request.GET.get("format") == "xlsx":
+        spool = tempfile.TemporaryFile()
+        try:
+            write_xlsx(header, rows, spool, title=name.title())
+        except ImportError:
+            # Fall back to CSV, which every role that can export may download
+            spool.close()
+            messages.warning(
+                request, "XLSX export requires openpyxl; exported CSV instead."
+            )
+        else:
+            spool.seek(0)
+            return FileResponse(spool, as_attachment=True, filename=f"{filename}.xlsx")
+
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+@login_required
+def gradebook_export_view(request, course_id):
+    """Export the course gradebook as CSV or XLSX"""
+    if request.user.role not in ["instructor", "admin"]:
+        return redirect("unauthorized")
+
+    course = _export_course(request, course_id)
+    return _export_response(request, course, gradebook_table(course), "gradebook")
+
+
+@login_required
+def roster_export_view(request, course_id):
+    """Export the course roster as CSV or XLSX"""
+    if request.user.role not in ["instructor", "admin"]:
+        return redirect("unauthorized")
+
+    course = _export_course(request, course_id)
+    return _export_response(request, course, roster_table(course), "roster")
+
+
 @login_required
 def assignment_submission_view(request, assignment_id):
     """Handle assignment submissions"""
@@ -1123,14 +1163,10 @@ def analytics_dashboard_view(request):
 
     elif request.user.role == "admin":
         # Admin analytics
-        context.update(
-            {
-                "total_users": User.objects.count(),
-                "total_courses": Course.objects.count(),
-                "total_enrollments": Enrollment.objects.count(),
-                "recent_enrollments": Enrollment.objects.order_by("-enrolled_at")[:10],
-            }
-        )
+        context.update(platform_totals())
+        context["recent_enrollments"] = Enrollment.objects.select_related(
+            "student", "course"
+        ).order_by("-enrolled_at")[:10]
 
     return render(request, "core/analytics_dashboard.html", context)
 
@@ -1,5 +1,7 @@
 import os
 from pathlib import Path
+
+import django
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -149,6 +151,15 @@ else:
             "OPTIONS": {"timeout": 20},
         }
     }
+    if django.VERSION >= (5, 1):
+        # Transactions take the write lock when they begin, waiting up to
+        # the timeout for it, rather than failing when two of them try to
+        # upgrade a read lock at once. Older releases reject the option.
+        DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+    # Tests get an in-memory database unless given a file, which tests that
+    # share the database between threads need
+    if os.environ.get("DATABASE_TEST_NAME"):
+        DATABASES["default"]["TEST"] = {"NAME": os.environ["DATABASE_TEST_NAME"]}
 
 AUTH_USER_MODEL = "core.User"
 
@@ -187,6 +198,35 @@ CRISPY_TEMPLATE_PACK = "tailwind"
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
+# Gemini client: "sdk" calls the API, "fake" answers offline for development.
+# Each attempt gets GEMINI_TIMEOUT seconds and a call, retries included, at
+# most GEMINI_DEADLINE; transient failures are retried GEMINI_MAX_RETRIES times
+GEMINI_TRANSPORT = os.environ.get("GEMINI_TRANSPORT", "sdk")
+GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", 30))
+GEMINI_DEADLINE = float(os.environ.get("GEMINI_DEADLINE", 60))
+GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", 3))
+
+# Gemini response cache: seconds a stored response is reused for, and the
+# number of responses kept before the least recently used are evicted
+GEMINI_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", 7 * 24 * 60 * 60))
+GEMINI_CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRIES", 1000))
+
+# Seconds a Gemini call waits for the shared rate limiter before giving up;
+# 0 rejects at once, which suits request workers
+GEMINI_RATE_LIMIT_WAIT = float(os.environ.get("GEMINI_RATE_LIMIT_WAIT", 0))
+
+# Admin dashboard totals: "counter" reads the maintained counters table,
+# "estimate" uses database planner statistics where available
+PLATFORM_COUNTS_MODE = os.environ.get("PLATFORM_COUNTS_MODE", "counter")
+
+# Short-answer quiz grading: "worker" leaves pending submissions for
+# `manage.py grade_short_answers`, "eager" grades them in-process on commit
+SHORT_ANSWER_GRADING_MODE = os.environ.get("SHORT_ANSWER_GRADING_MODE", "worker")
+
+# AI generation jobs: "worker" leaves queued jobs for `manage.py run_ai_jobs`,
+# "eager" runs them in-process on commit
+AI_JOB_MODE = os.environ.get("AI_JOB_MODE", "worker")
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": ["rest_framework_simplejwt.authentication.JWTAuthentication"],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],